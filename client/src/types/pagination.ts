@@ -7,4 +7,6 @@ export interface PageMeta {
   filters?: Record<string, any>;
   total?: number;
   pages?: number;
+  cursor?: string;
+  next_cursor?: string;
 }
\ No newline at end of file
@@ -4,22 +4,33 @@ from sqlalchemy.orm import Session
 
 from database.database import get_db
 from database.schemas.pagination import Paginated
-from database.schemas.item import ItemCreate, ItemUpdate, ItemRead, ItemWithComponents, LowestChildDetail
+from database.schemas.item import (
+    ItemCreate, ItemUpdate, ItemRead, ItemWithComponents, LowestChildDetail,
+    MaterialRequirementsRequest, MaterialRequirement, ItemBuildable, WhereUsedDetail,
+)
+from database.services.export import check_export_format, stream_export
+from app.utils.etag import etag_guard
 from database.services.item import (
-    get_item, get_all_items, get_all_items_pagniated, create_item, update_item, delete_item, get_item_with_components, get_lowest_children, get_item_by_order_id
+    get_item, get_all_items, get_all_items_pagniated, create_item, update_item, delete_item, get_item_with_components, get_lowest_children, get_item_by_order_id,
+    iter_items_for_export, ITEM_EXPORT_COLUMNS, get_material_requirements, get_buildable_items_paginated,
+    get_where_used,
 
 )
 
 router = APIRouter(prefix="/item", tags=["item"])
 
-@router.get("/paginated", response_model=Paginated[ItemRead])
+# Conditional GET on the item catalog (items + components); 304 before any query
+item_etag = Depends(etag_guard("item"))
+
+@router.get("/paginated", response_model=Paginated[ItemRead], dependencies=[item_etag])
 def read_items_paginated(
     page: int = Query(1, ge=1),
     size: int = Query(50, ge=1, le=200),
     q: Optional[str] = None,
     search_columns: Optional[List[str]] = Query(None, description="Repeat param, e.g. ?search_columns=sku&search_columns=item_name"),
     sort: Optional[List[str]] = Query(None, description='Repeat param, e.g. ?sort=item_name:asc&sort=id:desc'),
-    include_total: bool = False,
+    cursor: Optional[str] = Query(None, description="Opaque cursor from meta.next_cursor (keyset pagination; page is ignored when set)"),
+    include_total: Optional[str] = Query(None, description="exact | estimate | cached (true = exact); adds total/pages/total_kind to meta"),
     db: Session = Depends(get_db),
 ):
     """
@@ -32,10 +43,51 @@ def read_items_paginated(
         q=q,
         search_columns=search_columns,
         sort=sort,
+        cursor=cursor,
         include_total=include_total,
     )
 
-@router.get("", response_model=list[ItemRead])
+@router.get("/buildable", response_model=Paginated[ItemBuildable], dependencies=[item_etag])
+def read_buildable_items(
+    page: int = Query(1, ge=1),
+    size: int = Query(50, ge=1, le=200),
+    q: Optional[str] = None,
+    search_columns: Optional[List[str]] = Query(None, description="Repeat param, e.g. ?search_columns=sku&search_columns=item_name"),
+    sort: Optional[List[str]] = Query(None, description='Repeat param, e.g. ?sort=buildable:asc&sort=item_name:asc'),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from meta.next_cursor (keyset pagination; page is ignored when set)"),
+    include_total: Optional[str] = Query(None, description="exact (true) adds total/pages to meta"),
+    db: Session = Depends(get_db),
+):
+    """
+    How many units of each assembled item (kit/assembly) can be built from
+    current component stock, with the limiting component.
+    """
+    return get_buildable_items_paginated(
+        db,
+        page=page,
+        size=size,
+        q=q,
+        search_columns=search_columns,
+        sort=sort,
+        cursor=cursor,
+        include_total=include_total,
+    )
+
+@router.get("/export")
+def export_items(
+    format: str = Query("ndjson", description="ndjson | csv"),
+    q: Optional[str] = None,
+    search_columns: Optional[List[str]] = Query(None, description="Repeat param, e.g. ?search_columns=sku&search_columns=item_name"),
+    db: Session = Depends(get_db),
+):
+    """
+    Stream all items (optionally searched) as NDJSON or CSV.
+    """
+    fmt = check_export_format(format)
+    rows = iter_items_for_export(db, q=q, search_columns=search_columns)
+    return stream_export(db, rows, fmt=fmt, columns=ITEM_EXPORT_COLUMNS, filename="items")
+
+@router.get("", response_model=list[ItemRead], dependencies=[item_etag])
 def read_items(db: Session = Depends(get_db)):
     """
     Retrieve all items.
@@ -52,7 +104,7 @@ def get_item_by_order(order_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Item not found")
     return items
 
-@router.get("/{item_id}", response_model=ItemRead)
+@router.get("/{item_id}", response_model=ItemRead, dependencies=[item_etag])
 def read_item(item_id: int, db: Session = Depends(get_db)):
     """
     Retrieve an item by its ID.
@@ -90,7 +142,7 @@ def delete_existing_item(item_id: int, db: Session = Depends(get_db)):
     return deleted
 
 # APIs used
-@router.get("/details/{item_id}", response_model=ItemWithComponents)
+@router.get("/details/{item_id}", response_model=ItemWithComponents, dependencies=[item_etag])
 def get_item_details(item_id: int, db: Session = Depends(get_db)):
     """
     Retrieve complete details for a single item, including its components.
@@ -100,7 +152,7 @@ def get_item_details(item_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Item not found")
     return item
 
-@router.get("/lowest-children/{item_id}", response_model=list[LowestChildDetail])
+@router.get("/lowest-children/{item_id}", response_model=list[LowestChildDetail], dependencies=[item_etag])
 def read_lowest_children(item_id: int, db: Session = Depends(get_db)):
     """
     Retrieve all lowest-level child items for a given item, calculating
@@ -112,4 +164,26 @@ def read_lowest_children(item_id: int, db: Session = Depends(get_db)):
     if lowest_children is None:
         raise HTTPException(status_code=404, detail="Item not found")
 
-    return lowest_children
\ No newline at end of file
+    return lowest_children
+
+@router.get("/where-used/{item_id}", response_model=list[WhereUsedDetail], dependencies=[item_etag])
+def read_where_used(item_id: int, db: Session = Depends(get_db)):
+    """
+    Retrieve every assembly that uses the given item, directly (level 1) or
+    through sub-assemblies, with the cumulative quantity needed per unit.
+    """
+    where_used = get_where_used(db, item_id=item_id)
+
+    if where_used is None:
+        raise HTTPException(status_code=404, detail="Item not found")
+
+    return where_used
+
+@router.post("/mrp", response_model=list[MaterialRequirement])
+def read_material_requirements(payload: MaterialRequirementsRequest, db: Session = Depends(get_db)):
+    """
+    Batch material requirements: explode every {item_id, qty} line down to its
+    lowest-level components and return the aggregated requirement per component
+    with current stock and shortfall.
+    """
+    return get_material_requirements(db, [(line.item_id, line.qty) for line in payload.items])
@@ -2,7 +2,7 @@
 from __future__ import annotations
 
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File
 from sqlalchemy.orm import Session
 
 from database.database import get_db
@@ -10,14 +10,19 @@ from database.schemas.pagination import Paginated
 from database.schemas.order import (
     OrderUpdate,
     OrderRead,
-    OrderDetails
+    OrderDetails,
+    OrderImportResult,
 )
+from database.services.export import check_export_format, stream_export
+from database.services.order_import import check_import_format, import_orders
 from database.services.order import (
     get_order,
     update_order,
     delete_order,
     get_order_with_items_by_id,
     list_orders_with_items as svc_list_orders_with_items,
+    iter_orders_for_export,
+    ORDER_EXPORT_COLUMNS,
 )
 
 router = APIRouter(prefix="/order", tags=["order"])
@@ -32,33 +37,63 @@ def list_orders_with_items(
         alias="search_columns",
         description="Columns to search (e.g. search_columns=name&search_columns=contact&search_columns=status)",
     ),
-    # status: Optional[str] = Query(None, description="Filter by order status"),
+    status: Optional[str] = Query(None, description="Filter by order status"),
     date_from: Optional[str] = Query(None, description="Start date (YYYY-MM-DD or ISO)"),
     date_to: Optional[str] = Query(None, description="End date (exclusive)"),
+    delivery_from: Optional[str] = Query(None, description="Orders with a line delivered on/after this date (YYYY-MM-DD)"),
+    delivery_to: Optional[str] = Query(None, description="Orders with a line delivered before this date (exclusive)"),
     sort: Optional[List[str]] = Query(
         None,
         alias="sort",
         description="sort by order_date | order_id -> e.g. sort=order_date:desc&sort=order_id:desc",
     ),
-    include_total: bool = Query(
-        True, description="If true, also compute COUNT(*) for total/pages"
+    cursor: Optional[str] = Query(None, description="Opaque cursor from meta.next_cursor (keyset pagination; page is ignored when set)"),
+    include_total: Optional[str] = Query(
+        "exact", description="exact | estimate | cached (true = exact); adds total/pages/total_kind to meta"
     ),
+    expand: bool = Query(True, description="Include line items (subRows); false returns per-order totals only"),
     db: Session = Depends(get_db),
 ):
-    """List orders with nested **Items** (offset pagination)."""
+    """List orders with nested **Items** (offset or cursor pagination)."""
     return svc_list_orders_with_items(
         db,
         page=page,
         size=size,
         q=q,
         search_columns=search_columns,
-        # status=status,
+        status=status,
         date_from=date_from,
         date_to=date_to,
+        delivery_from=delivery_from,
+        delivery_to=delivery_to,
         sort=sort,
+        cursor=cursor,
         include_total=include_total,
+        expand=expand,
     )
 
+@router.get("/export")
+def export_orders_with_items(
+    format: str = Query("ndjson", description="ndjson (one order per line, lines nested) | csv (one row per order line)"),
+    q: Optional[str] = Query(None, description="Search text (cust_name, cust_contact, status)"),
+    search_columns: Optional[List[str]] = Query(None, description="Columns to search (e.g. search_columns=name&search_columns=contact)"),
+    db: Session = Depends(get_db),
+):
+    """Stream all orders with their **Items** as NDJSON or CSV."""
+    fmt = check_export_format(format)
+    rows = iter_orders_for_export(db, q=q, search_columns=search_columns, nested=fmt == "ndjson")
+    return stream_export(db, rows, fmt=fmt, columns=ORDER_EXPORT_COLUMNS, filename="orders")
+
+@router.post("/import", response_model=OrderImportResult)
+def import_orders_with_items(
+    file: UploadFile = File(..., description="One record per order line; see database/services/order_import.py for columns"),
+    format: str = Query("csv", description="csv (header row required) | ndjson"),
+    db: Session = Depends(get_db),
+):
+    """Bulk-import orders with their **Items** (COPY into staging, validate, merge in one transaction)."""
+    fmt = check_import_format(format)
+    return import_orders(db, file.file, fmt=fmt)
+
 @router.get("/{order_id}", response_model=OrderRead)
 def read_order(order_id: int, db: Session = Depends(get_db)):
     """Get one order by id."""
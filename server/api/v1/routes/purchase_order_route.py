@@ -9,9 +9,13 @@ from database.schemas.purchase_order import (
     PurchaseOrderDetails, 
     PurchaseOrderUpdate, 
     PurchaseOrderRead, 
+    PurchaseOrderListRow,
     PurchaseOrderItemReadCustom,
     PurchaseOrderCreateFromCart,
+    PurchaseOrderCreateFromCartBySupplier,
     PurchaseOrderStatusUpdate,
+    PurchaseOrderBulkStatusUpdate,
+    PurchaseOrderStatusResult,
 )
 
 from database.schemas.pagination import Paginated
@@ -19,17 +23,22 @@ from database.schemas.pagination import Paginated
 from database.services.purchase_order import (
     get_all_purchase_orders,
     create_purchase_order_from_cart_service,
+    create_purchase_orders_by_supplier_from_cart_service,
     update_purchase_order, 
     delete_purchase_order,
     get_purchase_order_details,
     update_purchase_order_status,
+    update_purchase_order_statuses,
+    iter_purchase_orders_for_export,
+    PO_EXPORT_COLUMNS,
 )
+from database.services.export import check_export_format, stream_export
 
 from database.services.email_service import send_purchase_order_email
 
 router = APIRouter(prefix="/purchase-order", tags=["purchase-order"])
 
-@router.get("", response_model=Paginated[PurchaseOrderRead])
+@router.get("", response_model=Paginated[PurchaseOrderListRow])
 def list_purchase_orders(
     page: int = Query(1, ge=1, description="Page number (1-based)"),
     size: int = Query(50, ge=1, le=200, description="Page size"),
@@ -42,10 +51,12 @@ def list_purchase_orders(
         None,
         description='Sort tokens (repeat param), e.g. ?sort=order_date:desc&sort=id:desc',
     ),
-    include_total: bool = Query(
-        False,
-        description="If true, run COUNT(*) to include total/pages in meta",
+    cursor: Optional[str] = Query(None, description="Opaque cursor from meta.next_cursor (keyset pagination; page is ignored when set)"),
+    include_total: Optional[str] = Query(
+        None,
+        description="exact | estimate | cached (true = exact); adds total/pages/total_kind to meta",
     ),
+    enriched: bool = Query(False, description="Add supplier_name, line_count and total_qty (one query; allows sort=supplier_name)"),
     db: Session = Depends(get_db),
 ):
     """
@@ -53,7 +64,7 @@ def list_purchase_orders(
     Mirrors service signature and returns:
     {
       "meta": {...},
-      "data": [PurchaseOrderRead, ...]
+      "data": [PurchaseOrderListRow, ...]
     }
     """
     return get_all_purchase_orders(
@@ -63,9 +74,25 @@ def list_purchase_orders(
         q=q,
         search_columns=search_columns,
         sort=sort,  
+        cursor=cursor,
         include_total=include_total,
+        enriched=enriched,
     )
 
+@router.get("/export")
+def export_purchase_orders(
+    format: str = Query("ndjson", description="ndjson (one PO per line, lines nested) | csv (one row per PO line)"),
+    q: Optional[str] = Query(None, description="Free-text search value"),
+    search_columns: Optional[List[str]] = Query(None, description="Columns to search (repeat param)"),
+    db: Session = Depends(get_db),
+):
+    """
+    Stream all purchase orders with supplier name and line items as NDJSON or CSV.
+    """
+    fmt = check_export_format(format)
+    rows = iter_purchase_orders_for_export(db, q=q, search_columns=search_columns, nested=fmt == "ndjson")
+    return stream_export(db, rows, fmt=fmt, columns=PO_EXPORT_COLUMNS, filename="purchase_orders")
+
 @router.get("/{po_id}", response_model=PurchaseOrderDetails)
 def read_purchase_order_details(po_id: int, db: Session = Depends(get_db)):
     """
@@ -116,6 +143,32 @@ async def create_purchase_order_from_cart( # Renamed for clarity
 
     return new_po
 
+@router.post("/by-supplier", response_model=List[PurchaseOrderDetails])
+async def create_purchase_orders_by_supplier_from_cart(
+    payload: PurchaseOrderCreateFromCartBySupplier,
+    background_tasks: BackgroundTasks,
+    request: Request,
+    db: Session = Depends(get_db),
+):
+    """
+    Split the user's cart into one purchase order per supplier and clear the
+    cart in a single transaction. Each supplier is emailed its own PO in a
+    background task.
+    """
+    user_payload = getattr(request.state, "user", None)
+    if not user_payload or "user_id" not in user_payload:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+        )
+
+    new_pos = create_purchase_orders_by_supplier_from_cart_service(db, payload, user_payload["user_id"])
+
+    for po in new_pos:
+        background_tasks.add_task(send_purchase_order_email, po_id=po["id"])
+
+    return new_pos
+
 @router.put("/{po_id}", response_model=PurchaseOrderRead)
 def update_existing_purchase_order(po_id: int, payload: PurchaseOrderUpdate, db: Session = Depends(get_db)):
     """
@@ -136,6 +189,15 @@ def delete_existing_purchase_order(po_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Purchase order not found")
     return deleted
 
+@router.patch("/status", response_model=List[PurchaseOrderStatusResult])
+def set_purchase_order_statuses(payload: PurchaseOrderBulkStatusUpdate, db: Session = Depends(get_db)):
+    """
+    Move many purchase orders to one status in a single transaction (e.g.
+    confirm a day's deliveries). Invalid transitions are reported per PO and
+    skipped; stock for newly confirmed POs is incremented in one update.
+    """
+    return update_purchase_order_statuses(db, payload.ids, payload.status)
+
 @router.patch("/{po_id}/status", response_model=PurchaseOrderDetails)
 def set_purchase_order_status(
     po_id: int,
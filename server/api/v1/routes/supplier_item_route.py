@@ -1,3 +1,4 @@
+from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 
@@ -14,12 +15,13 @@ router = APIRouter(prefix="/supplier-item", tags=["supplier-item"])
 def read_supplier_items(
     page: int = Query(1, ge=1, description="Page number (1-based)"),
     size: int = Query(50, ge=1, le=200, description="Page size"),
-    include_total: bool = False,
+    cursor: Optional[str] = Query(None, description="Opaque cursor from meta.next_cursor (keyset pagination; page is ignored when set)"),
+    include_total: Optional[str] = Query(None, description="exact | estimate | cached (true = exact); adds total/pages/total_kind to meta"),
     db: Session = Depends(get_db)):
     """
     Retrieve all supplier-item relationships.
     """
-    return get_supplier_items(db)
+    return get_supplier_items(db, page=page, size=size, cursor=cursor, include_total=include_total)
 
 @router.get("/{supplier_item_id}", response_model=SupplierItemRead)
 def read_supplier_item(supplier_item_id: int, db: Session = Depends(get_db)):
@@ -1,9 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from database.database import get_db
-from database.schemas.supplier import SupplierCreate, SupplierUpdate, SupplierRead, SupplierSearchByItems
+from database.schemas.supplier import SupplierCreate, SupplierUpdate, SupplierRead, SupplierSearchByItems, SupplierCoverPlan
 from database.services.supplier import (
-    get_supplier, get_all_suppliers, create_supplier, update_supplier, delete_supplier, get_suppliers_by_items
+    get_supplier, get_all_suppliers, create_supplier, update_supplier, delete_supplier, get_suppliers_by_items,
+    plan_supplier_cover,
 )
 
 router = APIRouter(prefix="/supplier", tags=["supplier"])
@@ -65,4 +66,17 @@ def find_suppliers_by_all_items(
     Returns an empty list if no supplier can fulfill the entire item list.
     """
     suppliers = get_suppliers_by_items(db, item_ids=payload.item_ids)
-    return suppliers
\ No newline at end of file
+    return suppliers
+
+@router.post("/cover-plan", response_model=SupplierCoverPlan)
+def plan_suppliers_for_items(
+    payload: SupplierSearchByItems,
+    db: Session = Depends(get_db)
+):
+    """
+    Suggest a split of the provided item IDs across as few suppliers as
+    possible (one PO each), for carts no single supplier can fulfil.
+
+    Items no supplier stocks are returned in `uncovered_item_ids`.
+    """
+    return plan_supplier_cover(db, item_ids=payload.item_ids)
@@ -25,8 +25,9 @@ def read_users(
         alias="sort",
         description="Sort by columns, e.g. sort=name:asc&sort=email:desc",
     ),
-    include_total: bool = Query(
-        True, description="If true, also compute COUNT(*) for total/pages"
+    cursor: Optional[str] = Query(None, description="Opaque cursor from meta.next_cursor (keyset pagination; page is ignored when set)"),
+    include_total: Optional[str] = Query(
+        "exact", description="exact | estimate | cached (true = exact); adds total/pages/total_kind to meta"
     ),
     db: Session = Depends(get_db),
 ):
@@ -40,6 +41,7 @@ def read_users(
         q=q,
         search_columns=search_columns,
         sort=sort,
+        cursor=cursor,
         include_total=include_total,
     )
 
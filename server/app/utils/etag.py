@@ -0,0 +1,69 @@
+"""
+Versioned ETags for conditional GETs
+Each resource has an in-process version counter that its write services bump
+after commit; read endpoints answer If-None-Match hits with 304 before any
+database work happens
+"""
+
+import threading
+import uuid
+from typing import Callable, Dict
+
+from fastapi import HTTPException, Request, Response, status
+
+# Differs per process start, so ETags issued before a restart (or by data
+# loaded while the app was down, e.g. seeding) never validate afterwards.
+# Counters live in this process only, which matches the single uvicorn worker
+# the app is deployed with.
+_BOOT_ID = uuid.uuid4().hex[:8]
+
+_versions: Dict[str, int] = {}
+_lock = threading.Lock()
+
+
+def bump_version(*resources: str) -> None:
+    """Mark `resources` as changed; call after the write is committed."""
+    with _lock:
+        for resource in resources:
+            _versions[resource] = _versions.get(resource, 0) + 1
+
+
+def current_etag(resource: str) -> str:
+    """Weak ETag for the current version of `resource`."""
+    return f'W/"{resource}-{_BOOT_ID}-{_versions.get(resource, 0)}"'
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # weak comparison: ignore W/ prefixes
+    wanted = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == wanted:
+            return True
+    return False
+
+
+def etag_guard(resource: str) -> Callable[[Request, Response], None]:
+    """
+    Build a route dependency for conditional GETs on `resource`
+
+    Raises a bodiless 304 when If-None-Match matches the current version,
+    otherwise stamps the response with ETag and Cache-Control: no-cache so
+    clients revalidate every time
+    """
+    def _guard(request: Request, response: Response) -> None:
+        etag = current_etag(resource)
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and _matches(if_none_match, etag):
+            raise HTTPException(
+                status_code=status.HTTP_304_NOT_MODIFIED,
+                headers={"ETag": etag, "Cache-Control": "no-cache"},
+            )
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = "no-cache"
+
+    return _guard
@@ -4,7 +4,11 @@ Handles syncing data between the IMS database and Google Sheets
 """
 
 import logging
-from typing import Optional, List, Dict, Any
+import random
+import re
+import threading
+import time
+from typing import Callable, Optional, List, Dict, Any
 from pathlib import Path
 
 import gspread
@@ -13,6 +17,88 @@ from gspread.exceptions import SpreadsheetNotFound, APIError
 
 logger = logging.getLogger(__name__)
 
+SUPPLIER_HEADERS = ['ID', 'Name', 'Description', 'Email', 'Contact Number', 'Created At', 'Updated At']
+ITEM_HEADERS = ['ID', 'SKU', 'Type', 'Item Name', 'Variant', 'Quantity', 'Threshold Qty', 'Created At', 'Updated At']
+
+
+def supplier_row(supplier_data: Dict[str, Any]) -> List[Any]:
+    """Suppliers worksheet row for a supplier dict (columns = SUPPLIER_HEADERS)."""
+    return [
+        supplier_data.get('id', ''),
+        supplier_data.get('name', ''),
+        supplier_data.get('description', ''),
+        supplier_data.get('email', ''),
+        supplier_data.get('contact_number', ''),
+        str(supplier_data.get('created_at', '')),
+        str(supplier_data.get('updated_at', ''))
+    ]
+
+
+def item_row(item_data: Dict[str, Any]) -> List[Any]:
+    """Inventory worksheet row for an item dict (columns = ITEM_HEADERS)."""
+    return [
+        item_data.get('id', ''),
+        item_data.get('sku', ''),
+        item_data.get('type', ''),
+        item_data.get('item_name', ''),
+        item_data.get('variant', ''),
+        item_data.get('qty', 0),
+        item_data.get('threshold_qty', 0),
+        str(item_data.get('created_at', '')),
+        str(item_data.get('updated_at', ''))
+    ]
+
+
+class WriteRateLimiter:
+    """
+    Token bucket for Sheets API requests: `per_minute` requests on average,
+    up to `burst` back to back. `acquire()` blocks until a token is free.
+    """
+
+    def __init__(self, per_minute: float = 50, burst: int = 5):
+        self.rate = per_minute / 60.0
+        self.capacity = float(burst)
+        self._tokens = float(burst)
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._stamp) * self.rate)
+                self._stamp = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def call_with_backoff(
+    fn: Callable[..., Any],
+    *args: Any,
+    limiter: Optional[WriteRateLimiter] = None,
+    max_retries: int = 6,
+    **kwargs: Any,
+) -> Any:
+    """
+    Call a gspread method through `limiter`, retrying quota (429) and server
+    (5xx) errors with exponential backoff plus jitter (1s, 2s, 4s ... 64s).
+    """
+    for attempt in range(max_retries + 1):
+        if limiter is not None:
+            limiter.acquire()
+        try:
+            return fn(*args, **kwargs)
+        except APIError as e:
+            if attempt == max_retries or not (e.code == 429 or e.code >= 500):
+                raise
+            delay = min(2 ** attempt, 64) + random.uniform(0, 1)
+            logger.warning(f"Google Sheets API error {e.code}, retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+
 class GoogleSheetsClient:
     """Client for managing Google Sheets operations"""
     
@@ -28,6 +114,10 @@ class GoogleSheetsClient:
         self.sheet_id = sheet_id
         self._client = None
         self._spreadsheet = None
+        # worksheet title -> handle whose header row has been verified
+        self._worksheets: Dict[str, gspread.Worksheet] = {}
+        # worksheet title -> {ID column value: row number}, see _find_row
+        self._row_index: Dict[str, Dict[str, int]] = {}
         
     def _get_client(self) -> gspread.Client:
         """Get or create authenticated gspread client"""
@@ -67,6 +157,10 @@ class GoogleSheetsClient:
         """
         Get existing worksheet or create a new one with headers
         
+        Handles are cached with their verified header row for the lifetime of
+        the client, so only the first call per worksheet hits the API; drop
+        them with invalidate_worksheet_cache().
+        
         Args:
             worksheet_name: Name of the worksheet (e.g., "Suppliers")
             headers: List of column headers
@@ -74,6 +168,9 @@ class GoogleSheetsClient:
         Returns:
             gspread.Worksheet instance
         """
+        worksheet = self._worksheets.get(worksheet_name)
+        if worksheet is not None:
+            return worksheet
         try:
             spreadsheet = self._get_spreadsheet()
             
@@ -81,12 +178,7 @@ class GoogleSheetsClient:
             try:
                 worksheet = spreadsheet.worksheet(worksheet_name)
                 logger.info(f"Found existing worksheet: {worksheet_name}")
-                
-                # Check if headers exist, if not add them
-                existing_headers = worksheet.row_values(1)
-                if not existing_headers or existing_headers != headers:
-                    worksheet.insert_row(headers, index=1)
-                    logger.info(f"Updated headers for worksheet: {worksheet_name}")
+                self._ensure_headers(worksheet, headers)
                     
             except gspread.WorksheetNotFound:
                 # Create new worksheet with headers
@@ -98,11 +190,172 @@ class GoogleSheetsClient:
                 worksheet.append_row(headers)
                 logger.info(f"Created new worksheet: {worksheet_name}")
                 
+            self._worksheets[worksheet_name] = worksheet
             return worksheet
             
         except Exception as e:
             logger.error(f"Failed to get/create worksheet {worksheet_name}: {e}")
             raise
+
+    def _ensure_headers(self, worksheet: gspread.Worksheet, headers: List[str]) -> None:
+        """Make row 1 hold `headers`, rewriting an outdated header row in place."""
+        existing_headers = worksheet.row_values(1)
+        if existing_headers == headers:
+            return
+        if not existing_headers or existing_headers[0] == headers[0]:
+            # empty or an older header layout: overwrite, never stack a second header row
+            worksheet.update(values=[headers], range_name='A1')
+        else:
+            # row 1 holds data: push it down under a new header row
+            worksheet.insert_row(headers, index=1)
+            self.invalidate_row_index(worksheet.title)  # every row moved down
+        logger.info(f"Updated headers for worksheet: {worksheet.title}")
+
+    def warm_up(self) -> None:
+        """
+        Resolve and header-check the master worksheets once (e.g. at worker
+        startup), so later syncs go straight to their data calls.
+        """
+        self.get_or_create_worksheet('Suppliers', SUPPLIER_HEADERS)
+        self.get_or_create_worksheet('Inventory', ITEM_HEADERS)
+
+    def invalidate_worksheet_cache(self, worksheet_name: Optional[str] = None) -> None:
+        """
+        Forget cached worksheet handles, verified headers and row indexes for
+        one worksheet (all if no name given); the next use re-resolves them.
+        """
+        if worksheet_name is None:
+            self._worksheets.clear()
+        else:
+            self._worksheets.pop(worksheet_name, None)
+        self.invalidate_row_index(worksheet_name)
+
+    # ========== ID -> ROW INDEX ==========
+    # Rows are located through a per-worksheet map of column A (the ID) built
+    # with one column read, instead of a worksheet.find() per mutation. The map
+    # follows this client's own appends and deletes; a missing ID triggers one
+    # rebuild (rows added elsewhere). Cached rows are trusted, so an update or
+    # delete is a single request: updates rewrite the ID in column A and check
+    # the range the API reports back, and any mismatch or failed write drops
+    # the map. Rows moved by another process are not seen until then, so
+    # whole-sheet rewriters (bulk sync) reset the map themselves.
+
+    def invalidate_row_index(self, worksheet_name: Optional[str] = None) -> None:
+        """Drop the cached ID -> row map of one worksheet (all if no name given)."""
+        if worksheet_name is None:
+            self._row_index.clear()
+        else:
+            self._row_index.pop(worksheet_name, None)
+
+    def _load_row_index(self, worksheet: gspread.Worksheet) -> Dict[str, int]:
+        index: Dict[str, int] = {}
+        for row_number, value in enumerate(worksheet.col_values(1), start=1):
+            if row_number > 1 and value not in (None, ''):
+                index.setdefault(str(value), row_number)  # first match, like find()
+        self._row_index[worksheet.title] = index
+        return index
+
+    def _find_row(self, worksheet: gspread.Worksheet, entity_id: Any) -> Optional[int]:
+        """Row number holding `entity_id` in column A, or None."""
+        key = str(entity_id)
+        index = self._row_index.get(worksheet.title)
+        if index is not None and key in index:
+            return index[key]
+        # unknown (added elsewhere, or no map yet): rebuild and look again
+        return self._load_row_index(worksheet).get(key)
+
+    def _update_row(self, worksheet: gspread.Worksheet, row_number: int, row: List[Any]) -> None:
+        """Overwrite `row_number` with `row` (column A = ID) in one request."""
+        response = worksheet.update(
+            values=[row], range_name=f'A{row_number}', include_values_in_response=True
+        ) or {}
+        match = re.search(r'![A-Z]+(\d+)', response.get('updatedRange', ''))
+        written = (response.get('updatedData') or {}).get('values') or [[None]]
+        if not match or int(match.group(1)) != row_number or str(written[0][0]) != str(row[0]):
+            logger.warning(f"Unexpected write to {worksheet.title} row {row_number}, rebuilding row index")
+            self.invalidate_row_index(worksheet.title)
+
+    def _remember_append(self, worksheet: gspread.Worksheet, entity_id: Any, response: Any) -> None:
+        index = self._row_index.get(worksheet.title)
+        if index is None:
+            return
+        updated_range = ((response or {}).get('updates') or {}).get('updatedRange', '')
+        match = re.search(r'![A-Z]+(\d+)', updated_range)
+        if match:
+            index.setdefault(str(entity_id), int(match.group(1)))
+        else:
+            self.invalidate_row_index(worksheet.title)
+
+    def _delete_row(self, worksheet: gspread.Worksheet, entity_id: Any) -> bool:
+        """Delete the row holding `entity_id`; False if it is not in the sheet."""
+        key = str(entity_id)
+        row_number = self._find_row(worksheet, key)
+        if row_number is None:
+            return False
+
+        worksheet.delete_rows(row_number)
+        index = self._row_index.get(worksheet.title)
+        if index is not None:
+            self._row_index[worksheet.title] = {
+                other: row - 1 if row > row_number else row
+                for other, row in index.items()
+                if other != key
+            }
+        return True
+    
+    # ========== BULK WRITES ==========
+
+    def bulk_write_worksheet(
+        self,
+        worksheet_name: str,
+        headers: List[str],
+        rows: List[List[Any]],
+        *,
+        chunk_size: int = 500,
+        limiter: Optional[WriteRateLimiter] = None,
+        start_chunk: int = 0,
+        on_chunk: Optional[Callable[[int, int], None]] = None,
+    ) -> gspread.Worksheet:
+        """
+        Replace a worksheet's contents with `headers` + `rows` (column A = ID).
+
+        The sheet image is written top-down in `chunk_size`-row range updates
+        (each one API request, rate limited and retried), so a rerun from
+        `start_chunk` rewrites the same ranges and is safe to resume.
+        `on_chunk(done, total)` runs after each chunk. Rows left over from a
+        longer previous sheet are trimmed at the end.
+        """
+        image = [headers] + rows
+        chunks = [image[i:i + chunk_size] for i in range(0, len(image), chunk_size)]
+        spreadsheet = self._get_spreadsheet()
+        try:
+            worksheet = call_with_backoff(spreadsheet.worksheet, worksheet_name, limiter=limiter)
+        except gspread.WorksheetNotFound:
+            worksheet = call_with_backoff(
+                spreadsheet.add_worksheet, title=worksheet_name, rows=len(image), cols=len(headers), limiter=limiter
+            )
+        if worksheet.row_count < len(image) or worksheet.col_count < len(headers):
+            call_with_backoff(
+                worksheet.resize,
+                rows=max(worksheet.row_count, len(image)),
+                cols=max(worksheet.col_count, len(headers)),
+                limiter=limiter,
+            )
+        self.invalidate_row_index(worksheet.title)
+
+        for k in range(start_chunk, len(chunks)):
+            call_with_backoff(
+                worksheet.update, values=chunks[k], range_name=f'A{k * chunk_size + 1}', limiter=limiter
+            )
+            if on_chunk is not None:
+                on_chunk(k + 1, len(chunks))
+
+        if worksheet.row_count > len(image):
+            call_with_backoff(worksheet.resize, rows=len(image), limiter=limiter)
+        self._worksheets[worksheet.title] = worksheet  # row 1 is `headers` now
+        self._row_index[worksheet.title] = {str(row[0]): n for n, row in enumerate(rows, start=2)}
+        logger.info(f"Bulk wrote {len(rows)} rows to worksheet: {worksheet_name}")
+        return worksheet
     
     def create_supplier_sheet(self, supplier_data: Dict[str, Any]) -> Optional[str]:
         """
@@ -177,27 +430,21 @@ class GoogleSheetsClient:
         """
         try:
             # Only add to master suppliers list (no individual sheet to save storage)
-            headers = ['ID', 'Name', 'Description', 'Email', 'Contact Number', 'Created At', 'Updated At']
+            headers = SUPPLIER_HEADERS
             worksheet = self.get_or_create_worksheet('Suppliers', headers)
             
             # Prepare row data
-            row = [
-                supplier_data.get('id', ''),
-                supplier_data.get('name', ''),
-                supplier_data.get('description', ''),
-                supplier_data.get('email', ''),
-                supplier_data.get('contact_number', ''),
-                str(supplier_data.get('created_at', '')),
-                str(supplier_data.get('updated_at', ''))
-            ]
+            row = supplier_row(supplier_data)
             
             # Append new row
-            worksheet.append_row(row)
+            response = worksheet.append_row(row)
+            self._remember_append(worksheet, supplier_data.get('id', ''), response)
             logger.info(f"Synced new supplier to Google Sheets: {supplier_data.get('name')}")
             return True
             
         except Exception as e:
             logger.error(f"Failed to sync supplier create: {e}")
+            self.invalidate_worksheet_cache('Suppliers')  # re-resolve on retry
             return False
     
     def update_supplier_sheet(self, supplier_data: Dict[str, Any], sheet_url: str) -> bool:
@@ -257,27 +504,18 @@ class GoogleSheetsClient:
             True if successful, False otherwise
         """
         try:
-            headers = ['ID', 'Name', 'Description', 'Email', 'Contact Number', 'Created At', 'Updated At']
+            headers = SUPPLIER_HEADERS
             worksheet = self.get_or_create_worksheet('Suppliers', headers)
             
             # Find the row with matching ID
             supplier_id = str(supplier_data.get('id', ''))
-            cell = worksheet.find(supplier_id, in_column=1)
+            row_number = self._find_row(worksheet, supplier_id)
             
-            if cell:
+            if row_number:
                 # Update the master list row
-                row_number = cell.row
-                row = [
-                    supplier_data.get('id', ''),
-                    supplier_data.get('name', ''),
-                    supplier_data.get('description', ''),
-                    supplier_data.get('email', ''),
-                    supplier_data.get('contact_number', ''),
-                    str(supplier_data.get('created_at', '')),
-                    str(supplier_data.get('updated_at', ''))
-                ]
+                row = supplier_row(supplier_data)
                 
-                worksheet.update(f'A{row_number}:G{row_number}', [row])
+                self._update_row(worksheet, row_number, row)
                 logger.info(f"Updated supplier in Google Sheets: {supplier_data.get('name')}")
                 return True
             else:
@@ -287,6 +525,7 @@ class GoogleSheetsClient:
                 
         except Exception as e:
             logger.error(f"Failed to sync supplier update: {e}")
+            self.invalidate_worksheet_cache('Suppliers')  # re-resolve on retry
             return False
     
     def delete_supplier_sheet(self, sheet_url: str) -> bool:
@@ -335,26 +574,23 @@ class GoogleSheetsClient:
             supplier_id: ID of the supplier to delete
             
         Returns:
-            True if successful, False otherwise
+            True if the row is gone (including when it was never there),
+            False on errors
         """
         try:
-            headers = ['ID', 'Name', 'Description', 'Email', 'Contact Number', 'Created At', 'Updated At']
+            headers = SUPPLIER_HEADERS
             worksheet = self.get_or_create_worksheet('Suppliers', headers)
             
-            # Find and delete the row
-            cell = worksheet.find(str(supplier_id), in_column=1)
-            
-            if cell:
-                row_number = cell.row
-                worksheet.delete_rows(row_number)
+            # Find and delete the row; already gone counts as deleted
+            if self._delete_row(worksheet, supplier_id):
                 logger.info(f"Deleted supplier from Google Sheets: ID {supplier_id}")
-                return True
             else:
-                logger.warning(f"Supplier ID {supplier_id} not found in sheet")
-                return False
+                logger.info(f"Supplier ID {supplier_id} not in sheet, nothing to delete")
+            return True
                 
         except Exception as e:
             logger.error(f"Failed to sync supplier delete: {e}")
+            self.invalidate_worksheet_cache('Suppliers')  # re-resolve on retry
             return False
     
     def get_all_suppliers_from_sheet(self) -> List[Dict[str, Any]]:
@@ -365,7 +601,7 @@ class GoogleSheetsClient:
             List of supplier dictionaries
         """
         try:
-            headers = ['ID', 'Name', 'Description', 'Email', 'Contact Number', 'Created At', 'Updated At']
+            headers = SUPPLIER_HEADERS
             worksheet = self.get_or_create_worksheet('Suppliers', headers)
             
             # Get all records as list of dictionaries
@@ -390,29 +626,21 @@ class GoogleSheetsClient:
             True if successful, False otherwise
         """
         try:
-            headers = ['ID', 'SKU', 'Type', 'Item Name', 'Variant', 'Quantity', 'Threshold Qty', 'Created At', 'Updated At']
+            headers = ITEM_HEADERS
             worksheet = self.get_or_create_worksheet('Inventory', headers)
             
             # Prepare row data
-            row = [
-                item_data.get('id', ''),
-                item_data.get('sku', ''),
-                item_data.get('type', ''),
-                item_data.get('item_name', ''),
-                item_data.get('variant', ''),
-                item_data.get('qty', 0),
-                item_data.get('threshold_qty', 0),
-                str(item_data.get('created_at', '')),
-                str(item_data.get('updated_at', ''))
-            ]
+            row = item_row(item_data)
             
             # Append new row
-            worksheet.append_row(row)
+            response = worksheet.append_row(row)
+            self._remember_append(worksheet, item_data.get('id', ''), response)
             logger.info(f"Synced new item to Google Sheets: {item_data.get('item_name')}")
             return True
             
         except Exception as e:
             logger.error(f"Failed to sync item create: {e}")
+            self.invalidate_worksheet_cache('Inventory')  # re-resolve on retry
             return False
     
     def sync_item_update(self, item_data: Dict[str, Any]) -> bool:
@@ -426,29 +654,18 @@ class GoogleSheetsClient:
             True if successful, False otherwise
         """
         try:
-            headers = ['ID', 'SKU', 'Type', 'Item Name', 'Variant', 'Quantity', 'Threshold Qty', 'Created At', 'Updated At']
+            headers = ITEM_HEADERS
             worksheet = self.get_or_create_worksheet('Inventory', headers)
             
             # Find the row with matching ID
             item_id = str(item_data.get('id', ''))
-            cell = worksheet.find(item_id, in_column=1)
+            row_number = self._find_row(worksheet, item_id)
             
-            if cell:
+            if row_number:
                 # Update the row
-                row_number = cell.row
-                row = [
-                    item_data.get('id', ''),
-                    item_data.get('sku', ''),
-                    item_data.get('type', ''),
-                    item_data.get('item_name', ''),
-                    item_data.get('variant', ''),
-                    item_data.get('qty', 0),
-                    item_data.get('threshold_qty', 0),
-                    str(item_data.get('created_at', '')),
-                    str(item_data.get('updated_at', ''))
-                ]
+                row = item_row(item_data)
                 
-                worksheet.update(f'A{row_number}:I{row_number}', [row])
+                self._update_row(worksheet, row_number, row)
                 logger.info(f"Updated item in Google Sheets: {item_data.get('item_name')}")
                 return True
             else:
@@ -458,6 +675,7 @@ class GoogleSheetsClient:
                 
         except Exception as e:
             logger.error(f"Failed to sync item update: {e}")
+            self.invalidate_worksheet_cache('Inventory')  # re-resolve on retry
             return False
     
     def sync_item_delete(self, item_id: int) -> bool:
@@ -468,25 +686,23 @@ class GoogleSheetsClient:
             item_id: ID of the item to delete
             
         Returns:
-            True if successful, False otherwise
+            True if the row is gone (including when it was never there),
+            False on errors
         """
         try:
-            headers = ['ID', 'SKU', 'Type', 'Item Name', 'Variant', 'Quantity', 'Threshold Qty', 'Created At', 'Updated At']
+            headers = ITEM_HEADERS
             worksheet = self.get_or_create_worksheet('Inventory', headers)
             
-            # Find and delete the row
-            cell = worksheet.find(str(item_id), in_column=1)
-            
-            if cell:
-                worksheet.delete_rows(cell.row)
+            # Find and delete the row; already gone counts as deleted
+            if self._delete_row(worksheet, item_id):
                 logger.info(f"Deleted item from Google Sheets: ID {item_id}")
-                return True
             else:
-                logger.warning(f"Item ID {item_id} not found in sheet")
-                return False
+                logger.info(f"Item ID {item_id} not in sheet, nothing to delete")
+            return True
                 
         except Exception as e:
             logger.error(f"Failed to sync item delete: {e}")
+            self.invalidate_worksheet_cache('Inventory')  # re-resolve on retry
             return False
     
     def get_all_items_from_sheet(self) -> List[Dict[str, Any]]:
@@ -497,7 +713,7 @@ class GoogleSheetsClient:
             List of item dictionaries
         """
         try:
-            headers = ['ID', 'SKU', 'Type', 'Item Name', 'Variant', 'Quantity', 'Threshold Qty', 'Created At', 'Updated At']
+            headers = ITEM_HEADERS
             worksheet = self.get_or_create_worksheet('Inventory', headers)
             
             # Get all records as list of dictionaries
@@ -0,0 +1,39 @@
+"""
+Script to rebuild the monthly_item_demand rollup from order_item.
+Run once after creating the table (6_monthly_item_demand.sql also backfills),
+or whenever the rollup needs to be recomputed; order_item triggers keep it
+current afterwards.
+"""
+
+import logging
+from sqlalchemy.orm import Session
+
+from database.database import SessionLocal
+import database.models  # noqa: F401  (register all mappers)
+from database.services.order_item import rebuild_monthly_item_demand
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    """Main function to backfill the monthly demand rollup"""
+    db: Session = SessionLocal()
+
+    try:
+        logger.info("Rebuilding monthly_item_demand from order_item...")
+        rows = rebuild_monthly_item_demand(db)
+        logger.info(f"Backfill complete: {rows} item-month rows")
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Fatal error during backfill: {str(e)}", exc_info=True)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -30,6 +30,16 @@ class Settings(BaseSettings):
     GOOGLE_SHEETS_ENABLED: Optional[bool] = True
     GOOGLE_SHEETS_CREDENTIALS_PATH: Optional[str] = str(BASE_DIR / "google_credentials.json")
     GOOGLE_SHEETS_SPREADSHEET_ID: Optional[str] = ""
+    # Outbox drain (database/services/sheets_outbox.py)
+    SHEETS_OUTBOX_POLL_SECONDS: Optional[float] = 5.0  # idle wait; commits wake the worker early
+    SHEETS_OUTBOX_BATCH_SIZE: Optional[int] = 100
+    SHEETS_OUTBOX_MAX_ATTEMPTS: Optional[int] = 10
+
+    # BOM graph cache (database/services/bom_cache.py); off = recursive SQL per call
+    BOM_CACHE_ENABLED: Optional[bool] = True
+
+    # Pagination
+    PAGINATION_TOTAL_CACHE_TTL: Optional[int] = 30  # seconds, include_total=cached
 
     # pydantic v2 config
     model_config = SettingsConfigDict(
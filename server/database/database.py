@@ -1,10 +1,13 @@
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, DDL
 from sqlalchemy.orm import sessionmaker, declarative_base, Session
 from psycopg2.extras import RealDictCursor
 
 # Load configuration settings
 Base = declarative_base()
+
+# pg_trgm backs the trigram search indexes declared on the models
+event.listen(Base.metadata, "before_create", DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
 DATABASE_URL = os.getenv("DATABASE_URL")
 engine = create_engine(DATABASE_URL)
 
@@ -2,6 +2,7 @@ from .item import Item
 from .user import User
 from .order import Order
 from .order_item import OrderItem
+from .monthly_item_demand import MonthlyItemDemand
 from .item_component import ItemComponent
 from .user_session import UserSession
 from .cart import CartItem
@@ -9,3 +10,5 @@ from .supplier import Supplier
 from .supplier_item import SupplierItem
 from .purchase_order import PurchaseOrder
 from .purchase_order_item import PurchaseOrderItem
+from .stock_ledger import StockLedger
+from .sheets_outbox import SheetsOutbox
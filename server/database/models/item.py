@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Integer, String, Index
 from sqlalchemy.orm import relationship
 from database.database import Base
 
@@ -20,10 +20,19 @@ class Item(Base):
     order_items = relationship(
         "OrderItem",
         back_populates="item",
-        lazy="selectin",               # list-friendly; batches backrefs
+        lazy="select",                 # never eager: an item's order history is unbounded;
+                                       # opt in per query (see services.item.item_load_options)
         passive_deletes=True,
     )
 
+    __table_args__ = (
+        # Trigram indexes for free-text search (see database/services/search.py)
+        Index("ix_item_sku_trgm", "sku", postgresql_using="gin", postgresql_ops={"sku": "gin_trgm_ops"}),
+        Index("ix_item_type_trgm", "type", postgresql_using="gin", postgresql_ops={"type": "gin_trgm_ops"}),
+        Index("ix_item_item_name_trgm", "item_name", postgresql_using="gin", postgresql_ops={"item_name": "gin_trgm_ops"}),
+        Index("ix_item_variant_trgm", "variant", postgresql_using="gin", postgresql_ops={"variant": "gin_trgm_ops"}),
+    )
+
     def as_dict(self):
         return {c.name: getattr(self, c.name) for c in self.__table__.columns}
 
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, PrimaryKeyConstraint
+from sqlalchemy import Column, Integer, ForeignKey, PrimaryKeyConstraint, Index
 from database.database import Base
 
 class ItemComponent(Base):
@@ -10,6 +10,8 @@ class ItemComponent(Base):
 
     __table_args__ = (
         PrimaryKeyConstraint("parent_id", "child_id", name="pk_item_component"),
+        # The PK serves parent -> children lookups; where-used walks go child -> parents
+        Index("ix_item_component_child_id", "child_id", "parent_id"),
     )
 
     def as_dict(self):
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+from sqlalchemy import Column, Integer, BigInteger, Date, DECIMAL, PrimaryKeyConstraint, DDL, event
+from database.database import Base
+
+class MonthlyItemDemand(Base):
+    """
+    Per-item monthly rollup of order_item (month = first day of the
+    delivery_date's month). Maintained by statement-level triggers on
+    order_item, so every writer (ORM, raw SQL, COPY imports, FK cascades)
+    keeps it current; rebuild with backfill_monthly_demand.py.
+    """
+    __tablename__ = "monthly_item_demand"
+
+    # no FK to item: rows are only ever written by the order_item triggers,
+    # including while an item delete cascades through order_item
+    item_id = Column(Integer, nullable=False)
+    month = Column(Date, nullable=False)
+    qty = Column(BigInteger, nullable=False, default=0)
+    value = Column(DECIMAL(14, 2), nullable=False, default=0)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("item_id", "month", name="pk_monthly_item_demand"),
+    )
+
+    def as_dict(self):
+        return {c.name: getattr(self, c.name) for c in self.__table__.columns}
+
+    def __repr__(self) -> str:
+        return f"<MonthlyItemDemand item_id={self.item_id} month={self.month} qty={self.qty}>"
+
+
+# Trigger DDL, shared with init-scripts/6_monthly_item_demand.sql.
+# Deltas are aggregated per (item_id, month) from the statement's transition
+# tables and upserted in key order, so concurrent writers lock rollup rows in
+# the same order.
+MONTHLY_ITEM_DEMAND_FUNCTION = """
+CREATE OR REPLACE FUNCTION monthly_item_demand_apply() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    -- only the firing event's transition tables exist, hence one branch each
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO monthly_item_demand AS m (item_id, month, qty, value)
+        SELECT item_id, date_trunc('month', delivery_date)::date AS month,
+               SUM(qty_requested), SUM(qty_requested * value)
+        FROM new_rows
+        GROUP BY 1, 2
+        ORDER BY 1, 2
+        ON CONFLICT (item_id, month) DO UPDATE
+            SET qty = m.qty + EXCLUDED.qty,
+                value = m.value + EXCLUDED.value;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO monthly_item_demand AS m (item_id, month, qty, value)
+        SELECT item_id, date_trunc('month', delivery_date)::date AS month,
+               -SUM(qty_requested), -SUM(qty_requested * value)
+        FROM old_rows
+        GROUP BY 1, 2
+        ORDER BY 1, 2
+        ON CONFLICT (item_id, month) DO UPDATE
+            SET qty = m.qty + EXCLUDED.qty,
+                value = m.value + EXCLUDED.value;
+    ELSE
+        INSERT INTO monthly_item_demand AS m (item_id, month, qty, value)
+        SELECT item_id, month, SUM(qty), SUM(value)
+        FROM (
+            SELECT item_id, date_trunc('month', delivery_date)::date AS month,
+                   qty_requested::bigint AS qty, qty_requested * value AS value
+            FROM new_rows
+            UNION ALL
+            SELECT item_id, date_trunc('month', delivery_date)::date,
+                   -qty_requested::bigint, -(qty_requested * value)
+            FROM old_rows
+        ) d
+        GROUP BY 1, 2
+        ORDER BY 1, 2
+        ON CONFLICT (item_id, month) DO UPDATE
+            SET qty = m.qty + EXCLUDED.qty,
+                value = m.value + EXCLUDED.value;
+    END IF;
+    RETURN NULL;
+END
+$$
+"""
+
+# Transition tables allow one event per trigger
+MONTHLY_ITEM_DEMAND_TRIGGERS = (
+    """
+    CREATE OR REPLACE TRIGGER order_item_demand_insert
+        AFTER INSERT ON order_item REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION monthly_item_demand_apply()
+    """,
+    """
+    CREATE OR REPLACE TRIGGER order_item_demand_update
+        AFTER UPDATE ON order_item REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION monthly_item_demand_apply()
+    """,
+    """
+    CREATE OR REPLACE TRIGGER order_item_demand_delete
+        AFTER DELETE ON order_item REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION monthly_item_demand_apply()
+    """,
+)
+
+# create_all: install once order_item and the rollup both exist
+event.listen(Base.metadata, "after_create", DDL(MONTHLY_ITEM_DEMAND_FUNCTION))
+for _trigger in MONTHLY_ITEM_DEMAND_TRIGGERS:
+    event.listen(Base.metadata, "after_create", DDL(_trigger))
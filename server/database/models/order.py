@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from sqlalchemy import Column, Integer, BigInteger, String, DateTime
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Index
 from sqlalchemy.orm import relationship
 from database.database import Base
 
@@ -29,6 +29,19 @@ class Order(Base):
         # order_by="OrderItem.delivery_date.desc()",
     )
 
+    __table_args__ = (
+        # Default list sort (order_date desc, order_id desc) and date-range filters
+        Index("ix_order_order_date_order_id", "order_date", "order_id"),
+        # "status = X and order_date in range", sorted by date
+        Index("ix_order_status_order_date", "status", "order_date"),
+        # bulk import matches incoming orders to existing ones by shopify_order_id
+        Index("ix_order_shopify_order_id", "shopify_order_id"),
+        # Trigram indexes for free-text search (see database/services/search.py)
+        Index("ix_order_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+        Index("ix_order_contact_trgm", "contact", postgresql_using="gin", postgresql_ops={"contact": "gin_trgm_ops"}),
+        Index("ix_order_status_trgm", "status", postgresql_using="gin", postgresql_ops={"status": "gin_trgm_ops"}),
+    )
+
     def as_dict(self):
         return {c.name: getattr(self, c.name) for c in self.__table__.columns}
 
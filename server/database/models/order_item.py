@@ -10,6 +10,7 @@ from sqlalchemy import (
     Text,
     DECIMAL,
     ARRAY,
+    Index,
 )
 from sqlalchemy.orm import relationship, validates
 from database.database import Base
@@ -38,6 +39,11 @@ class OrderItem(Base):
 
     ALLOWED_TAGS = {"shopee", "private", "custom"}
 
+    __table_args__ = (
+        # Order list delivery-date filter (EXISTS on order_id within a date range)
+        Index("ix_order_item_delivery_date_order_id", "delivery_date", "order_id"),
+    )
+
     @validates("tag")
     def validate_tags(self, key, tag_list):
         if tag_list is not None:
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, DateTime, String
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, String, Index
 from sqlalchemy.sql import func
 
 from sqlalchemy.orm import relationship
@@ -29,5 +29,10 @@ class PurchaseOrder(Base):
     # PurchaseOrder (N) -> User (1)
     user = relationship("User", back_populates="purchase_orders", lazy="joined")
 
+    __table_args__ = (
+        # Trigram index for free-text search (see database/services/search.py)
+        Index("ix_purchase_order_status_trgm", "status", postgresql_using="gin", postgresql_ops={"status": "gin_trgm_ops"}),
+    )
+
     def as_dict(self):
         return {c.name: getattr(self, c.name) for c in self.__table__.columns}
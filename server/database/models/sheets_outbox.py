@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from sqlalchemy import Column, BigInteger, Integer, String, Text, DateTime, Index
+from sqlalchemy.sql import func
+from database.database import Base
+
+class SheetsOutbox(Base):
+    """
+    Pending Google Sheets sync events, written in the same transaction as the
+    item / supplier change they mirror and drained by the background worker in
+    database/services/sheets_outbox.py. Rows are deleted once synced.
+    """
+    __tablename__ = "sheets_outbox"
+
+    id = Column(BigInteger, primary_key=True)
+    # no FK: delete events outlive the row they describe
+    entity = Column(String(16), nullable=False)     # "item" | "supplier"
+    entity_id = Column(Integer, nullable=False)
+    op = Column(String(8), nullable=False)          # "create" | "update" | "delete"
+    attempts = Column(Integer, nullable=False, default=0)
+    available_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        # due events in order
+        Index("ix_sheets_outbox_available_at_id", "available_at", "id"),
+        # all pending events of one entity
+        Index("ix_sheets_outbox_entity_entity_id", "entity", "entity_id"),
+    )
+
+    def as_dict(self):
+        return {c.name: getattr(self, c.name) for c in self.__table__.columns}
+
+    def __repr__(self) -> str:
+        return f"<SheetsOutbox {self.op} {self.entity} {self.entity_id} attempts={self.attempts}>"
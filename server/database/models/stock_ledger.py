@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+from sqlalchemy import Column, BigInteger, Integer, String, DateTime, Index
+from sqlalchemy.sql import func
+from database.database import Base
+
+class StockLedger(Base):
+    """
+    Append-only record of every stock movement: one row per item and source
+    document, written alongside the `item.qty` change it explains (see
+    database/services/stock.py). Rows are never updated or deleted, so
+    `item_id` / `purchase_order_id` are plain audit columns rather than
+    foreign keys: deleting an item or PO must not cascade into its history.
+    """
+    __tablename__ = "stock_ledger"
+
+    id = Column(BigInteger, primary_key=True)
+    item_id = Column(Integer, nullable=False)
+    qty_delta = Column(Integer, nullable=False)
+    qty_after = Column(Integer, nullable=False)     # item.qty right after this movement
+    reason = Column(String(32), nullable=False)     # e.g. "po_confirmed"
+    purchase_order_id = Column(Integer, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        # per-item history, newest last
+        Index("ix_stock_ledger_item_id_id", "item_id", "id"),
+    )
+
+    def as_dict(self):
+        return {c.name: getattr(self, c.name) for c in self.__table__.columns}
+
+    def __repr__(self) -> str:
+        return f"<StockLedger item_id={self.item_id} delta={self.qty_delta} reason={self.reason}>"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, CheckConstraint
+from sqlalchemy import Column, Integer, String, CheckConstraint, Index
 from sqlalchemy.orm import relationship
 from database.database import Base
 
@@ -28,6 +28,10 @@ class User(Base):
 
     __table_args__ = (
         CheckConstraint("role IN ('admin', 'user')", name="check_user_role"),
+        # Trigram indexes for free-text search (see database/services/search.py)
+        Index("ix_user_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+        Index("ix_user_email_trgm", "email", postgresql_using="gin", postgresql_ops={"email": "gin_trgm_ops"}),
+        Index("ix_user_role_trgm", "role", postgresql_using="gin", postgresql_ops={"role": "gin_trgm_ops"}),
     )
 
     def as_dict(self):
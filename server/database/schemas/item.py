@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List
 
 class ItemBase(BaseModel):
@@ -44,4 +44,30 @@ class LowestChildDetail(BaseModel):
     id: int
     sku: str
     item_name: str
-    total_qty_required: int
\ No newline at end of file
+    total_qty_required: int
+
+class WhereUsedDetail(BaseModel):
+    id: int
+    sku: str
+    item_name: str
+    qty_per_unit: int
+    level: int
+
+class ItemBuildable(ItemRead):
+    buildable: int
+    limiting_item_id: Optional[int] = None
+
+class MaterialRequirementLine(BaseModel):
+    item_id: int = Field(..., gt=0)
+    qty: int = Field(..., gt=0)
+
+class MaterialRequirementsRequest(BaseModel):
+    items: List[MaterialRequirementLine] = Field(..., min_length=1, max_length=5000)
+
+class MaterialRequirement(BaseModel):
+    id: int
+    sku: str
+    item_name: str
+    required_qty: int
+    on_hand_qty: int
+    shortfall: int
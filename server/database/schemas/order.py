@@ -68,7 +68,23 @@ class OrderDetails(BaseModel):
     order_qty: int
     status: str
     total_value: Decimal
+    line_count: Optional[int] = None
     subRows: List[ItemMergedRead]
 
     class ConfigDict:
-        orm_mode = True
\ No newline at end of file
+        orm_mode = True
+
+
+class OrderImportError(BaseModel):
+    row: int                       # 1-based data row (CSV) / line (NDJSON)
+    order_ref: Optional[str] = None
+    error: str
+
+
+class OrderImportResult(BaseModel):
+    """Outcome of a bulk import; orders with any error are skipped whole."""
+    orders_created: int
+    orders_updated: int
+    orders_rejected: int
+    lines_imported: int
+    errors: List[OrderImportError]
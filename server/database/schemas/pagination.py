@@ -13,6 +13,9 @@ class PageMeta(BaseModel):
     filters: Dict[str, Any]
     total: Optional[int] = None
     pages: Optional[int] = None
+    total_kind: Optional[str] = None  # exact | estimate | cached
+    cursor: Optional[str] = None
+    next_cursor: Optional[str] = None
 
 class Paginated(BaseModel, Generic[T]):
     """
@@ -33,6 +33,12 @@ class PurchaseOrderRead(PurchaseOrderBase):
     class ConfigDict:
         orm_mode = True
 
+class PurchaseOrderListRow(PurchaseOrderRead):
+    """List row; the extra fields are filled with `enriched=true`."""
+    supplier_name: Optional[str] = None
+    line_count: Optional[int] = None
+    total_qty: Optional[int] = None
+
 class PurchaseOrderDetails(BaseModel):
     id: int
     supplier_id: Optional[int] = None
@@ -60,5 +66,23 @@ class PurchaseOrderCreateFromCart(BaseModel):
     status: Optional[PurchaseOrderStatus] = PurchaseOrderStatus.PENDING
     order_date: date = Field(default_factory=date.today)
 
+class PurchaseOrderCreateFromCartBySupplier(BaseModel):
+    """Cart -> one PO per supplier; suppliers come from SupplierItem."""
+    status: Optional[PurchaseOrderStatus] = PurchaseOrderStatus.PENDING
+    order_date: date = Field(default_factory=date.today)
+
 class PurchaseOrderStatusUpdate(BaseModel):
-    status: PurchaseOrderStatus
\ No newline at end of file
+    status: PurchaseOrderStatus
+
+class PurchaseOrderBulkStatusUpdate(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=500)
+    status: PurchaseOrderStatus
+
+class PurchaseOrderStatusResult(BaseModel):
+    """Compact per-PO outcome of a bulk status update."""
+    id: int
+    previous_status: Optional[str] = None
+    status: Optional[str] = None
+    updated: bool = False             # status changed by this request
+    stock_incremented: bool = False
+    error: Optional[str] = None
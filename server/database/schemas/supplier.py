@@ -25,3 +25,12 @@ class SupplierRead(SupplierBase):
 class SupplierSearchByItems(BaseModel):
     item_ids: List[int] = Field(..., min_length=1, description="A list of item IDs to search for.")
 
+
+class SupplierCoverGroup(BaseModel):
+    supplier: SupplierRead
+    item_ids: List[int]
+
+class SupplierCoverPlan(BaseModel):
+    """Suggested split of items into as few suppliers (POs) as possible."""
+    groups: List[SupplierCoverGroup] = Field(default_factory=list)
+    uncovered_item_ids: List[int] = Field(default_factory=list)
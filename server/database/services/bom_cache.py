@@ -0,0 +1,239 @@
+from __future__ import annotations
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+import threading
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from database.models.item import Item
+from database.models.item_component import ItemComponent
+from database.services.buildable_cache import invalidate_buildable_quantities
+
+"""Process-local bill-of-materials graph.
+
+The whole `item_component` table is loaded once into compressed adjacency
+arrays (CSR layout: one offsets array over parallel id / quantity arrays),
+forward (parent -> children) and reverse (child -> parents). Every parent's
+multi-level leaf explosion is precomputed, so BOM explosions, component
+lookups and where-used walks are answered from memory.
+
+The snapshot is dropped whenever a committed ORM transaction touched
+`item_component` or deleted an `item` (components cascade in the database),
+and writers that bypass the ORM call `invalidate_bom_graph()`. A generation
+counter keeps a load that raced with a write from installing stale data.
+"""
+
+Leaves = Tuple[Tuple[int, int], ...]   # ((leaf_id, qty per unit of the root), ...)
+
+
+class _Adjacency:
+    """CSR adjacency: `key -> [(neighbour_id, qty), ...]` from edges sorted by key."""
+
+    def __init__(self, edges: Iterable[Tuple[int, int, int]]):
+        self.index: Dict[int, int] = {}   # key -> position in offsets
+        self._offsets = array("l", [0])
+        self._ids = array("l")
+        self._qtys = array("q")
+        for key, other_id, qty in edges:
+            if key not in self.index:
+                if self.index:
+                    self._offsets.append(len(self._ids))
+                self.index[key] = len(self.index)
+            self._ids.append(other_id)
+            self._qtys.append(qty)
+        if self.index:
+            self._offsets.append(len(self._ids))
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def get(self, key: int) -> List[Tuple[int, int]]:
+        pos = self.index.get(key)
+        if pos is None:
+            return []
+        lo, hi = self._offsets[pos], self._offsets[pos + 1]
+        return list(zip(self._ids[lo:hi], self._qtys[lo:hi]))
+
+
+class BomCycleError(Exception):
+    def __init__(self, item_ids: Iterable[int]):
+        self.item_ids = tuple(sorted(set(item_ids)))
+        super().__init__(f"BOM cycle detected at item(s): {', '.join(map(str, self.item_ids))}")
+
+
+class BomGraph:
+    """Immutable snapshot of `item_component`."""
+
+    def __init__(self, edges: Iterable[Tuple[int, int, int]]):
+        """`edges` are `(parent_id, child_id, qty_required)` sorted by parent_id."""
+        edges = list(edges)
+        self._forward = _Adjacency(edges)
+        self._reverse = _Adjacency(sorted((c, p, q) for p, c, q in edges))
+
+        self._leaves: Dict[int, Leaves] = {}
+        self._cycles: Dict[int, Tuple[int, ...]] = {}
+        for parent_id in self._forward.index:
+            self._explode(parent_id, set())
+
+    def __len__(self) -> int:
+        return len(self._forward)
+
+    def is_parent(self, item_id: int) -> bool:
+        return item_id in self._forward.index
+
+    def parents(self) -> List[int]:
+        """Ids of every item that has components."""
+        return list(self._forward.index)
+
+    def children(self, item_id: int) -> List[Tuple[int, int]]:
+        """Direct components of `item_id` as `(child_id, qty_required)`."""
+        return self._forward.get(item_id)
+
+    def used_in(self, item_id: int) -> List[Tuple[int, int]]:
+        """Direct parents of `item_id` as `(parent_id, qty_required)`."""
+        return self._reverse.get(item_id)
+
+    def where_used(self, item_id: int) -> List[Tuple[int, int, int]]:
+        """Every assembly that uses `item_id`, directly or through sub-assemblies.
+
+        Returns `(ancestor_id, qty per unit of the ancestor, level)` sorted by
+        ancestor id, where `level` is the shortest distance (1 = direct parent)
+        and quantities are summed over every path.
+
+        Raises:
+          BomCycleError if the BOM above `item_id` contains a cycle.
+        """
+        # ancestors (plus the item itself) reachable upward
+        seen = {item_id}
+        stack = [item_id]
+        while stack:
+            for parent_id, _ in self.used_in(stack.pop()):
+                if parent_id not in seen:
+                    seen.add(parent_id)
+                    stack.append(parent_id)
+
+        # Kahn's order over that subgraph: a node is final once all of its
+        # children inside the subgraph have pushed their quantities up.
+        pending = {
+            node: sum(1 for child_id, _ in self.children(node) if child_id in seen)
+            for node in seen
+        }
+        if pending[item_id]:
+            raise BomCycleError([item_id])
+        multiplier = {item_id: 1}
+        level = {item_id: 0}
+        ready = [item_id]
+        done = 0
+        while ready:
+            node = ready.pop()
+            done += 1
+            for parent_id, qty in self.used_in(node):
+                multiplier[parent_id] = multiplier.get(parent_id, 0) + multiplier[node] * qty
+                level[parent_id] = min(level.get(parent_id, level[node] + 1), level[node] + 1)
+                pending[parent_id] -= 1
+                if pending[parent_id] == 0:
+                    ready.append(parent_id)
+        if done < len(seen):
+            raise BomCycleError(node for node, left in pending.items() if left)
+
+        return sorted(
+            (node, multiplier[node], level[node]) for node in seen if node != item_id
+        )
+
+    def leaves(self, item_id: int) -> Leaves:
+        """Lowest-level components of one unit of `item_id` (itself if not a parent).
+
+        Raises:
+          BomCycleError if the BOM below `item_id` contains a cycle.
+        """
+        if item_id in self._cycles:
+            raise BomCycleError(self._cycles[item_id])
+        return self._leaves.get(item_id, ((item_id, 1),))
+
+    def _explode(self, item_id: int, on_path: Set[int]) -> Optional[Leaves]:
+        if item_id in self._leaves:
+            return self._leaves[item_id]
+        if item_id in self._cycles:
+            return None
+        if item_id not in self._forward.index:
+            return ((item_id, 1),)
+
+        on_path.add(item_id)
+        totals: Dict[int, int] = {}
+        cycle_ids: Set[int] = set()
+        for child_id, qty in self.children(item_id):
+            if child_id in on_path:
+                cycle_ids.add(child_id)
+                continue
+            child_leaves = self._explode(child_id, on_path)
+            if child_leaves is None:
+                cycle_ids.update(self._cycles[child_id])
+                continue
+            for leaf_id, leaf_qty in child_leaves:
+                totals[leaf_id] = totals.get(leaf_id, 0) + qty * leaf_qty
+        on_path.discard(item_id)
+
+        if cycle_ids:
+            self._cycles[item_id] = tuple(sorted(cycle_ids))
+            return None
+        self._leaves[item_id] = tuple(sorted(totals.items()))
+        return self._leaves[item_id]
+
+
+_graph: Optional[BomGraph] = None
+_generation = 0
+_lock = threading.Lock()
+
+
+def invalidate_bom_graph() -> None:
+    """Drop the cached graph; call after committing a non-ORM BOM write."""
+    global _graph, _generation
+    with _lock:
+        _graph = None
+        _generation += 1
+    invalidate_buildable_quantities()  # derived from the BOM
+
+
+def get_bom_graph(db: Session) -> BomGraph:
+    """Return the cached BOM graph, loading it with one query when missing."""
+    global _graph
+    graph = _graph
+    if graph is not None:
+        return graph
+    with _lock:
+        if _graph is not None:
+            return _graph
+        generation = _generation
+    rows = db.execute(
+        text("SELECT parent_id, child_id, qty_required FROM item_component ORDER BY parent_id, child_id")
+    ).all()
+    graph = BomGraph(rows)
+    with _lock:
+        # don't publish what a BOM write committed meanwhile (or still pending
+        # in this session's own transaction) would make stale
+        if _generation == generation and not db.info.get("bom_dirty"):
+            _graph = graph
+    return graph
+
+
+# Any committed ORM write that can change the BOM drops the snapshot.
+@event.listens_for(Session, "after_flush")
+def _track_bom_writes(session: Session, flush_context: Any) -> None:
+    if session.info.get("bom_dirty"):
+        return
+    if any(isinstance(obj, ItemComponent) for obj in (*session.new, *session.dirty, *session.deleted)) or any(
+        isinstance(obj, Item) for obj in session.deleted
+    ):
+        session.info["bom_dirty"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session) -> None:
+    if session.info.pop("bom_dirty", False):
+        invalidate_bom_graph()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_bom_writes(session: Session) -> None:
+    session.info.pop("bom_dirty", None)
@@ -0,0 +1,78 @@
+from __future__ import annotations
+from typing import Any, Callable, List, Optional, Tuple
+import threading
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from database.models.item import Item
+from database.models.item_component import ItemComponent
+
+"""Process-local buildable quantities.
+
+The `(item_id, buildable, limiting_item_id)` vector behind GET /item/buildable
+depends on the BOM and on component stock, so it is kept between requests and
+dropped whenever a committed ORM transaction wrote an `item` or an
+`item_component`, whenever the BOM graph is invalidated, and after commits of
+set-based stock movements (database/services/stock.py marks its session with
+`mark_stock_changed`). Like the BOM graph, a generation counter keeps a
+computation that raced with a write from installing stale data.
+"""
+
+BuildableRows = List[Tuple[int, int, int]]   # [(item_id, buildable, limiting_item_id), ...]
+
+_rows: Optional[BuildableRows] = None
+_generation = 0
+_lock = threading.Lock()
+
+
+def invalidate_buildable_quantities() -> None:
+    """Drop the cached vector; call after committing a non-ORM stock or BOM write."""
+    global _rows, _generation
+    with _lock:
+        _rows = None
+        _generation += 1
+
+
+def mark_stock_changed(db: Session) -> None:
+    """Drop the cached vector once `db`'s current transaction commits."""
+    db.info["buildable_dirty"] = True
+
+
+def get_buildable_rows(db: Session, compute: Callable[[Session], BuildableRows]) -> BuildableRows:
+    """Return the cached vector, running `compute(db)` when it is missing."""
+    global _rows
+    rows = _rows
+    if rows is not None:
+        return rows
+    with _lock:
+        if _rows is not None:
+            return _rows
+        generation = _generation
+    rows = compute(db)
+    with _lock:
+        # don't publish what a write committed meanwhile (or still pending in
+        # this session's own transaction) would make stale
+        if _generation == generation and not db.info.get("buildable_dirty"):
+            _rows = rows
+    return rows
+
+
+# Any committed ORM write to items (stock) or components (BOM) drops the vector.
+@event.listens_for(Session, "after_flush")
+def _track_buildable_writes(session: Session, flush_context: Any) -> None:
+    if session.info.get("buildable_dirty"):
+        return
+    if any(isinstance(obj, (Item, ItemComponent)) for obj in (*session.new, *session.dirty, *session.deleted)):
+        session.info["buildable_dirty"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session) -> None:
+    if session.info.pop("buildable_dirty", False):
+        invalidate_buildable_quantities()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_buildable_writes(session: Session) -> None:
+    session.info.pop("buildable_dirty", None)
@@ -1,24 +1,60 @@
 from sqlalchemy.orm import Session
 from sqlalchemy.dialects.postgresql import insert
-from typing import List, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 
 from database.models.cart import CartItem
 from database.models.item import Item
 from database.models.item_component import ItemComponent # Assuming you have this model
 from database.schemas.cart import CartItemRead, CartItemCreate
+from database.services.bom_cache import get_bom_graph
+from config import settings
 
-def _upsert_cart_item(db: Session, user_id: int, item_id: int, quantity: int):
+def _expand_cart_lines(db: Session, items: Iterable[Tuple[int, int]]) -> Dict[int, int]:
     """
-    Inserts a cart item or updates its quantity if it already exists for the user.
-    Uses a PostgreSQL-specific ON CONFLICT clause.
+    Aggregates `(item_id, quantity)` pairs into `{item_id: quantity}`, replacing
+    every item that has a Bill of Materials (BoM) by its direct components.
     """
-    insert_stmt = insert(CartItem).values(
-        user_id=user_id, item_id=item_id, quantity=quantity
-    )
+    requested: Dict[int, int] = {}
+    for item_id, quantity in items:
+        requested[item_id] = requested.get(item_id, 0) + quantity
+
+    # Components of every requested item (from the cached BOM graph, or one query)
+    if settings.BOM_CACHE_ENABLED:
+        graph = get_bom_graph(db)
+        components = {item_id: graph.children(item_id) for item_id in requested if graph.is_parent(item_id)}
+    else:
+        components = {}
+        rows = (
+            db.query(ItemComponent.parent_id, ItemComponent.child_id, ItemComponent.qty_required)
+            .filter(ItemComponent.parent_id.in_(requested))
+            .all()
+        )
+        for parent_id, child_id, qty_required in rows:
+            components.setdefault(parent_id, []).append((child_id, qty_required))
+
+    lines: Dict[int, int] = {}
+    for item_id, quantity in requested.items():
+        for child_id, qty_required in components.get(item_id) or [(item_id, 1)]:
+            lines[child_id] = lines.get(child_id, 0) + quantity * qty_required
+    return lines
+
+
+def _upsert_cart_items(db: Session, user_id: int, lines: Dict[int, int]):
+    """
+    Inserts the cart items or adds to their quantity if they already exist for
+    the user, in one multi-row PostgreSQL ON CONFLICT statement (rows in item_id
+    order, so concurrent adds lock them in the same order).
+    """
+    if not lines:
+        return
+    insert_stmt = insert(CartItem).values([
+        {"user_id": user_id, "item_id": item_id, "quantity": quantity}
+        for item_id, quantity in sorted(lines.items())
+    ])
 
     update_stmt = insert_stmt.on_conflict_do_update(
         index_elements=['user_id', 'item_id'],
-        set_={'quantity': CartItem.quantity + quantity}
+        set_={'quantity': CartItem.quantity + insert_stmt.excluded.quantity}
     )
     db.execute(update_stmt)
 
@@ -28,32 +64,20 @@ def add_item_to_cart(db: Session, user_id: int, item_id: int, quantity: int):
     Adds an item to the user's cart. If the item has a Bill of Materials (BoM),
     it adds the individual components instead.
     """
-    # Check if the item is a parent with components
-    components = db.query(ItemComponent).filter(ItemComponent.parent_id == item_id).all()
-
-    if components:
-        # It's a parent item, add its components
-        for component in components:
-            total_quantity = quantity * component.qty_required
-            _upsert_cart_item(db, user_id, component.child_id, total_quantity)
-    else:
-        # It's a simple item, add it directly
-        _upsert_cart_item(db, user_id, item_id, quantity)
-
+    _upsert_cart_items(db, user_id, _expand_cart_lines(db, [(item_id, quantity)]))
     db.commit()
     
 def add_multiple_items_to_cart(db: Session, user_id: int, items: List[CartItemCreate]):
     """
     Adds a list of items to the user's cart in a single database transaction.
-    It efficiently upserts each item.
+    Duplicates are merged and BoM items expanded to their components, then the
+    whole batch is upserted with one statement.
     """
     if not items:
         return # Do nothing if the list is empty
 
-    for item in items:
-        # Reuse the existing upsert logic for each item
-        # This function does not commit, allowing us to commit only once at the end
-        _upsert_cart_item(db, user_id=user_id, item_id=item.item_id, quantity=item.quantity)
+    lines = _expand_cart_lines(db, [(item.item_id, item.quantity) for item in items])
+    _upsert_cart_items(db, user_id, lines)
 
     # Commit the transaction once after all items have been processed
     db.commit()
@@ -0,0 +1,165 @@
+from __future__ import annotations
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+from datetime import datetime, date, time
+from decimal import Decimal
+import csv
+import io
+import json
+
+from fastapi import HTTPException, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+"""Streaming exports shared across list resources.
+
+Export queries select plain columns (no ORM entities) and are read with
+`yield_per`, which runs them on a server-side cursor: rows arrive from
+Postgres in fixed-size batches and are encoded and flushed to the client as
+they come, so memory stays flat regardless of table size.
+"""
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+# rows fetched per server-side cursor round trip / encoded per chunk
+EXPORT_BATCH_SIZE = 1000
+
+
+def iter_query_rows(query: Any, *, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[Dict[str, Any]]:
+    """Stream a column query as dicts using a server-side cursor."""
+    for row in query.yield_per(batch_size):
+        yield row._asdict()
+
+
+def nest_lines(
+    rows: Iterable[Dict[str, Any]],
+    *,
+    key: str,
+    line_fields: Sequence[str],
+) -> Iterator[Dict[str, Any]]:
+    """Fold consecutive flat header+line rows (sorted by `key`) into one dict
+    per header with its lines under `"lines"`.
+
+    Rows from an outer join whose line fields are all None (a header without
+    lines) contribute no line.
+    """
+    current: Optional[Dict[str, Any]] = None
+    for row in rows:
+        if current is None or current[key] != row[key]:
+            if current is not None:
+                yield current
+            current = {k: v for k, v in row.items() if k not in line_fields}
+            current["lines"] = []
+        line = {f: row[f] for f in line_fields}
+        if any(v is not None for v in line.values()):
+            current["lines"].append(line)
+    if current is not None:
+        yield current
+
+
+def _json_default(val: Any) -> Any:
+    if isinstance(val, (datetime, date, time)):
+        return val.isoformat()
+    if isinstance(val, Decimal):
+        return str(val)  # exact, as Pydantic serializes Decimal
+    raise TypeError(f"Object of type {type(val).__name__} is not JSON serializable")
+
+
+def _csv_value(val: Any) -> Any:
+    if val is None:
+        return ""
+    if isinstance(val, (datetime, date, time)):
+        return val.isoformat()
+    if isinstance(val, (list, tuple)):
+        return ";".join(str(v) for v in val)
+    return val
+
+
+def encode_ndjson(rows: Iterable[Dict[str, Any]], *, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[str]:
+    """Encode rows as newline-delimited JSON, one chunk per `batch_size` rows."""
+    buf: List[str] = []
+    for row in rows:
+        buf.append(json.dumps(row, default=_json_default, separators=(",", ":")))
+        if len(buf) >= batch_size:
+            yield "\n".join(buf) + "\n"
+            buf.clear()
+    if buf:
+        yield "\n".join(buf) + "\n"
+
+
+def encode_csv(
+    rows: Iterable[Dict[str, Any]],
+    columns: Sequence[str],
+    *,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> Iterator[str]:
+    """Encode rows as CSV (header first), one chunk per `batch_size` rows."""
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(columns)
+    pending = 1
+    for row in rows:
+        writer.writerow([_csv_value(row.get(c)) for c in columns])
+        pending += 1
+        if pending >= batch_size:
+            yield out.getvalue()
+            out.seek(0)
+            out.truncate(0)
+            pending = 0
+    if pending:
+        yield out.getvalue()
+
+
+def check_export_format(fmt: str) -> str:
+    """Validate the requested export format.
+
+    Raises:
+      HTTPException(400) for anything but `ndjson` or `csv`.
+    """
+    fmt = (fmt or "").strip().lower()
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"format must be one of: {', '.join(EXPORT_FORMATS)}",
+        )
+    return fmt
+
+
+def stream_export(
+    db: Session,
+    rows: Iterable[Dict[str, Any]],
+    *,
+    fmt: str,
+    columns: Sequence[str],
+    filename: str,
+) -> StreamingResponse:
+    """Wrap a lazy row iterator into a `StreamingResponse`.
+
+    The request-scoped session is closed by `get_db` as soon as the route
+    returns, before the body is streamed; the iterator then runs on the same
+    (re-opened) session, which is closed again once streaming finishes or the
+    client disconnects.
+
+    Args:
+      db: Session the `rows` iterator reads from.
+      rows: Lazy iterator of dicts (not yet started).
+      fmt: `ndjson` or `csv` (see `check_export_format`).
+      columns: CSV column order (ignored for NDJSON).
+      filename: Download name without extension.
+    """
+    def body() -> Iterator[str]:
+        try:
+            if fmt == "csv":
+                yield from encode_csv(rows, columns)
+            else:
+                yield from encode_ndjson(rows)
+        finally:
+            db.close()
+
+    return StreamingResponse(
+        body(),
+        media_type=EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'},
+    )
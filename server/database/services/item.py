@@ -1,4 +1,4 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, raiseload, selectinload
 
 from database.models.item import Item
 from database.models.item_component import ItemComponent
@@ -7,33 +7,49 @@ from database.schemas.item import ItemCreate, ItemUpdate, ItemComponentRead, Ite
 
 from collections import defaultdict
 
-from typing import Any, Dict, List, Optional, Iterable
-from sqlalchemy import or_, func, String, Integer
-from datetime import datetime, timezone, timedelta
+from typing import Any, Dict, List, Optional, Iterable, Tuple, Union
+from sqlalchemy import func, text, column, literal, Integer, BigInteger
+from sqlalchemy.dialects.postgresql import ARRAY
+import numpy as np
+from fastapi import HTTPException, status
 import logging
 from config import settings
 
-# Singapore timezone (UTC+8)
-SGT = timezone(timedelta(hours=8))
-
 from database.services.pagination import (
     clamp_page_size,
-    parse_sort,
+    parse_sort_keys,
+    sort_tokens_of,
+    fetch_page,
+    parse_total_mode,
+    count_total,
     build_meta,
 )
+from database.services.search import build_search
+from database.services.bom_cache import BomCycleError, get_bom_graph
+from database.services.buildable_cache import get_buildable_rows
+from database.services.export import iter_query_rows
+from database.services.sheets_outbox import enqueue_sheets_sync
+from app.utils.etag import bump_version
 
-# Import Google Sheets client
-try:
-    from app.utils.google_sheets import get_google_sheets_client
-    GOOGLE_SHEETS_AVAILABLE = True
-except ImportError:
-    GOOGLE_SHEETS_AVAILABLE = False
-    logging.warning("Google Sheets integration not available")
 
 logger = logging.getLogger(__name__)
 
-def get_item(db: Session, item_id: int):
-    return db.query(Item).filter(Item.id == item_id).first()
+# Loading profiles for Item reads. Catalog payloads are flat, so by default no
+# relationship is loaded and touching one raises instead of issuing a hidden
+# query; callers that need a relationship opt in by name through `eager`.
+ITEM_EAGER_LOADS = {
+    "order_items": lambda: selectinload(Item.order_items).raiseload("*"),
+}
+
+def item_load_options(eager: Iterable[str] = ()) -> List[Any]:
+    """Loader options for an Item query: opted-in relationships, raiseload for the rest."""
+    unknown = set(eager) - ITEM_EAGER_LOADS.keys()
+    if unknown:
+        raise ValueError(f"Unknown Item eager load(s): {', '.join(sorted(unknown))}")
+    return [ITEM_EAGER_LOADS[name]() for name in eager] + [raiseload("*")]
+
+def get_item(db: Session, item_id: int, *, eager: Iterable[str] = ()):
+    return db.query(Item).options(*item_load_options(eager)).filter(Item.id == item_id).first()
 
 def get_item_by_order_id(db: Session, order_id: int):
     # Step 1: Get all item_ids for the given order_id
@@ -44,11 +60,11 @@ def get_item_by_order_id(db: Session, order_id: int):
         return []
 
     # Step 2: Get all items with those item_ids
-    items = db.query(Item).filter(Item.id.in_(item_ids)).all()
+    items = db.query(Item).options(*item_load_options()).filter(Item.id.in_(item_ids)).all()
     return items
 
-def get_all_items(db: Session):
-    return db.query(Item).all()
+def get_all_items(db: Session, *, eager: Iterable[str] = ()):
+    return db.query(Item).options(*item_load_options(eager)).all()
 
 def get_all_items_pagniated(
     db: Session,
@@ -58,36 +74,24 @@ def get_all_items_pagniated(
     q: Optional[str] = None,
     search_columns: Optional[List[str]] = None,
     sort: Optional[Iterable[str]] = None,  # e.g. ["item_name:asc","id:desc"]
-    include_total: bool = False,
+    cursor: Optional[str] = None,          # keyset mode; takes precedence over page
+    include_total: Union[bool, str, None] = False,
     max_page_size: int = 200,
 ) -> Dict[str, Any]:
     """
     Paginated list of Items with free-text search + whitelisted sort.
+    Pass `cursor` (from a previous meta.next_cursor) for keyset pagination.
     Returns {"meta": {...}, "data": [ {item fields...} ]}.
     """
     page, size = clamp_page_size(page, size, max_page_size=max_page_size)
 
-    base = db.query(Item)
+    base = db.query(Item).options(*item_load_options())
 
-    # Free-text search across chosen columns (OR semantics)
+    # Free-text search across chosen columns (OR semantics, trigram-indexed)
     SEARCHABLE_COLUMNS = {"id", "sku", "type", "item_name", "variant"}
-    if q and search_columns:
-        like = f"%{q.strip()}%"
-        filters = []
-        # accept comma-separated or repeated params
-        if isinstance(search_columns, str):
-            search_columns = [c.strip() for c in search_columns.split(",") if c.strip()]
-        for col in search_columns:
-            if col in SEARCHABLE_COLUMNS and hasattr(Item, col):
-                column = getattr(Item, col)
-                # string vs integer handling
-                if hasattr(column, "type"):
-                    if isinstance(column.type, String):
-                        filters.append(column.ilike(like))
-                    elif isinstance(column.type, Integer) and q.isdigit():
-                        filters.append(column == int(q))
-        if filters:
-            base = base.filter(or_(*filters))
+    search, relevance = build_search(Item, q, search_columns, SEARCHABLE_COLUMNS)
+    if search is not None:
+        base = base.filter(search)
 
     # Sort (whitelisted only)
     allowed = {
@@ -99,23 +103,23 @@ def get_all_items_pagniated(
         "qty":           Item.qty,
         "threshold_qty": Item.threshold_qty,
     }
-    order_by = parse_sort(sort, allowed, [Item.item_name.asc(), Item.id.asc()])
-
-    # Optional exact totals
-    total = pages = None
-    if include_total:
-        total = db.query(func.count()).select_from(base.subquery()).scalar() or 0
-        pages = max(1, (total + size - 1) // size)
-
-    # Fetch page (size+1 → has_next)
-    rows: List[Item] = (
-        base.order_by(*order_by)
-            .limit(size + 1)
-            .offset((page - 1) * size)
-            .all()
+    default_sort = ("item_name:asc", "id:asc")
+    if relevance is not None:
+        # best matches first unless the client sorts explicitly
+        allowed["relevance"] = relevance
+        default_sort = ("relevance:desc",) + default_sort
+    sort_keys = parse_sort_keys(sort, allowed, default_sort, tiebreaker="id")
+
+    filters = {"q": q, "search_columns": search_columns}
+
+    # Optional totals (exact | estimate | cached)
+    total, pages, total_kind = count_total(
+        db, base, mode=parse_total_mode(include_total), table=Item.__tablename__,
+        filters=filters, size=size,
     )
-    has_next = len(rows) > size
-    items = rows[:size]
+
+    # Fetch page (size+1 → has_next; offset or keyset)
+    items, has_next, next_cursor = fetch_page(base, sort_keys, page=page, size=size, cursor=cursor)
 
     # Shape payload (flat—no relationships here)
     data: List[Dict[str, Any]] = []
@@ -133,58 +137,46 @@ def get_all_items_pagniated(
     meta = build_meta(
         page=page,
         size=size,
-        has_prev=page > 1,
+        has_prev=page > 1 or bool(cursor),
         has_next=has_next,
         sort_tokens=sort,
-        filters={"q": q, "search_columns": search_columns},
+        filters=filters,
         total=total,
         pages=pages,
+        default_sort=sort_tokens_of(sort_keys),
+        cursor=cursor,
+        next_cursor=next_cursor,
+        total_kind=total_kind,
     )
     return {"meta": meta, "data": data}
 
+ITEM_EXPORT_COLUMNS = ("id", "sku", "type", "item_name", "variant", "qty", "threshold_qty")
+
+def iter_items_for_export(
+    db: Session,
+    *,
+    q: Optional[str] = None,
+    search_columns: Optional[List[str]] = None,
+) -> Iterable[Dict[str, Any]]:
+    """
+    Lazily yield every Item (flat columns, id order) for streaming export.
+    Same search semantics as get_all_items_pagniated.
+    """
+    query = db.query(*(getattr(Item, c) for c in ITEM_EXPORT_COLUMNS))
+    search, _ = build_search(Item, q, search_columns, {"id", "sku", "type", "item_name", "variant"})
+    if search is not None:
+        query = query.filter(search)
+    return iter_query_rows(query.order_by(Item.id))
+
 def create_item(db: Session, item: ItemCreate):
     db_item = Item(**item.model_dump())
     db.add(db_item)
+    db.flush()
+    # Google Sheets sync is queued in this transaction, drained in the background
+    enqueue_sheets_sync(db, "item", db_item.id, "create")
     db.commit()
     db.refresh(db_item)
-    
-    # Sync to Google Sheets if enabled
-    print(f"[GOOGLE SHEETS] Checking sync settings for item creation...")
-    print(f"[GOOGLE SHEETS] Available: {GOOGLE_SHEETS_AVAILABLE}")
-    print(f"[GOOGLE SHEETS] Enabled: {settings.GOOGLE_SHEETS_ENABLED if hasattr(settings, 'GOOGLE_SHEETS_ENABLED') else 'NOT SET'}")
-    
-    if GOOGLE_SHEETS_AVAILABLE and settings.GOOGLE_SHEETS_ENABLED:
-        try:
-            print(f"[GOOGLE SHEETS] Attempting to sync new item: {db_item.item_name}")
-            sheets_client = get_google_sheets_client(
-                settings.GOOGLE_SHEETS_CREDENTIALS_PATH,
-                settings.GOOGLE_SHEETS_SPREADSHEET_ID
-            )
-            item_data = {
-                'id': db_item.id,
-                'sku': db_item.sku,
-                'type': db_item.type,
-                'item_name': db_item.item_name,
-                'variant': db_item.variant or '',
-                'qty': db_item.qty,
-                'threshold_qty': db_item.threshold_qty,
-                'created_at': getattr(db_item, 'created_at', datetime.now(SGT)),
-                'updated_at': getattr(db_item, 'updated_at', datetime.now(SGT))
-            }
-            success = sheets_client.sync_item_create(item_data)
-            if success:
-                print(f"[GOOGLE SHEETS] ✓ Successfully synced item '{db_item.item_name}' to Google Sheets")
-            else:
-                print(f"[GOOGLE SHEETS] ✗ Failed to sync item '{db_item.item_name}' to Google Sheets")
-        except Exception as e:
-            print(f"[GOOGLE SHEETS] ✗ ERROR syncing item create: {str(e)}")
-            logger.error(f"Failed to sync item create to Google Sheets: {e}", exc_info=True)
-    else:
-        if not GOOGLE_SHEETS_AVAILABLE:
-            print(f"[GOOGLE SHEETS] Skipping sync - Google Sheets integration not available")
-        elif not settings.GOOGLE_SHEETS_ENABLED:
-            print(f"[GOOGLE SHEETS] Skipping sync - Google Sheets integration disabled in settings")
-    
+    bump_version("item")
     return db_item
 
 def update_item(db: Session, item_id: int, item: ItemUpdate):
@@ -192,84 +184,19 @@ def update_item(db: Session, item_id: int, item: ItemUpdate):
     if db_item:
         for key, value in item.model_dump().items():
             setattr(db_item, key, value)
+        enqueue_sheets_sync(db, "item", db_item.id, "update")
         db.commit()
         db.refresh(db_item)
-        
-        # Sync to Google Sheets if enabled
-        print(f"[GOOGLE SHEETS] Checking sync settings for item update...")
-        print(f"[GOOGLE SHEETS] Available: {GOOGLE_SHEETS_AVAILABLE}")
-        print(f"[GOOGLE SHEETS] Enabled: {settings.GOOGLE_SHEETS_ENABLED if hasattr(settings, 'GOOGLE_SHEETS_ENABLED') else 'NOT SET'}")
-        
-        if GOOGLE_SHEETS_AVAILABLE and settings.GOOGLE_SHEETS_ENABLED:
-            try:
-                print(f"[GOOGLE SHEETS] Attempting to sync updated item: {db_item.item_name}")
-                sheets_client = get_google_sheets_client(
-                    settings.GOOGLE_SHEETS_CREDENTIALS_PATH,
-                    settings.GOOGLE_SHEETS_SPREADSHEET_ID
-                )
-                item_data = {
-                    'id': db_item.id,
-                    'sku': db_item.sku,
-                    'type': db_item.type,
-                    'item_name': db_item.item_name,
-                    'variant': db_item.variant or '',
-                    'qty': db_item.qty,
-                    'threshold_qty': db_item.threshold_qty,
-                    'created_at': getattr(db_item, 'created_at', datetime.now(SGT)),
-                    'updated_at': getattr(db_item, 'updated_at', datetime.now(SGT))
-                }
-                success = sheets_client.sync_item_update(item_data)
-                if success:
-                    print(f"[GOOGLE SHEETS] ✓ Successfully synced item update for '{db_item.item_name}' to Google Sheets")
-                else:
-                    print(f"[GOOGLE SHEETS] ✗ Failed to sync item update for '{db_item.item_name}' to Google Sheets")
-            except Exception as e:
-                print(f"[GOOGLE SHEETS] ✗ ERROR syncing item update: {str(e)}")
-                logger.error(f"Failed to sync item update to Google Sheets: {e}", exc_info=True)
-        else:
-            if not GOOGLE_SHEETS_AVAILABLE:
-                print(f"[GOOGLE SHEETS] Skipping sync - Google Sheets integration not available")
-            elif not settings.GOOGLE_SHEETS_ENABLED:
-                print(f"[GOOGLE SHEETS] Skipping sync - Google Sheets integration disabled in settings")
-    
+        bump_version("item")
     return db_item
 
 def delete_item(db: Session, item_id: int):
     db_item = db.query(Item).filter(Item.id == item_id).first()
     if db_item:
-        # Store item data before deletion for Google Sheets sync
-        item_id_to_delete = db_item.id
-        item_name_to_delete = db_item.item_name
-        
+        enqueue_sheets_sync(db, "item", db_item.id, "delete")
         db.delete(db_item)
         db.commit()
-        
-        # Sync to Google Sheets if enabled
-        print(f"[GOOGLE SHEETS] Checking sync settings for item deletion...")
-        print(f"[GOOGLE SHEETS] Available: {GOOGLE_SHEETS_AVAILABLE}")
-        print(f"[GOOGLE SHEETS] Enabled: {settings.GOOGLE_SHEETS_ENABLED if hasattr(settings, 'GOOGLE_SHEETS_ENABLED') else 'NOT SET'}")
-        
-        if GOOGLE_SHEETS_AVAILABLE and settings.GOOGLE_SHEETS_ENABLED:
-            try:
-                print(f"[GOOGLE SHEETS] Attempting to sync deleted item: {item_name_to_delete}")
-                sheets_client = get_google_sheets_client(
-                    settings.GOOGLE_SHEETS_CREDENTIALS_PATH,
-                    settings.GOOGLE_SHEETS_SPREADSHEET_ID
-                )
-                success = sheets_client.sync_item_delete(item_id_to_delete)
-                if success:
-                    print(f"[GOOGLE SHEETS] ✓ Successfully synced item deletion for '{item_name_to_delete}' to Google Sheets")
-                else:
-                    print(f"[GOOGLE SHEETS] ✗ Failed to sync item deletion for '{item_name_to_delete}' to Google Sheets")
-            except Exception as e:
-                print(f"[GOOGLE SHEETS] ✗ ERROR syncing item delete: {str(e)}")
-                logger.error(f"Failed to sync item delete to Google Sheets: {e}", exc_info=True)
-        else:
-            if not GOOGLE_SHEETS_AVAILABLE:
-                print(f"[GOOGLE SHEETS] Skipping sync - Google Sheets integration not available")
-            elif not settings.GOOGLE_SHEETS_ENABLED:
-                print(f"[GOOGLE SHEETS] Skipping sync - Google Sheets integration disabled in settings")
-    
+        bump_version("item")
     return db_item
 
 # item detail APIs
@@ -279,9 +206,35 @@ def get_all_item_components(db: Session, item_id: int):
 
 def get_item_with_components(db: Session, item_id: int):
     """
-    Retrieves an item and attaches the full details of each of its components
-    using an efficient JOIN query.
+    Retrieves an item and attaches the full details of each of its components.
+    Component links come from the cached BOM graph, so the item and its
+    components are fetched together in a single query.
     """
+    if not settings.BOM_CACHE_ENABLED:
+        return _get_item_with_components_sql(db, item_id)
+
+    components = get_bom_graph(db).children(item_id)
+    ids = [item_id] + [child_id for child_id, _ in components]
+    items_by_id = {
+        it.id: it
+        for it in db.query(Item).options(*item_load_options()).filter(Item.id.in_(ids)).all()
+    }
+    item = items_by_id.get(item_id)
+    if not item:
+        return None
+
+    detailed_components = []
+    for child_id, qty in components:
+        component_item = items_by_id.get(child_id)
+        if component_item:
+            component_item.qty_required = qty
+            detailed_components.append(component_item)
+
+    item.components = detailed_components
+    return item
+
+def _get_item_with_components_sql(db: Session, item_id: int):
+    """get_item_with_components without the BOM cache (BOM_CACHE_ENABLED=false)."""
     # 1. Retrieve the parent item, same as before.
     item = get_item(db, item_id)
     if not item:
@@ -290,6 +243,7 @@ def get_item_with_components(db: Session, item_id: int):
     # 2. Perform a single JOIN query to get all child items and their quantities.
     component_results = (
         db.query(Item, ItemComponent.qty_required)
+        .options(*item_load_options())
         .join(ItemComponent, Item.id == ItemComponent.child_id)
         .filter(ItemComponent.parent_id == item_id)
         .all()
@@ -305,60 +259,386 @@ def get_item_with_components(db: Session, item_id: int):
     item.components = detailed_components
     return item
 
+# Multi-level BOM explosion in one statement. Quantities multiply along each
+# path from a root down to its leaves (items with no components); leaves
+# reached through several paths are summed. CYCLE marks a path that revisits
+# an item instead of recursing forever, and that row is reported back.
+_BOM_LEAVES_SQL = text("""
+    WITH RECURSIVE bom(root_id, item_id, qty) AS (
+        SELECT i.id, i.id, 1::bigint
+        FROM item i
+        WHERE i.id = ANY(:root_ids)
+      UNION ALL
+        SELECT bom.root_id, ic.child_id, bom.qty * ic.qty_required
+        FROM bom
+        JOIN item_component ic ON ic.parent_id = bom.item_id
+    ) CYCLE item_id SET is_cycle USING path
+    SELECT b.root_id, i.id, i.sku, i.item_name, i.qty,
+           SUM(b.qty) AS total_qty_required,
+           bool_or(b.is_cycle) AS is_cycle
+    FROM bom b
+    JOIN item i ON i.id = b.item_id
+    WHERE b.is_cycle
+       OR NOT EXISTS (SELECT 1 FROM item_component c WHERE c.parent_id = b.item_id)
+    GROUP BY b.root_id, i.id, i.sku, i.item_name, i.qty
+    ORDER BY b.root_id, i.id
+""")
+
+# Where-used: the same walk upward, from a component to every assembly that
+# contains it, multiplying quantities along each path.
+_WHERE_USED_SQL = text("""
+    WITH RECURSIVE used(item_id, qty, depth) AS (
+        SELECT ic.parent_id, ic.qty_required::bigint, 1
+        FROM item_component ic
+        WHERE ic.child_id = :item_id
+      UNION ALL
+        SELECT ic.parent_id, used.qty * ic.qty_required, used.depth + 1
+        FROM used
+        JOIN item_component ic ON ic.child_id = used.item_id
+    ) CYCLE item_id SET is_cycle USING path
+    SELECT i.id, i.sku, i.item_name,
+           SUM(u.qty) FILTER (WHERE NOT u.is_cycle) AS qty_per_unit,
+           MIN(u.depth) AS level,
+           bool_or(u.is_cycle OR u.item_id = :item_id) AS is_cycle
+    FROM used u
+    JOIN item i ON i.id = u.item_id
+    GROUP BY i.id, i.sku, i.item_name
+    ORDER BY i.id
+""")
+
+def explode_bom(db: Session, root_ids: Iterable[int]) -> Dict[int, List[Dict[str, Any]]]:
+    """
+    Explode the BOMs of `root_ids` down to their lowest-level children.
+    Returns {root_id: [{id, sku, item_name, qty, total_qty_required}, ...]} per
+    unit of the root (`qty` is the leaf's stock on hand); a root without
+    components maps to itself with quantity 1 and unknown ids are absent.
+    Raises 409 if a BOM contains a cycle.
+
+    Explosions come precomputed from the BOM graph cache; only the item details
+    are read (one query). With BOM_CACHE_ENABLED=false the recursive query runs.
+    """
+    root_ids = list(root_ids)
+    if not settings.BOM_CACHE_ENABLED:
+        return _explode_bom_sql(db, root_ids)
+
+    graph = get_bom_graph(db)
+    try:
+        leaves = {root_id: graph.leaves(root_id) for root_id in root_ids}
+    except BomCycleError as exc:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc))
+
+    ids = set(root_ids)
+    for root_leaves in leaves.values():
+        ids.update(leaf_id for leaf_id, _ in root_leaves)
+    details = {
+        row.id: row
+        for row in db.query(Item.id, Item.sku, Item.item_name, Item.qty).filter(Item.id.in_(ids)).all()
+    }
+
+    exploded: Dict[int, List[Dict[str, Any]]] = {}
+    for root_id, root_leaves in leaves.items():
+        if root_id not in details:
+            continue
+        exploded[root_id] = [
+            {
+                "id": leaf_id,
+                "sku": details[leaf_id].sku,
+                "item_name": details[leaf_id].item_name,
+                "qty": details[leaf_id].qty,
+                "total_qty_required": qty,
+            }
+            for leaf_id, qty in root_leaves
+            if leaf_id in details
+        ]
+    return exploded
+
+def _explode_bom_sql(db: Session, root_ids: List[int]) -> Dict[int, List[Dict[str, Any]]]:
+    """explode_bom in one recursive query (used when the BOM cache is disabled)."""
+    rows = db.execute(_BOM_LEAVES_SQL, {"root_ids": root_ids}).mappings().all()
+
+    cycle_ids = sorted({row["id"] for row in rows if row["is_cycle"]})
+    if cycle_ids:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"BOM cycle detected at item(s): {', '.join(map(str, cycle_ids))}",
+        )
+
+    exploded: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+    for row in rows:
+        exploded[row["root_id"]].append({
+            "id": row["id"],
+            "sku": row["sku"],
+            "item_name": row["item_name"],
+            "qty": row["qty"],
+            "total_qty_required": int(row["total_qty_required"]),
+        })
+    return dict(exploded)
+
 def get_lowest_children(db: Session, item_id: int):
     """
-    Recursively finds all lowest-level components for a given parent item
-    and calculates the total quantity required for each.
+    Finds all lowest-level components for a given parent item and the total
+    quantity required for each, in a single recursive query.
+    If the item has no children, it is returned itself with a quantity of 1.
+    """
+    return explode_bom(db, [item_id]).get(item_id)
+
+def get_material_requirements(db: Session, lines: Iterable[Tuple[int, int]]) -> List[Dict[str, Any]]:
+    """
+    Batch MRP: explode every (item_id, qty) line in one pass and aggregate the
+    lowest-level requirements across all of them, next to current stock.
+    Repeated item_ids are summed. Costs one item-details query (plus the BOM
+    graph load when cold), however many lines are given.
+    Raises 404 listing unknown item ids, 409 on a BOM cycle.
     """
-    parent_item = get_item(db, item_id)
-    if not parent_item:
-        return None  # Indicates the parent item was not found
-
-    # This dictionary will aggregate quantities for each unique lowest-level child
-    lowest_children_map = defaultdict(int)
-
-    def find_leaves(current_item_id: int, cumulative_qty: int):
-        # Query for direct children of the current item
-        components = db.query(ItemComponent).filter(ItemComponent.parent_id == current_item_id).all()
-
-        # Base Case: If there are no children, this is a leaf node.
-        if not components:
-            lowest_children_map[current_item_id] += cumulative_qty
-            return
-
-        # Recursive Step: If there are children, traverse deeper.
-        for component in components:
-            find_leaves(component.child_id, cumulative_qty * component.qty_required)
-
-    # Start the recursion
-    find_leaves(item_id, 1)
-
-    # If the map is empty, the initial item itself is the lowest level
-    if not lowest_children_map:
-        return [{
-            "id" : parent_item.id,
-            "sku": parent_item.sku,
-            "item_name": parent_item.item_name,
-            "total_qty_required": 1
-        }]
-
-    # Fetch details for all unique lowest-level items in a single query
-    child_ids = lowest_children_map.keys()
-    child_items = db.query(Item).filter(Item.id.in_(child_ids)).all()
-
-    # Map item IDs to their details for easy lookup
-    child_details_map = {item.id: item for item in child_items}
-
-    # Format the final result
-    result = []
-    for child_id, total_qty in lowest_children_map.items():
-        item_details = child_details_map.get(child_id)
-        if item_details:
-            result.append({
-                "id" : item_details.id,
-                "sku": item_details.sku,
-                "item_name": item_details.item_name,
-                "total_qty_required": total_qty
+    qty_by_root: Dict[int, int] = defaultdict(int)
+    for item_id, qty in lines:
+        qty_by_root[item_id] += qty
+
+    exploded = explode_bom(db, qty_by_root.keys())
+    missing = sorted(set(qty_by_root) - exploded.keys())
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Item(s) not found: {', '.join(map(str, missing))}",
+        )
+
+    requirements: Dict[int, Dict[str, Any]] = {}
+    for root_id, leaves in exploded.items():
+        for leaf in leaves:
+            req = requirements.setdefault(leaf["id"], {
+                "id": leaf["id"],
+                "sku": leaf["sku"],
+                "item_name": leaf["item_name"],
+                "required_qty": 0,
+                "on_hand_qty": leaf["qty"],
             })
+            req["required_qty"] += leaf["total_qty_required"] * qty_by_root[root_id]
 
+    result = sorted(requirements.values(), key=lambda r: r["id"])
+    for req in result:
+        req["shortfall"] = max(0, req["required_qty"] - req["on_hand_qty"])
     return result
+
+def _bom_leaf_matrix(db: Session) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Exploded BOM of every assembled item as COO arrays
+    (parent_ids, leaf_ids, qty_required per unit, leaf stock on hand).
+    Parents whose BOM contains a cycle are left out.
+    """
+    if settings.BOM_CACHE_ENABLED:
+        graph = get_bom_graph(db)
+        parent_ids: List[int] = []
+        leaf_ids: List[int] = []
+        reqs: List[int] = []
+        for parent_id in graph.parents():
+            try:
+                leaves = graph.leaves(parent_id)
+            except BomCycleError:
+                logger.warning("Skipping item %s in buildable quantities: BOM cycle", parent_id)
+                continue
+            for leaf_id, qty in leaves:
+                parent_ids.append(parent_id)
+                leaf_ids.append(leaf_id)
+                reqs.append(qty)
+        stock_by_id = dict(
+            db.query(Item.id, Item.qty).filter(Item.id.in_(set(leaf_ids))).all()
+        ) if leaf_ids else {}
+        stock = [stock_by_id.get(leaf_id, 0) for leaf_id in leaf_ids]
+    else:
+        parent_rows = db.query(ItemComponent.parent_id).distinct().all()
+        rows = db.execute(_BOM_LEAVES_SQL, {"root_ids": [r[0] for r in parent_rows]}).mappings().all()
+        cyclic = {row["root_id"] for row in rows if row["is_cycle"]}
+        rows = [row for row in rows if row["root_id"] not in cyclic]
+        parent_ids = [row["root_id"] for row in rows]
+        leaf_ids = [row["id"] for row in rows]
+        reqs = [row["total_qty_required"] for row in rows]
+        stock = [row["qty"] for row in rows]
+
+    return (
+        np.asarray(parent_ids, dtype=np.int64),
+        np.asarray(leaf_ids, dtype=np.int64),
+        np.asarray(reqs, dtype=np.int64),
+        np.asarray(stock, dtype=np.int64),
+    )
+
+def compute_buildable_quantities(db: Session) -> List[Tuple[int, int, int]]:
+    """
+    Max buildable units of every assembled item from current component stock.
+    buildable(p) = min over p's lowest-level components l of floor(stock_l / req_pl),
+    computed in one vectorized pass over the exploded BOM.
+    Returns [(item_id, buildable, limiting_item_id), ...].
+    """
+    parent_ids, leaf_ids, reqs, stock = _bom_leaf_matrix(db)
+    positive = reqs > 0
+    parent_ids, leaf_ids, reqs, stock = parent_ids[positive], leaf_ids[positive], reqs[positive], stock[positive]
+    if parent_ids.size == 0:
+        return []
+
+    per_leaf = np.maximum(stock, 0) // reqs
+    # Sort by parent, then by units each leaf allows: the first entry of each
+    # parent group is its bottleneck component.
+    order = np.lexsort((per_leaf, parent_ids))
+    sorted_parents = parent_ids[order]
+    _, first = np.unique(sorted_parents, return_index=True)
+    picks = order[first]
+    return list(zip(parent_ids[picks].tolist(), per_leaf[picks].tolist(), leaf_ids[picks].tolist()))
+
+def get_buildable_items_paginated(
+    db: Session,
+    page: int = 1,
+    size: int = 50,
+    *,
+    q: Optional[str] = None,
+    search_columns: Optional[List[str]] = None,
+    sort: Optional[Iterable[str]] = None,  # e.g. ["buildable:asc","item_name:asc"]
+    cursor: Optional[str] = None,          # keyset mode; takes precedence over page
+    include_total: Union[bool, str, None] = False,
+    max_page_size: int = 200,
+) -> Dict[str, Any]:
+    """
+    Paginated buildable quantities of assembled items, with the same search,
+    sort, cursor and total options as get_all_items_pagniated.
+    Returns {"meta": {...}, "data": [ {item fields..., buildable, limiting_item_id} ]}.
+    """
+    page, size = clamp_page_size(page, size, max_page_size=max_page_size)
+    total_mode = parse_total_mode(include_total)
+    if total_mode not in (None, "exact"):
+        # the buildable set is not a table: no cached count or planner estimate
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="include_total must be exact for buildable items",
+        )
+
+    if settings.BOM_CACHE_ENABLED:
+        buildable_rows = get_buildable_rows(db, compute_buildable_quantities)
+    else:
+        buildable_rows = compute_buildable_quantities(db)
+    item_ids, units, limiting_ids = (list(col) for col in zip(*buildable_rows)) if buildable_rows else ([], [], [])
+    # the vector travels as three array parameters, not one literal per row
+    buildable = func.unnest(
+        literal(item_ids, ARRAY(Integer)),
+        literal(units, ARRAY(BigInteger)),
+        literal(limiting_ids, ARRAY(Integer)),
+    ).table_valued(
+        column("item_id", Integer),
+        column("buildable", BigInteger),
+        column("limiting_item_id", Integer),
+        name="buildable",
+    ).render_derived()
+    base = (
+        db.query(Item, buildable.c.buildable, buildable.c.limiting_item_id)
+        .options(*item_load_options())
+        .join(buildable, buildable.c.item_id == Item.id)
+    )
+
+    SEARCHABLE_COLUMNS = {"id", "sku", "type", "item_name", "variant"}
+    search, relevance = build_search(Item, q, search_columns, SEARCHABLE_COLUMNS)
+    if search is not None:
+        base = base.filter(search)
+
+    allowed = {
+        "id":               Item.id,
+        "sku":              Item.sku,
+        "type":             Item.type,
+        "item_name":        Item.item_name,
+        "qty":              Item.qty,
+        "buildable":        buildable.c.buildable,
+        "limiting_item_id": buildable.c.limiting_item_id,
+    }
+    default_sort = ("buildable:asc", "item_name:asc", "id:asc")
+    if relevance is not None:
+        allowed["relevance"] = relevance
+        default_sort = ("relevance:desc",) + default_sort
+    sort_keys = parse_sort_keys(sort, allowed, default_sort, tiebreaker="id")
+
+    filters = {"q": q, "search_columns": search_columns}
+
+    # Optional totals (exact only, see above)
+    total, pages, total_kind = count_total(
+        db, base, mode=total_mode, table=Item.__tablename__, filters=filters, size=size,
+    )
+
+    rows, has_next, next_cursor = fetch_page(base, sort_keys, page=page, size=size, cursor=cursor)
+
+    data: List[Dict[str, Any]] = []
+    for it, units, limiting_item_id in (row[:3] for row in rows):
+        data.append({
+            "id": it.id,
+            "sku": it.sku,
+            "type": it.type,
+            "item_name": it.item_name,
+            "variant": it.variant,
+            "qty": it.qty,
+            "threshold_qty": it.threshold_qty,
+            "buildable": units,
+            "limiting_item_id": limiting_item_id,
+        })
+
+    meta = build_meta(
+        page=page,
+        size=size,
+        has_prev=page > 1 or bool(cursor),
+        has_next=has_next,
+        sort_tokens=sort,
+        filters=filters,
+        total=total,
+        pages=pages,
+        default_sort=sort_tokens_of(sort_keys),
+        cursor=cursor,
+        next_cursor=next_cursor,
+        total_kind=total_kind,
+    )
+    return {"meta": meta, "data": data}
+
+def get_where_used(db: Session, item_id: int) -> Optional[List[Dict[str, Any]]]:
+    """
+    Every assembly that uses `item_id`, directly (level 1) or through
+    sub-assemblies, with the quantity of `item_id` needed per unit of it.
+    Walks the cached reverse BOM graph (one item-details query), or runs one
+    recursive query with BOM_CACHE_ENABLED=false.
+    Returns None if the item does not exist; raises 409 on a BOM cycle.
+    """
+    if not settings.BOM_CACHE_ENABLED:
+        if not db.query(Item.id).filter(Item.id == item_id).first():
+            return None
+        rows = db.execute(_WHERE_USED_SQL, {"item_id": item_id}).mappings().all()
+        cycle_ids = sorted(row["id"] for row in rows if row["is_cycle"])
+        if cycle_ids:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"BOM cycle detected at item(s): {', '.join(map(str, cycle_ids))}",
+            )
+        return [
+            {
+                "id": row["id"],
+                "sku": row["sku"],
+                "item_name": row["item_name"],
+                "qty_per_unit": int(row["qty_per_unit"]),
+                "level": row["level"],
+            }
+            for row in rows
+        ]
+
+    try:
+        ancestors = get_bom_graph(db).where_used(item_id)
+    except BomCycleError as exc:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc))
+
+    ids = [item_id] + [ancestor_id for ancestor_id, _, _ in ancestors]
+    details = {
+        row.id: row
+        for row in db.query(Item.id, Item.sku, Item.item_name).filter(Item.id.in_(ids)).all()
+    }
+    if item_id not in details:
+        return None
+    return [
+        {
+            "id": ancestor_id,
+            "sku": details[ancestor_id].sku,
+            "item_name": details[ancestor_id].item_name,
+            "qty_per_unit": qty,
+            "level": level,
+        }
+        for ancestor_id, qty, level in ancestors
+        if ancestor_id in details
+    ]
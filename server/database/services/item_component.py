@@ -1,6 +1,8 @@
 from sqlalchemy.orm import Session
 from database.models.item_component import ItemComponent
 from database.schemas.item_component import ItemComponentCreate, ItemComponentUpdate
+from app.utils.etag import bump_version
+from database.services.bom_cache import invalidate_bom_graph
 
 
 def get_item_component(db: Session, parent_id: int, child_id: int):
@@ -27,6 +29,8 @@ def create_item_component(db: Session, payload: ItemComponentCreate):
     db.add(db_row)
     db.commit()
     db.refresh(db_row)
+    bump_version("item")
+    invalidate_bom_graph()
     return db_row
 
 
@@ -39,6 +43,8 @@ def update_item_component(db: Session, parent_id: int, child_id: int, payload: I
         setattr(db_row, key, value)
     db.commit()
     db.refresh(db_row)
+    bump_version("item")
+    invalidate_bom_graph()
     return db_row
 
 
@@ -48,4 +54,6 @@ def delete_item_component(db: Session, parent_id: int, child_id: int):
         return None
     db.delete(db_row)
     db.commit()
+    bump_version("item")
+    invalidate_bom_graph()
     return db_row 
\ No newline at end of file
@@ -4,18 +4,26 @@ from datetime import date, datetime
 from decimal import Decimal
 
 
-from sqlalchemy import Integer, String, or_, func
+from fastapi import HTTPException, status
+from sqlalchemy import func
 from sqlalchemy.orm import Session, joinedload, selectinload
 
 from database.models.order import Order
 from database.models.order_item import OrderItem
+from database.models.item import Item
 
 from database.services.pagination import (
     clamp_page_size,
     to_datetime,
-    parse_sort,
+    parse_sort_keys,
+    sort_tokens_of,
+    fetch_page,
+    parse_total_mode,
+    count_total,
     build_meta,
 )
+from database.services.search import build_search
+from database.services.export import iter_query_rows, nest_lines
 
 def get_order(db: Session, order_id: int) -> Optional[Order]:
     """Return one Order by id, or None."""
@@ -112,9 +120,20 @@ def get_order_with_items_by_id(db: Session, order_id: int) -> Optional[Dict[str,
         "order_qty": total_qty,
         "status": order.status,
         "total_value": total_value,
+        "line_count": len(sub_rows),
         "subRows": sub_rows,
     }
 
+def _parse_date_filter(name: str, val: Optional[Union[str, date, datetime]]) -> Optional[datetime]:
+    """`to_datetime` for a query filter; 400 instead of silently dropping a bad value."""
+    parsed = to_datetime(val)
+    if val not in (None, "") and parsed is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"{name} must be YYYY-MM-DD or ISO-8601",
+        )
+    return parsed
+
 def list_orders_with_items(
     db: Session,
     page: int = 1,
@@ -122,46 +141,52 @@ def list_orders_with_items(
     *,
     q: Optional[str] = None,
     search_columns: Optional[List[str]] = None,
-    # status: Optional[str] = None,
+    status: Optional[str] = None,
     date_from: Optional[Union[str, date, datetime]] = None,
     date_to: Optional[Union[str, date, datetime]] = None,   # exclusive end
+    delivery_from: Optional[Union[str, date, datetime]] = None,
+    delivery_to: Optional[Union[str, date, datetime]] = None,  # exclusive end
     sort: Optional[Iterable[str]] = None,               # e.g. ["order_date:desc","order_id:desc"]
-    include_total: bool = False,                        # run COUNT(*) if True
+    cursor: Optional[str] = None,                       # keyset mode; takes precedence over page
+    include_total: Union[bool, str, None] = False,      # exact | estimate | cached
+    expand: bool = True,                                # False: per-order totals only, no subRows
     max_page_size: int = 200,
 ) -> Dict[str, Any]:
-    """Return a filtered page of orders with merged Item and OrderItem fields."""
+    """Return a filtered page of orders with merged Item and OrderItem fields.
+
+    Per-order quantity, value and line count are aggregated with a GROUP BY in
+    the page query; line items are fetched (one extra query) only if `expand`.
+    """
     page, size = clamp_page_size(page, size, max_page_size=max_page_size)
 
     base = db.query(Order)
     
-    # Search filter
+    # Search filter (trigram-indexed)
     SEARCHABLE_COLUMNS = {"name", "contact", "status"}
-    
-    if q and search_columns:
-        like = f"%{q.strip()}%"
-        filters = []
-        for col in search_columns:
-            if col in SEARCHABLE_COLUMNS and hasattr(Order, col):
-                column = getattr(Order, col)
-                if hasattr(column, "type"):
-                    if isinstance(column.type, String):
-                        filters.append(column.ilike(like))
-                    elif isinstance(column.type, Integer) and q.isdigit():
-                        filters.append(column == int(q))
-        if filters:
-            base = base.filter(or_(*filters))
-
-    # Status Filters
-    # if status:
-    #     base = base.filter(Order.status == status)
-    # d_from, d_to = to_datetime(date_from), to_datetime(date_to)
-    # if d_from:
-    #     base = base.filter(Order.order_date >= d_from)
-    # if d_to:
-    #     base = base.filter(Order.order_date < d_to)  # exclusive end
-    # if q:
-    #     like = f"%{q.strip()}%"
-    #     base = base.filter(or_(Order.name.ilike(like), Order.contact.ilike(like)))
+    search, relevance = build_search(Order, q, search_columns, SEARCHABLE_COLUMNS)
+    if search is not None:
+        base = base.filter(search)
+
+    # Status / date filters (served by ix_order_status_order_date and
+    # ix_order_order_date_order_id)
+    if status:
+        base = base.filter(Order.status == status)
+    d_from, d_to = _parse_date_filter("date_from", date_from), _parse_date_filter("date_to", date_to)
+    if d_from:
+        base = base.filter(Order.order_date >= d_from)
+    if d_to:
+        base = base.filter(Order.order_date < d_to)  # exclusive end
+
+    # Orders with at least one line delivered in the window (semi-join, no row fan-out)
+    dl_from, dl_to = _parse_date_filter("delivery_from", delivery_from), _parse_date_filter("delivery_to", delivery_to)
+    if dl_from or dl_to:
+        lines = db.query(OrderItem.order_id).filter(OrderItem.order_id == Order.order_id)
+        if dl_from:
+            lines = lines.filter(OrderItem.delivery_date >= dl_from.date())
+        if dl_to:
+            lines = lines.filter(OrderItem.delivery_date < dl_to.date())
+        # correlate on order only: the page query also joins order_item
+        base = base.filter(lines.correlate(Order).exists())
 
     # Sort (whitelisted)
     allowed = {
@@ -169,81 +194,160 @@ def list_orders_with_items(
         "order_id":   Order.order_id,
         "status":     Order.status,
     }
-    order_by = parse_sort(sort, allowed, [Order.order_date.desc(), Order.order_id.desc()])
-
-    # Optional exact totals
-    total = pages = None
-    if include_total:
-        total = db.query(func.count()).select_from(base.subquery()).scalar()
-        pages = (total + size - 1) // size if total else 0
-
-    # Fetch page (size+1 → has_next) with eager loading (no row explosion)
-    rows: List[Order] = (
-        base.options(selectinload(Order.order_items).joinedload(OrderItem.item))
-            .order_by(*order_by)
-            .limit(size + 1)
-            .offset((page - 1) * size)
-            .all()
+    default_sort = ("order_date:desc", "order_id:desc")
+    if relevance is not None:
+        allowed["relevance"] = relevance
+        default_sort = ("relevance:desc",) + default_sort
+    sort_keys = parse_sort_keys(sort, allowed, default_sort, tiebreaker="order_id")
+
+    filters = {
+        "status": status,
+        "date_from": date_from,
+        "date_to": date_to,
+        "delivery_from": delivery_from,
+        "delivery_to": delivery_to,
+        "q": q,
+        "search_columns": search_columns,
+    }
+
+    # Optional totals (exact | estimate | cached); the delivery filter reads order_item
+    total, pages, total_kind = count_total(
+        db, base, mode=parse_total_mode(include_total), table=Order.__tablename__,
+        filters=filters, size=size,
+        depends_on=(OrderItem.__tablename__,) if dl_from or dl_to else (), min_pages=0,
+    )
+
+    # Fetch page (size+1 → has_next; offset or keyset): headers plus per-order
+    # totals aggregated in the same statement, no ORM objects
+    page_query = (
+        base.with_entities(
+            Order.order_id,
+            Order.name,
+            Order.contact,
+            Order.order_date,
+            Order.status,
+            func.coalesce(func.sum(OrderItem.qty_requested), 0).label("order_qty"),
+            func.coalesce(func.sum(OrderItem.value * OrderItem.qty_requested), 0).label("total_value"),
+            func.count(OrderItem.item_id).label("line_count"),
+        )
+        .outerjoin(OrderItem, OrderItem.order_id == Order.order_id)
+        .group_by(Order.order_id)
     )
-    has_next = len(rows) > size
-    orders = rows[:size]
+    rows, has_next, next_cursor = fetch_page(page_query, sort_keys, page=page, size=size, cursor=cursor)
+
+    # Lines only when expanded: one flat query for the whole page
+    lines_by_order: Dict[int, List[Dict[str, Any]]] = {}
+    if expand and rows:
+        lines = (
+            db.query(
+                OrderItem.order_id,
+                Item.id.label("item_id"),
+                Item.sku,
+                Item.type,
+                Item.item_name,
+                Item.variant,
+                OrderItem.qty_requested,
+                OrderItem.tag,
+                OrderItem.delivery_date,
+                OrderItem.delivery_time,
+                OrderItem.team_assigned,
+                OrderItem.custom,
+                OrderItem.remarks,
+                OrderItem.value,
+            )
+            .join(Item, Item.id == OrderItem.item_id)
+            .filter(OrderItem.order_id.in_([row.order_id for row in rows]))
+            .order_by(OrderItem.order_id, OrderItem.item_id)
+            .all()
+        )
+        for line in lines:
+            sub_row = line._asdict()
+            lines_by_order.setdefault(sub_row.pop("order_id"), []).append(sub_row)
 
     # Shape payload
-    data: List[Dict[str, Any]] = []
-    for order in orders:
-        sub_rows: List[Dict[str, Any]] = []
-        total_qty = 0
-        total_value = Decimal("0")
-
-        for oi in order.order_items:
-            item = oi.item
-            if not item:
-                continue
-
-            qty = oi.qty_requested or 0
-            unit_price = oi.value or Decimal("0")
-
-            total_qty += qty
-            total_value += unit_price * qty
-
-            sub_rows.append({
-                "item_id": item.id,
-                "sku": item.sku,
-                "type": item.type,
-                "item_name": item.item_name,
-                "variant": item.variant,
-                "qty_requested": oi.qty_requested,
-                "tag": oi.tag,
-                "delivery_date": oi.delivery_date,
-                "delivery_time": oi.delivery_time,
-                "team_assigned": oi.team_assigned,
-                "custom": oi.custom,
-                "remarks": oi.remarks,
-                "value": oi.value,
-            })
-
-        data.append({
-            "id": order.order_id,
-            "cust_name": order.name,
-            "cust_contact": order.contact,
-            "order_date": order.order_date.strftime("%Y-%m-%d"),
-            "order_qty": total_qty,
-            "status": order.status,
-            "total_value": total_value,
-            "subRows": sub_rows,
-        })
+    data: List[Dict[str, Any]] = [
+        {
+            "id": row.order_id,
+            "cust_name": row.name,
+            "cust_contact": row.contact,
+            "order_date": row.order_date.strftime("%Y-%m-%d"),
+            "order_qty": row.order_qty,
+            "status": row.status,
+            "total_value": row.total_value,
+            "line_count": row.line_count,
+            "subRows": lines_by_order.get(row.order_id, []),
+        }
+        for row in rows
+    ]
 
     meta = build_meta(
         page=page,
         size=size,
-        has_prev=page > 1,
+        has_prev=page > 1 or bool(cursor),
         has_next=has_next,
         sort_tokens=sort,
-        filters={"date_from": date_from, "date_to": date_to, "q": q, "search_columns": search_columns},
+        filters=filters,
         total=total,
         pages=pages,
+        default_sort=sort_tokens_of(sort_keys),
+        cursor=cursor,
+        next_cursor=next_cursor,
+        total_kind=total_kind,
     )
     return {"meta": meta, "data": data}
 
 
+ORDER_EXPORT_HEADER_COLUMNS = (
+    "order_id", "shopify_order_id", "order_date", "name", "contact",
+    "street", "unit", "postal_code", "status",
+)
+ORDER_EXPORT_LINE_COLUMNS = (
+    "item_id", "sku", "item_name", "variant", "qty_requested", "tag",
+    "delivery_date", "delivery_time", "team_assigned", "delivered",
+    "custom", "remarks", "value",
+)
+ORDER_EXPORT_COLUMNS = ORDER_EXPORT_HEADER_COLUMNS + ORDER_EXPORT_LINE_COLUMNS
 
+
+def iter_orders_for_export(
+    db: Session,
+    *,
+    q: Optional[str] = None,
+    search_columns: Optional[List[str]] = None,
+    nested: bool = True,
+) -> Iterable[Dict[str, Any]]:
+    """Lazily yield orders with their lines for streaming export.
+
+    One flat column query (order LEFT JOIN order_item LEFT JOIN item) is read
+    in order_id order; with `nested` each order is folded into one dict with
+    its lines under "lines", otherwise one dict per line is yielded.
+    """
+    query = (
+        db.query(
+            *(getattr(Order, c) for c in ORDER_EXPORT_HEADER_COLUMNS),
+            OrderItem.item_id,
+            Item.sku,
+            Item.item_name,
+            Item.variant,
+            OrderItem.qty_requested,
+            OrderItem.tag,
+            OrderItem.delivery_date,
+            OrderItem.delivery_time,
+            OrderItem.team_assigned,
+            OrderItem.delivered,
+            OrderItem.custom,
+            OrderItem.remarks,
+            OrderItem.value,
+        )
+        .select_from(Order)
+        .outerjoin(OrderItem, OrderItem.order_id == Order.order_id)
+        .outerjoin(Item, Item.id == OrderItem.item_id)
+    )
+    search, _ = build_search(Order, q, search_columns, {"name", "contact", "status"})
+    if search is not None:
+        query = query.filter(search)
+
+    rows = iter_query_rows(query.order_by(Order.order_id, OrderItem.item_id))
+    if nested:
+        return nest_lines(rows, key="order_id", line_fields=ORDER_EXPORT_LINE_COLUMNS)
+    return rows
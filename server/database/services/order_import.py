@@ -0,0 +1,340 @@
+from __future__ import annotations
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional
+import csv
+import io
+import json
+
+from fastapi import HTTPException, status
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from database.models.order_item import OrderItem
+from database.services.pagination import invalidate_totals
+
+"""Bulk order import.
+
+An upload (CSV or NDJSON, one record per order line) is streamed with `COPY`
+into a temporary staging table, validated with set-based SQL and merged into
+`order` / `order_item`, all in one transaction:
+
+- Lines are grouped into orders by `order_ref` (the channel's order number);
+  every line of an order repeats its header fields.
+- An order whose `shopify_order_id` already exists gets its lines upserted
+  into that order (its header is left as is); other orders are created.
+- An order with any invalid line is skipped as a whole; every failing check
+  is reported against its row (1-based data row / NDJSON line).
+"""
+
+IMPORT_FORMATS = ("csv", "ndjson")
+
+ORDER_IMPORT_HEADER_COLUMNS = (
+    "order_ref", "shopify_order_id", "order_date", "name", "contact",
+    "street", "unit", "postal_code", "status",
+)
+ORDER_IMPORT_LINE_COLUMNS = (
+    "sku", "qty_requested", "tag", "delivery_date", "delivery_time",
+    "team_assigned", "delivered", "custom", "remarks", "value",
+)
+ORDER_IMPORT_COLUMNS = ORDER_IMPORT_HEADER_COLUMNS + ORDER_IMPORT_LINE_COLUMNS
+
+# bytes/characters handed to COPY per write
+COPY_CHUNK_SIZE = 64 * 1024
+
+# One row per staged line: the raw text fields plus what the checks need.
+# The header fields are compared as a JSON array, which keeps NULL apart from
+# '' and every value in its own position.
+_STAGED_ROWS = """
+    SELECT s.*,
+           i.id AS item_id,
+           count(*) OVER (PARTITION BY s.order_ref, s.sku) AS same_sku_lines,
+           min(s.header) OVER w IS DISTINCT FROM max(s.header) OVER w AS header_mismatch
+    FROM (
+        SELECT st.*, CAST(json_build_array({header}) AS text) AS header
+        FROM order_import_stage st
+    ) s
+    LEFT JOIN item i ON i.sku = s.sku
+    WINDOW w AS (PARTITION BY s.order_ref)
+""".format(header=", ".join(f"st.{c}" for c in ORDER_IMPORT_HEADER_COLUMNS))
+
+# (failed condition, message); casts are guarded with pg_input_is_valid
+_ROW_CHECKS = (
+    ("s.order_ref IS NULL", "order_ref is required"),
+    ("s.header_mismatch", "header fields differ between lines of this order_ref"),
+    ("s.shopify_order_id IS NOT NULL AND NOT pg_input_is_valid(s.shopify_order_id, 'bigint')",
+     "shopify_order_id must be an integer"),
+    ("s.order_date IS NULL OR NOT pg_input_is_valid(s.order_date, 'timestamptz')",
+     "order_date must be YYYY-MM-DD or ISO-8601"),
+    ("s.name IS NULL OR length(s.name) > 64", "name is required (max 64 characters)"),
+    ("s.contact IS NULL OR length(s.contact) > 16", "contact is required (max 16 characters)"),
+    ("s.street IS NULL OR length(s.street) > 254", "street is required (max 254 characters)"),
+    ("length(s.unit) > 16", "unit is max 16 characters"),
+    ("s.postal_code IS NULL OR length(s.postal_code) > 6", "postal_code is required (max 6 characters)"),
+    ("s.status IS NULL OR length(s.status) > 32", "status is required (max 32 characters)"),
+    ("s.sku IS NULL OR s.item_id IS NULL", "sku is missing or unknown"),
+    ("s.same_sku_lines > 1", "sku appears more than once in this order_ref"),
+    ("CASE WHEN pg_input_is_valid(s.qty_requested, 'integer') THEN s.qty_requested::int <= 0 ELSE true END",
+     "qty_requested must be a positive integer"),
+    ("s.tag IS NOT NULL AND NOT (string_to_array(s.tag, ';') <@ CAST(:allowed_tags AS text[]))",
+     "tag must be ;-separated values from: {allowed}"),
+    ("s.delivery_date IS NULL OR NOT pg_input_is_valid(s.delivery_date, 'date')",
+     "delivery_date must be YYYY-MM-DD"),
+    ("s.delivery_time IS NOT NULL AND NOT pg_input_is_valid(s.delivery_time, 'time')",
+     "delivery_time must be a valid time of day"),
+    ("s.delivered IS NOT NULL AND NOT pg_input_is_valid(s.delivered, 'boolean')",
+     "delivered must be true or false"),
+    ("CASE WHEN pg_input_is_valid(s.value, 'numeric(10,2)') THEN s.value::numeric < 0 ELSE true END",
+     "value must be a non-negative amount (max 8 digits before the decimal point)"),
+)
+
+
+def check_import_format(fmt: str) -> str:
+    """Validate the requested import format.
+
+    Raises:
+      HTTPException(400) for anything but `csv` or `ndjson`.
+    """
+    fmt = (fmt or "").strip().lower()
+    if fmt not in IMPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"format must be one of: {', '.join(IMPORT_FORMATS)}",
+        )
+    return fmt
+
+
+def _bad_upload(detail: str) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+
+def _check_columns(columns: Iterable[str]) -> List[str]:
+    columns = [c.strip() for c in columns]
+    unknown = [c for c in columns if c not in ORDER_IMPORT_COLUMNS]
+    if unknown:
+        raise _bad_upload(
+            f"Unknown column(s): {', '.join(unknown)}; expected: {', '.join(ORDER_IMPORT_COLUMNS)}"
+        )
+    if len(set(columns)) != len(columns):
+        raise _bad_upload("Duplicate column(s) in header")
+    return columns
+
+
+def _csv_chunks(text_stream: io.TextIOBase) -> Iterator[str]:
+    while True:
+        chunk = text_stream.read(COPY_CHUNK_SIZE)
+        if not chunk:
+            return
+        yield chunk
+
+
+def _ndjson_value(val: Any) -> Optional[str]:
+    if val is None:
+        return None
+    if isinstance(val, bool):
+        return "true" if val else "false"
+    if isinstance(val, (list, tuple)):
+        return ";".join(str(v) for v in val)
+    return str(val)
+
+
+def _ndjson_chunks(text_stream: io.TextIOBase) -> Iterator[str]:
+    """Re-encode NDJSON lines as CSV records (row_no first) for COPY."""
+    out = io.StringIO()
+    writer = csv.writer(out)
+    for line_no, line in enumerate(text_stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            raise _bad_upload(f"Line {line_no}: invalid JSON")
+        if not isinstance(record, dict):
+            raise _bad_upload(f"Line {line_no}: expected a JSON object")
+        _check_columns(record)
+        writer.writerow([line_no] + [_ndjson_value(record.get(c)) for c in ORDER_IMPORT_COLUMNS])
+        if out.tell() >= COPY_CHUNK_SIZE:
+            yield out.getvalue()
+            out.seek(0)
+            out.truncate(0)
+    if out.tell():
+        yield out.getvalue()
+
+
+class _ChunkReader:
+    """File-like `read()` over an iterator of str chunks (psycopg2 copy_expert)."""
+
+    def __init__(self, chunks: Iterator[str]):
+        self._chunks = chunks
+        self._buf = ""
+
+    def read(self, size: int = -1) -> str:
+        while size < 0 or len(self._buf) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._buf += chunk
+        if size < 0:
+            out, self._buf = self._buf, ""
+        else:
+            out, self._buf = self._buf[:size], self._buf[size:]
+        return out
+
+
+def _copy_in(db: Session, sql: str, chunks: Iterator[str]) -> None:
+    """Run `COPY ... FROM STDIN` on the session's connection, feeding `chunks`."""
+    cursor = db.connection().connection.dbapi_connection.cursor()
+    try:
+        if hasattr(cursor, "copy_expert"):      # psycopg2
+            cursor.copy_expert(sql, _ChunkReader(chunks), size=COPY_CHUNK_SIZE)
+        else:                                   # psycopg 3
+            with cursor.copy(sql) as copy:
+                for chunk in chunks:
+                    copy.write(chunk)
+    finally:
+        cursor.close()
+
+
+def _stage(db: Session, upload: BinaryIO, fmt: str) -> None:
+    columns_sql = ", ".join(f"{c} text" for c in ORDER_IMPORT_COLUMNS)
+    db.execute(text(f"""
+        CREATE TEMP TABLE order_import_stage (
+            row_no bigint GENERATED BY DEFAULT AS IDENTITY,
+            {columns_sql}
+        ) ON COMMIT DROP
+    """))
+
+    text_stream = io.TextIOWrapper(upload, encoding="utf-8-sig", newline="")
+    try:
+        if fmt == "csv":
+            header = next(csv.reader([text_stream.readline()]), None)
+            if not header:
+                raise _bad_upload("Empty upload: expected a CSV header row")
+            columns = _check_columns(header)
+            chunks = _csv_chunks(text_stream)
+        else:
+            columns = ["row_no", *ORDER_IMPORT_COLUMNS]
+            chunks = _ndjson_chunks(text_stream)
+
+        data_columns = [c for c in columns if c != "row_no"]
+        sql = (
+            f"COPY order_import_stage ({', '.join(columns)}) FROM STDIN "
+            f"WITH (FORMAT csv, FORCE_NULL ({', '.join(data_columns)}))"
+        )
+        try:
+            _copy_in(db, sql, chunks)
+        except HTTPException:
+            raise
+        except UnicodeDecodeError:
+            raise _bad_upload("Upload must be UTF-8 encoded")
+        except Exception as exc:    # driver-specific COPY errors (bad quoting, column count, ...)
+            raise _bad_upload(f"Could not read upload: {str(exc).splitlines()[0]}")
+    finally:
+        text_stream.detach()
+
+
+def import_orders(db: Session, upload: BinaryIO, *, fmt: str) -> Dict[str, Any]:
+    """
+    Import orders and order lines from a CSV/NDJSON upload in one transaction.
+
+    Args:
+      db: Session (the import commits it).
+      upload: Binary file object positioned at the start of the upload.
+      fmt: `csv` (header row required) or `ndjson`; see `check_import_format`.
+
+    Returns:
+      {"orders_created", "orders_updated", "orders_rejected", "lines_imported",
+       "errors": [{"row", "order_ref", "error"}, ...]}
+
+    Raises:
+      HTTPException(400) if the upload itself is malformed (unknown columns,
+      invalid JSON, unreadable CSV); nothing is imported then.
+    """
+    try:
+        _stage(db, upload, fmt)
+
+        allowed_tags = sorted(OrderItem.ALLOWED_TAGS)
+        messages = [msg.format(allowed=", ".join(allowed_tags)).replace("'", "''") for _, msg in _ROW_CHECKS]
+        checks = ",\n".join(f"(({cond}), '{msg}')" for (cond, _), msg in zip(_ROW_CHECKS, messages))
+        db.execute(text(f"""
+            CREATE TEMP TABLE order_import_error ON COMMIT DROP AS
+            SELECT s.row_no, s.order_ref, c.error
+            FROM ({_STAGED_ROWS}) s
+            CROSS JOIN LATERAL (VALUES {checks}) AS c(failed, error)
+            WHERE c.failed
+        """), {"allowed_tags": allowed_tags})
+
+        # One id per valid order: the existing order for a known
+        # shopify_order_id, otherwise a fresh one from the order sequence
+        db.execute(text("""
+            CREATE TEMP TABLE order_import_map ON COMMIT DROP AS
+            SELECT v.order_ref, v.row_no, v.existing_id IS NULL AS is_new,
+                   COALESCE(v.existing_id, nextval(pg_get_serial_sequence('"order"', 'order_id'))) AS order_id
+            FROM (
+                SELECT DISTINCT ON (s.order_ref) s.order_ref, s.row_no,
+                       (SELECT min(o.order_id) FROM "order" o
+                        WHERE o.shopify_order_id = s.shopify_order_id::bigint) AS existing_id
+                FROM order_import_stage s
+                WHERE s.order_ref IS NOT NULL
+                  AND NOT EXISTS (SELECT 1 FROM order_import_error e WHERE e.order_ref = s.order_ref)
+                ORDER BY s.order_ref, s.row_no
+            ) v
+            ORDER BY v.row_no
+        """))
+
+        orders_created = db.execute(text("""
+            INSERT INTO "order" (order_id, shopify_order_id, order_date, name, contact,
+                                 street, unit, postal_code, status)
+            SELECT m.order_id, s.shopify_order_id::bigint, s.order_date::timestamptz, s.name, s.contact,
+                   s.street, s.unit, s.postal_code, s.status
+            FROM order_import_map m
+            JOIN order_import_stage s ON s.row_no = m.row_no
+            WHERE m.is_new
+            ORDER BY m.order_id
+        """)).rowcount
+
+        lines_imported = db.execute(text("""
+            INSERT INTO order_item (order_id, item_id, qty_requested, tag, delivery_date, delivery_time,
+                                    team_assigned, delivered, custom, remarks, value)
+            SELECT m.order_id, i.id, s.qty_requested::int, string_to_array(s.tag, ';'),
+                   s.delivery_date::date, s.delivery_time::time, s.team_assigned,
+                   COALESCE(s.delivered::boolean, false), s.custom, s.remarks, s.value::numeric(10,2)
+            FROM order_import_stage s
+            JOIN order_import_map m ON m.order_ref = s.order_ref
+            JOIN item i ON i.sku = s.sku
+            ORDER BY m.order_id, i.id
+            ON CONFLICT (order_id, item_id) DO UPDATE SET
+                qty_requested = EXCLUDED.qty_requested,
+                tag = EXCLUDED.tag,
+                delivery_date = EXCLUDED.delivery_date,
+                delivery_time = EXCLUDED.delivery_time,
+                team_assigned = EXCLUDED.team_assigned,
+                delivered = EXCLUDED.delivered,
+                custom = EXCLUDED.custom,
+                remarks = EXCLUDED.remarks,
+                value = EXCLUDED.value
+        """)).rowcount
+
+        orders_updated = db.execute(
+            text("SELECT count(*) FROM order_import_map WHERE NOT is_new")
+        ).scalar_one()
+        orders_rejected = db.execute(text("""
+            SELECT count(DISTINCT COALESCE(order_ref, '#' || row_no)) FROM order_import_error
+        """)).scalar_one()
+        errors = [
+            dict(row)
+            for row in db.execute(text("""
+                SELECT row_no AS row, order_ref, error FROM order_import_error ORDER BY row_no, error
+            """)).mappings()
+        ]
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    invalidate_totals("order", "order_item")
+    return {
+        "orders_created": orders_created,
+        "orders_updated": orders_updated,
+        "orders_rejected": orders_rejected,
+        "lines_imported": lines_imported,
+        "errors": errors,
+    }
@@ -1,8 +1,9 @@
 from sqlalchemy.orm import Session
 from database.models.order_item import OrderItem
+from database.models.monthly_item_demand import MonthlyItemDemand
 from database.schemas.order_item import OrderItemCreate, OrderItemUpdate
 
-from sqlalchemy import func         
+from sqlalchemy import func, text
 from datetime import date           
 import calendar                     
 
@@ -48,72 +49,64 @@ def delete_order_item(db: Session, order_id: int, item_id: int):
     db.commit()
     return db_order_item
 
+def _month_end(month_start: date) -> date:
+    """Last day of the month starting at `month_start`."""
+    return date(month_start.year, month_start.month, calendar.monthrange(month_start.year, month_start.month)[1])
+
 def get_monthly_order_item_quantities(db: Session):
     """
     Aggregate total qty_requested per month based on delivery_date.
 
+    Reads the trigger-maintained `monthly_item_demand` rollup (one row per
+    item and month) instead of scanning order_item.
+
     Returns a list of dicts: [{ "date": date, "quantity": int }, ...]
     where date is the LAST day of each month.
     """
     rows = (
         db.query(
-            func.date_trunc("month", OrderItem.delivery_date).label("month"),
-            func.sum(OrderItem.qty_requested).label("quantity"),
+            MonthlyItemDemand.month,
+            func.sum(MonthlyItemDemand.qty).label("quantity"),
         )
-        .group_by(func.date_trunc("month", OrderItem.delivery_date))
-        .order_by(func.date_trunc("month", OrderItem.delivery_date))
+        .filter(MonthlyItemDemand.qty != 0)    # months whose lines were all removed
+        .group_by(MonthlyItemDemand.month)
+        .order_by(MonthlyItemDemand.month)
         .all()
     )
-
-    results = []
-    for month_ts, qty in rows:
-        if month_ts is None:
-            continue
-
-        # month_ts is a datetime at the first day of that month (e.g. 2024-04-01)
-        year = month_ts.year
-        month = month_ts.month
-        last_day = calendar.monthrange(year, month)[1]
-        month_end = date(year, month, last_day)
-
-        results.append({
-            "date": month_end,
-            "quantity": int(qty or 0),
-        })
-
-    return results
+    return [{"date": _month_end(month), "quantity": int(qty or 0)} for month, qty in rows]
 
 def get_monthly_order_item_quantities_by_sku(db: Session, item_id: int):
     """
     Aggregate total qty_requested per month for a specific SKU (item_id).
 
+    Reads the `monthly_item_demand` rollup by primary key.
+
     Returns a list of dicts: [{ "date": date, "quantity": int }, ...]
     where date is the LAST day of each month.
     """
     rows = (
-        db.query(
-            func.date_trunc("month", OrderItem.delivery_date).label("month"),
-            func.sum(OrderItem.qty_requested).label("quantity"),
-        )
-        .filter(OrderItem.item_id == item_id)     # 👈 filter by SKU
-        .group_by(func.date_trunc("month", OrderItem.delivery_date))
-        .order_by(func.date_trunc("month", OrderItem.delivery_date))
+        db.query(MonthlyItemDemand.month, MonthlyItemDemand.qty)
+        .filter(MonthlyItemDemand.item_id == item_id, MonthlyItemDemand.qty != 0)     # 👈 filter by SKU
+        .order_by(MonthlyItemDemand.month)
         .all()
     )
+    return [{"date": _month_end(month), "quantity": int(qty)} for month, qty in rows]
 
-    results = []
-    for month_ts, qty in rows:
-        if month_ts is None:
-            continue
-
-        year = month_ts.year
-        month = month_ts.month
-        last_day = calendar.monthrange(year, month)[1]
-        month_end = date(year, month, last_day)
-
-        results.append({
-            "date": month_end,
-            "quantity": int(qty or 0),
-        })
+def rebuild_monthly_item_demand(db: Session) -> int:
+    """
+    Recompute `monthly_item_demand` from order_item in one transaction.
 
-    return results
+    order_item is locked against writes meanwhile so no trigger delta is lost
+    between the wipe and the re-aggregation. Returns the number of rollup rows.
+    """
+    db.execute(text("LOCK TABLE order_item IN SHARE MODE"))
+    db.execute(text("DELETE FROM monthly_item_demand"))
+    result = db.execute(text("""
+        INSERT INTO monthly_item_demand (item_id, month, qty, value)
+        SELECT item_id, date_trunc('month', delivery_date)::date,
+               SUM(qty_requested), SUM(qty_requested * value)
+        FROM order_item
+        GROUP BY 1, 2
+    """))
+    db.commit()
+    return result.rowcount
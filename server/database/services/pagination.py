@@ -1,7 +1,19 @@
 # app/core/pagination.py
 from __future__ import annotations
-from typing import Iterable, Optional, Any, Dict, List
-from datetime import datetime, date
+from typing import Iterable, Optional, Any, Dict, FrozenSet, List, Tuple
+from datetime import datetime, date, time
+from decimal import Decimal
+import base64
+import binascii
+import json
+import threading
+import time as _time
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, or_, false, tuple_, event, func, text
+from sqlalchemy.orm import Session
+
+from config import settings
 
 """Pagination utilities shared across list endpoints.
 
@@ -9,9 +21,18 @@ This module provides small, model-agnostic helpers to:
 - sanitize page/size inputs (`clamp_page_size`)
 - normalize date-like filter values (`to_datetime`)
 - parse client sort tokens into SQLAlchemy order_by objects (`parse_sort`)
+- resolve sort tokens into keyset sort keys (`parse_sort_keys`)
+- encode/decode opaque keyset cursors (`encode_cursor`, `decode_cursor`)
+- fetch one page in either offset or cursor mode (`fetch_page`)
+- compute exact, estimated or cached totals (`count_total`)
 - build a consistent pagination metadata payload (`build_meta`)
 """
 
+# (token name, SQLAlchemy column/expression, descending?)
+SortKey = Tuple[str, Any, bool]
+
+TOTAL_MODES = ("exact", "estimate", "cached")
+
 
 def clamp_page_size(page: int | None, size: int | None, *, max_page_size: int = 200) -> tuple[int, int]:
     """Clamp and normalize pagination inputs.
@@ -92,6 +113,339 @@ def parse_sort(
     return order_by or default_order_by
 
 
+def parse_sort_keys(
+    sort_tokens: Optional[Iterable[str]],
+    allowed: Dict[str, Any],
+    default_tokens: Iterable[str],
+    *,
+    tiebreaker: str,
+) -> List[SortKey]:
+    """Resolve client sort tokens into sort keys usable for keyset pagination.
+
+    Same token rules as `parse_sort`, but the result keeps the field name and
+    direction so the page boundary can be encoded into a cursor. The
+    `tiebreaker` field (a unique column from `allowed`, usually the primary
+    key) is appended when missing so the ordering is total.
+
+    Args:
+      sort_tokens: Iterable of `"field:dir"` tokens; if None/empty, defaults apply.
+      allowed: Map from field name to SQLAlchemy column/expression.
+      default_tokens: Tokens used when no valid client token is given.
+      tiebreaker: Name of a unique field in `allowed`.
+
+    Returns:
+      A list of `(field, column, descending)` tuples.
+    """
+    def _resolve(tokens: Iterable[str]) -> List[SortKey]:
+        keys: List[SortKey] = []
+        for token in tokens:
+            field, _, direction = token.partition(":")
+            field = field.strip()
+            col = allowed.get(field)
+            if col is None or any(k[0] == field for k in keys):
+                continue
+            keys.append((field, col, (direction or "asc").strip().lower() in ("desc", "descending")))
+        return keys
+
+    keys = _resolve(sort_tokens or ()) or _resolve(default_tokens)
+    if not any(k[0] == tiebreaker for k in keys):
+        keys.append((tiebreaker, allowed[tiebreaker], keys[-1][2] if keys else False))
+    return keys
+
+
+def sort_tokens_of(sort_keys: List[SortKey]) -> List[str]:
+    """Render sort keys back into `"field:dir"` tokens (used for meta/cursors)."""
+    return [f"{field}:{'desc' if desc else 'asc'}" for field, _, desc in sort_keys]
+
+
+def _dump_value(val: Any) -> Any:
+    if isinstance(val, datetime):
+        return {"dt": val.isoformat()}
+    if isinstance(val, date):
+        return {"d": val.isoformat()}
+    if isinstance(val, time):
+        return {"t": val.isoformat()}
+    if isinstance(val, Decimal):
+        return {"dec": str(val)}
+    return val
+
+
+def _load_value(val: Any) -> Any:
+    if isinstance(val, dict):
+        if "dt" in val:
+            return datetime.fromisoformat(val["dt"])
+        if "d" in val:
+            return date.fromisoformat(val["d"])
+        if "t" in val:
+            return time.fromisoformat(val["t"])
+        if "dec" in val:
+            return Decimal(val["dec"])
+    return val
+
+
+def encode_cursor(sort_keys: List[SortKey], values: Iterable[Any]) -> str:
+    """Encode the sort-key values of a boundary row into an opaque cursor.
+
+    The cursor also carries the sort signature, so it can only be replayed
+    against a request that sorts the same way.
+    """
+    payload = {"s": sort_tokens_of(sort_keys), "v": [_dump_value(v) for v in values]}
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_keys: List[SortKey]) -> List[Any]:
+    """Decode a cursor produced by `encode_cursor` for the same sort keys.
+
+    Raises:
+      HTTPException(400) if the cursor is malformed or was issued for a
+      different sort order.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        values = [_load_value(v) for v in payload["v"]]
+        signature = payload["s"]
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    if signature != sort_tokens_of(sort_keys) or len(values) != len(sort_keys):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor does not match the requested sort order",
+        )
+    return values
+
+
+def _is_nullable(col: Any) -> bool:
+    expr = getattr(col, "expression", col)
+    return getattr(expr, "nullable", True)
+
+
+def _keyset_equal(col: Any, val: Any):
+    return col.is_(None) if val is None else col == val
+
+
+def _keyset_after(col: Any, desc: bool, val: Any):
+    # Postgres defaults: ASC sorts NULLs last, DESC sorts NULLs first.
+    if desc:
+        return col.is_not(None) if val is None else col < val
+    if val is None:
+        return false()
+    return or_(col > val, col.is_(None)) if _is_nullable(col) else col > val
+
+
+def keyset_condition(sort_keys: List[SortKey], values: List[Any]):
+    """Build the WHERE clause selecting rows strictly after `values`.
+
+    Uses a row-value comparison (`(a, b) > (x, y)`) when every key sorts in the
+    same direction over non-null columns, so Postgres can seek straight into a
+    matching composite index; otherwise expands into the equivalent OR-chain.
+    """
+    directions = {desc for _, _, desc in sort_keys}
+    if len(directions) == 1 and all(v is not None for v in values) and not any(
+        _is_nullable(col) for _, col, _ in sort_keys
+    ):
+        lhs = tuple_(*[col for _, col, _ in sort_keys])
+        rhs = tuple_(*values)
+        return lhs < rhs if directions.pop() else lhs > rhs
+
+    clauses = []
+    for i, (_, col, desc) in enumerate(sort_keys):
+        prefix = [_keyset_equal(c, v) for (_, c, _), v in zip(sort_keys[:i], values[:i])]
+        clauses.append(and_(*prefix, _keyset_after(col, desc, values[i])))
+    return or_(*clauses)
+
+
+def fetch_page(
+    query: Any,
+    sort_keys: List[SortKey],
+    *,
+    page: int,
+    size: int,
+    cursor: Optional[str] = None,
+) -> Tuple[List[Any], bool, Optional[str]]:
+    """Fetch one page of `query` in offset mode or keyset (cursor) mode.
+
+    - Offset mode (`cursor` is None): `LIMIT size+1 OFFSET (page-1)*size`.
+    - Cursor mode: seeks past the row encoded in `cursor` instead of skipping
+      rows, so every page costs the same as the first one.
+
+    The sort-key values are selected alongside each row so `next_cursor` can be
+    built from the last row of the page.
+
+    Args:
+      query: A SQLAlchemy ORM `Query` (filters already applied, no order_by).
+      sort_keys: Output of `parse_sort_keys`.
+      page: 1-based page number (ignored in cursor mode).
+      size: Page size.
+      cursor: Opaque cursor from a previous page's `next_cursor`.
+
+    Returns:
+      `(rows, has_next, next_cursor)`. For single-entity queries `rows` holds
+      the entities; otherwise the result rows (which also carry the extra
+      `_sort_N` columns).
+    """
+    width = len(query.column_descriptions)
+    if cursor:
+        query = query.filter(keyset_condition(sort_keys, decode_cursor(cursor, sort_keys)))
+    query = (
+        query.add_columns(*[col.label(f"_sort_{i}") for i, (_, col, _) in enumerate(sort_keys)])
+             .order_by(*[col.desc() if desc else col.asc() for _, col, desc in sort_keys])
+             .limit(size + 1)
+    )
+    if not cursor:
+        query = query.offset((page - 1) * size)
+
+    rows = query.all()
+    has_next = len(rows) > size
+    rows = rows[:size]
+
+    next_cursor = None
+    if has_next and rows:
+        next_cursor = encode_cursor(sort_keys, rows[-1][width:])
+    return [row[0] for row in rows] if width == 1 else rows, has_next, next_cursor
+
+
+def parse_total_mode(value: Optional[str | bool]) -> Optional[str]:
+    """Normalize an `include_total` input into a total mode.
+
+    Accepts `exact | estimate | cached`, plus the legacy boolean spellings
+    (`true`/`1` -> `exact`, `false`/`0`/empty -> no total).
+
+    Raises:
+      HTTPException(400) for any other value.
+    """
+    if value is None or value is False:
+        return None
+    if value is True:
+        return "exact"
+    mode = str(value).strip().lower()
+    if mode in ("", "false", "0", "no", "off"):
+        return None
+    if mode in ("true", "1", "yes", "on"):
+        return "exact"
+    if mode not in TOTAL_MODES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"include_total must be one of: {', '.join(TOTAL_MODES)}",
+        )
+    return mode
+
+
+# (table name, filter signature) -> (expires_at, total, other tables the count reads)
+_total_cache: Dict[Tuple[str, str], Tuple[float, int, FrozenSet[str]]] = {}
+_total_cache_lock = threading.Lock()
+
+
+def invalidate_totals(*resources: str) -> None:
+    """Drop cached totals for the given tables (all tables if none given).
+
+    ORM writes invalidate automatically (see `_invalidate_flushed_totals`);
+    call this after writes that bypass the ORM (raw SQL, COPY).
+    """
+    with _total_cache_lock:
+        if not resources:
+            _total_cache.clear()
+            return
+        for key in [k for k, v in _total_cache.items() if k[0] in resources or v[2].intersection(resources)]:
+            del _total_cache[key]
+
+
+@event.listens_for(Session, "after_flush")
+def _invalidate_flushed_totals(session: Session, flush_context: Any) -> None:
+    tables = {
+        getattr(obj, "__tablename__", None)
+        for obj in (*session.new, *session.dirty, *session.deleted)
+    }
+    tables.discard(None)
+    if tables and _total_cache:
+        invalidate_totals(*tables)
+
+
+def _exact_total(db: Session, query: Any) -> int:
+    return db.query(func.count()).select_from(query.order_by(None).subquery()).scalar() or 0
+
+
+def _estimated_total(db: Session, query: Any, table: str, filtered: bool) -> Optional[int]:
+    if not filtered:
+        # Unfiltered list: the planner's table statistics (-1 = never analyzed)
+        reltuples = db.execute(
+            text("SELECT reltuples FROM pg_class WHERE oid = to_regclass(:t)"),
+            {"t": f'"{table}"'},
+        ).scalar()
+        return int(reltuples) if reltuples is not None and reltuples >= 0 else None
+    compiled = query.order_by(None).statement.compile(
+        dialect=db.get_bind().dialect, compile_kwargs={"render_postcompile": True}
+    )
+    plan = db.connection().exec_driver_sql(
+        f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params
+    ).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def count_total(
+    db: Session,
+    query: Any,
+    *,
+    mode: Optional[str],
+    table: str,
+    filters: Dict[str, Any],
+    size: int,
+    depends_on: Iterable[str] = (),
+    min_pages: int = 1,
+) -> Tuple[Optional[int], Optional[int], Optional[str]]:
+    """Count the rows of `query` according to `mode`.
+
+    - `exact`: `SELECT count(*)` over the filtered query.
+    - `estimate`: `pg_class.reltuples` when no filter is applied, otherwise the
+      planner's row estimate for the filtered query (`EXPLAIN`). Falls back to
+      an exact count when no statistics are available yet.
+    - `cached`: exact count memoized per (table, filters) for
+      `PAGINATION_TOTAL_CACHE_TTL` seconds; dropped on writes to `table` or
+      to any table in `depends_on`.
+
+    Args:
+      db: Active session.
+      query: Filtered ORM `Query` (no ordering/limit).
+      mode: Output of `parse_total_mode`; None skips counting.
+      table: Base table of the query (cache/statistics key).
+      filters: Active filter values; empty/None values count as unfiltered.
+      size: Page size, used to derive `pages`.
+      depends_on: Other tables the active filters read (e.g. a semi-join).
+      min_pages: `pages` reported for an empty result.
+
+    Returns:
+      `(total, pages, total_kind)`; all None when `mode` is None.
+    """
+    if mode is None:
+        return None, None, None
+
+    active = {k: v for k, v in filters.items() if v is not None and v != "" and v != []}
+    total: Optional[int] = None
+    kind = mode
+    if mode == "estimate":
+        total = _estimated_total(db, query, table, filtered=bool(active))
+        if total is None:
+            kind = "exact"
+    elif mode == "cached":
+        key = (table, json.dumps(active, sort_keys=True, default=str))
+        now = _time.monotonic()
+        with _total_cache_lock:
+            hit = _total_cache.get(key)
+        if hit and hit[0] > now:
+            total = hit[1]
+        else:
+            total = _exact_total(db, query)
+            with _total_cache_lock:
+                _total_cache[key] = (now + settings.PAGINATION_TOTAL_CACHE_TTL, total, frozenset(depends_on))
+    if total is None:
+        total = _exact_total(db, query)
+    pages = max(min_pages, (total + size - 1) // size)
+    return total, pages, kind
+
+
 def build_meta(
     *,
     page: int,
@@ -103,6 +457,9 @@ def build_meta(
     total: Optional[int] = None,
     pages: Optional[int] = None,
     default_sort: Iterable[str] = ("order_date:desc", "order_id:desc"),
+    cursor: Optional[str] = None,
+    next_cursor: Optional[str] = None,
+    total_kind: Optional[str] = None,
 ) -> Dict[str, Any]:
     """Construct a consistent pagination metadata dictionary.
 
@@ -117,13 +474,17 @@ def build_meta(
       total: Optional total number of records (include only if computed).
       pages: Optional total number of pages (include only if computed).
       default_sort: Sort tokens to report when `sort_tokens` is falsy.
+      cursor: Cursor the page was fetched with (cursor mode only).
+      next_cursor: Cursor for the following page, if there is one.
+      total_kind: How `total` was obtained (`exact | estimate | cached`).
 
     Returns:
       A `dict` with keys:
         - page, size, has_prev, has_next
         - sort: list[str]
         - filters: dict[str, Any]
-        - total (optional), pages (optional)
+        - total (optional), pages (optional), total_kind (optional)
+        - cursor (optional), next_cursor (optional)
     """
     meta: Dict[str, Any] = {
         "page": page,
@@ -137,4 +498,10 @@ def build_meta(
         meta["total"] = total
     if pages is not None:
         meta["pages"] = pages
+    if total_kind is not None:
+        meta["total_kind"] = total_kind
+    if cursor is not None:
+        meta["cursor"] = cursor
+    if next_cursor is not None:
+        meta["next_cursor"] = next_cursor
     return meta
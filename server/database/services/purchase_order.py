@@ -1,11 +1,11 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional, Iterable
+from typing import Any, Dict, List, Optional, Iterable, Union
 from datetime import date, datetime
 from fastapi import HTTPException, status
 
-from sqlalchemy import func, or_, String, Integer
-from sqlalchemy.orm import Session, joinedload, selectinload, load_only
+from sqlalchemy import func, text
+from sqlalchemy.orm import Session, joinedload, selectinload, load_only, lazyload
 
 from database.models.purchase_order import PurchaseOrder
 from database.models.purchase_order_item import PurchaseOrderItem
@@ -22,16 +22,26 @@ from database.schemas.purchase_order import (
     PurchaseOrderItemReadCustom, 
     PurchaseOrderCreateWithItems,
     PurchaseOrderCreateFromCart,
+    PurchaseOrderCreateFromCartBySupplier,
     PurchaseOrderStatus,
 )
 
 from database.services.pagination import (
     clamp_page_size,
-    parse_sort,
+    parse_sort_keys,
+    sort_tokens_of,
+    fetch_page,
+    parse_total_mode,
+    count_total,
     build_meta,
+    invalidate_totals,
 )
+from database.services.search import build_search
+from database.services.export import iter_query_rows, nest_lines
 
-from database.services.cart_service import clear_user_cart
+from database.services.stock import apply_stock_movements
+from database.services.supplier import assign_supplier_cover
+from app.utils.etag import bump_version
 
 
 def get_purchase_order(db: Session, po_id: int) -> Optional[PurchaseOrder]:
@@ -50,11 +60,16 @@ def get_all_purchase_orders(
     q: Optional[str] = None,
     search_columns: Optional[List[str]] = None,
     sort: Optional[Iterable[str]] = None,  # e.g. ["order_date:desc","id:desc"]
-    include_total: bool = False,
+    cursor: Optional[str] = None,          # keyset mode; takes precedence over page
+    include_total: Union[bool, str, None] = False,
+    enriched: bool = False,                # + supplier_name, line_count, total_qty
     max_page_size: int = 200,
 ) -> Dict[str, Any]:
     """
     Return a filtered page of purchase orders, with meta.
+
+    With `enriched`, the page query also joins the supplier and aggregates
+    each PO's lines (GROUP BY), so list views need no per-row detail calls.
     """
     page, size = clamp_page_size(page, size, max_page_size=max_page_size)
 
@@ -62,19 +77,9 @@ def get_all_purchase_orders(
 
     # Search filter
     SEARCHABLE_COLUMNS = {"id", "status", "supplier_id", "user_id"}  # add "order_date" if you want date parsing
-    if q and search_columns:
-        like = f"%{q.strip()}%"
-        filters = []
-        for col in search_columns:
-            if col in SEARCHABLE_COLUMNS and hasattr(PurchaseOrder, col):
-                column = getattr(PurchaseOrder, col)
-                if hasattr(column, "type"):
-                    if isinstance(column.type, String):
-                        filters.append(column.ilike(like))
-                    elif isinstance(column.type, Integer) and q.isdigit():
-                        filters.append(column == int(q))
-        if filters:
-            base = base.filter(or_(*filters))
+    search, relevance = build_search(PurchaseOrder, q, search_columns, SEARCHABLE_COLUMNS)
+    if search is not None:
+        base = base.filter(search)
 
     # Sort (whitelisted)
     allowed = {
@@ -86,47 +91,110 @@ def get_all_purchase_orders(
     }
     # Remove None values (defensive—mirrors your user impl)
     allowed = {k: v for k, v in allowed.items() if v is not None}
-    order_by = parse_sort(sort, allowed, [PurchaseOrder.order_date.desc(), PurchaseOrder.id.desc()])
-
-    # Optional exact totals
-    total = pages = None
-    if include_total:
-        total = db.query(func.count()).select_from(base.subquery()).scalar() or 0
-        pages = max(1, (total + size - 1) // size)
-
-    # Fetch page (size+1 → has_next)
-    rows: List[PurchaseOrder] = (
-        base.order_by(*order_by)
-            .limit(size + 1)
-            .offset((page - 1) * size)
-            .all()
+    default_sort = ("order_date:desc", "id:desc")
+    if relevance is not None:
+        allowed["relevance"] = relevance
+        default_sort = ("relevance:desc",) + default_sort
+    if enriched:
+        allowed["supplier_name"] = Supplier.name
+    sort_keys = parse_sort_keys(sort, allowed, default_sort, tiebreaker="id")
+
+    filters = {"q": q, "search_columns": search_columns}
+
+    # Optional totals (exact | estimate | cached)
+    total, pages, total_kind = count_total(
+        db, base, mode=parse_total_mode(include_total), table=PurchaseOrder.__tablename__,
+        filters=filters, size=size,
     )
-    has_next = len(rows) > size
-    pos = rows[:size]
+
+    # Fetch page (size+1 → has_next; offset or keyset); plain columns, so no
+    # supplier/user/line relationships are loaded per row
+    columns = [
+        PurchaseOrder.id,
+        PurchaseOrder.order_date,   # let FastAPI/Pydantic serialize date/datetime
+        PurchaseOrder.status,
+        PurchaseOrder.supplier_id,
+        PurchaseOrder.user_id,
+    ]
+    page_query = base.with_entities(*columns)
+    if enriched:
+        page_query = (
+            base.with_entities(
+                *columns,
+                Supplier.name.label("supplier_name"),
+                func.count(PurchaseOrderItem.item_id).label("line_count"),
+                func.coalesce(func.sum(PurchaseOrderItem.qty), 0).label("total_qty"),
+            )
+            .outerjoin(Supplier, Supplier.id == PurchaseOrder.supplier_id)
+            .outerjoin(PurchaseOrderItem, PurchaseOrderItem.purchase_order_id == PurchaseOrder.id)
+            .group_by(PurchaseOrder.id, Supplier.id)
+        )
+    rows, has_next, next_cursor = fetch_page(page_query, sort_keys, page=page, size=size, cursor=cursor)
 
     # Shape payload
-    data: List[Dict[str, Any]] = []
-    for po in pos:
-        data.append({
-            "id": po.id,
-            "order_date": po.order_date,   # let FastAPI/Pydantic serialize date/datetime
-            "status": po.status,
-            "supplier_id": po.supplier_id,
-            "user_id": po.user_id,
-        })
+    fields = [c.key for c in columns] + (["supplier_name", "line_count", "total_qty"] if enriched else [])
+    data: List[Dict[str, Any]] = [{f: getattr(row, f) for f in fields} for row in rows]
 
     meta = build_meta(
         page=page,
         size=size,
-        has_prev=page > 1,
+        has_prev=page > 1 or bool(cursor),
         has_next=has_next,
         sort_tokens=sort,
-        filters={"q": q, "search_columns": search_columns},
+        filters=filters,
         total=total,
         pages=pages,
+        default_sort=sort_tokens_of(sort_keys),
+        cursor=cursor,
+        next_cursor=next_cursor,
+        total_kind=total_kind,
     )
     return {"meta": meta, "data": data}
 
+PO_EXPORT_HEADER_COLUMNS = ("id", "order_date", "status", "supplier_id", "supplier_name", "user_id")
+PO_EXPORT_LINE_COLUMNS = ("item_id", "sku", "item_name", "variant", "qty", "supplier_item_id")
+PO_EXPORT_COLUMNS = PO_EXPORT_HEADER_COLUMNS + PO_EXPORT_LINE_COLUMNS
+
+def iter_purchase_orders_for_export(
+    db: Session,
+    *,
+    q: Optional[str] = None,
+    search_columns: Optional[List[str]] = None,
+    nested: bool = True,
+) -> Iterable[Dict[str, Any]]:
+    """
+    Lazily yield purchase orders (with supplier name and lines) for streaming export.
+    With `nested` each PO is one dict with its lines under "lines"; otherwise one dict per line.
+    """
+    query = (
+        db.query(
+            PurchaseOrder.id,
+            PurchaseOrder.order_date,
+            PurchaseOrder.status,
+            PurchaseOrder.supplier_id,
+            Supplier.name.label("supplier_name"),
+            PurchaseOrder.user_id,
+            PurchaseOrderItem.item_id,
+            Item.sku,
+            Item.item_name,
+            Item.variant,
+            PurchaseOrderItem.qty,
+            PurchaseOrderItem.supplier_item_id,
+        )
+        .select_from(PurchaseOrder)
+        .outerjoin(Supplier, Supplier.id == PurchaseOrder.supplier_id)
+        .outerjoin(PurchaseOrderItem, PurchaseOrderItem.purchase_order_id == PurchaseOrder.id)
+        .outerjoin(Item, Item.id == PurchaseOrderItem.item_id)
+    )
+    search, _ = build_search(PurchaseOrder, q, search_columns, {"id", "status", "supplier_id", "user_id"})
+    if search is not None:
+        query = query.filter(search)
+
+    rows = iter_query_rows(query.order_by(PurchaseOrder.id, PurchaseOrderItem.item_id))
+    if nested:
+        return nest_lines(rows, key="id", line_fields=PO_EXPORT_LINE_COLUMNS)
+    return rows
+
 # Note: ask front end if there's a need to add supplier_name for the search column
 def get_purchase_order_details(db: Session, po_id: int) -> Optional[PurchaseOrderDetails]:
     """
@@ -171,71 +239,159 @@ def get_purchase_order_details(db: Session, po_id: int) -> Optional[PurchaseOrde
         "po_items": lines,
     }
 
+# Cart -> purchase order(s) in one statement: the cart is read and cleared by
+# the DELETE (its rows stay locked, so a double submit finds an empty cart),
+# every header is one INSERT and every line one multi-row INSERT ... RETURNING.
+# `pick` resolves each cart line to (supplier_id, supplier_item_id); lines
+# left without a supplier come back with a NULL po id.
+_CART_CTE = """
+WITH cart AS (
+    DELETE FROM cart_item WHERE user_id = :user_id
+    RETURNING item_id, quantity
+),
+"""
+
+_PICK_ONE_SUPPLIER = """
+pick AS (
+    SELECT c.item_id, c.quantity, CAST(:supplier_id AS integer) AS supplier_id,
+           si.id AS supplier_item_id
+    FROM cart c
+    LEFT JOIN supplier_item si ON si.supplier_id = :supplier_id AND si.item_id = c.item_id
+),
+"""
+
+# Each line goes to the supplier chosen for it by assign_supplier_cover (the
+# same greedy cover the /supplier/cover-plan suggestion uses), passed in as
+# parallel :item_ids / :supplier_ids arrays.
+_PICK_BY_SUPPLIER = """
+assigned AS (
+    SELECT * FROM unnest(CAST(:item_ids AS integer[]), CAST(:supplier_ids AS integer[])) AS a(item_id, supplier_id)
+),
+pick AS (
+    SELECT c.item_id, c.quantity, a.supplier_id, si.id AS supplier_item_id
+    FROM cart c
+    LEFT JOIN assigned a ON a.item_id = c.item_id
+    LEFT JOIN supplier_item si ON si.supplier_id = a.supplier_id AND si.item_id = c.item_id
+),
+"""
+
+_CREATE_FROM_PICK = """
+po AS (
+    INSERT INTO purchase_order (supplier_id, user_id, order_date, status)
+    SELECT supplier_id, :user_id, :order_date, :status
+    FROM (SELECT DISTINCT supplier_id FROM pick WHERE supplier_id IS NOT NULL) s
+    ORDER BY supplier_id
+    RETURNING id, supplier_id, user_id, order_date, status
+),
+lines AS (
+    INSERT INTO purchase_order_item (purchase_order_id, item_id, qty, supplier_item_id)
+    SELECT po.id, p.item_id, p.quantity, p.supplier_item_id
+    FROM pick p
+    JOIN po ON po.supplier_id = p.supplier_id
+    RETURNING purchase_order_id, item_id, qty, supplier_item_id
+)
+SELECT po.id, po.supplier_id, po.user_id, po.order_date, po.status,
+       s.name AS supplier_name, s.email AS supplier_email,
+       s.contact_number AS supplier_phone, s.description AS supplier_description,
+       p.item_id, i.sku, i.item_name, i.variant, l.qty AS ordered_qty, l.supplier_item_id
+FROM pick p
+JOIN item i ON i.id = p.item_id
+LEFT JOIN po ON po.supplier_id = p.supplier_id
+LEFT JOIN lines l ON l.purchase_order_id = po.id AND l.item_id = p.item_id
+LEFT JOIN supplier s ON s.id = po.supplier_id
+ORDER BY po.id, p.item_id
+"""
+
+
+def _create_purchase_orders_from_cart(
+    db: Session, user_id: int, pick_sql: str, params: Dict[str, Any]
+) -> List[Dict[str, Any]]:
+    """Run the cart -> PO statement in one transaction; return PurchaseOrderDetails dicts."""
+    try:
+        rows = db.execute(text(_CART_CTE + pick_sql + _CREATE_FROM_PICK), {"user_id": user_id, **params}).all()
+        if not rows:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cannot create a purchase order from an empty cart.",
+            )
+        uncovered = [r.item_id for r in rows if r.id is None]
+        if uncovered:  # the rollback drops the POs and restores the cart
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"No supplier carries item(s): {', '.join(map(str, uncovered))}",
+            )
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    invalidate_totals(PurchaseOrder.__tablename__, PurchaseOrderItem.__tablename__, CartItem.__tablename__)
+
+    orders: Dict[int, Dict[str, Any]] = {}
+    for r in rows:
+        po = orders.get(r.id)
+        if po is None:
+            po = orders[r.id] = {
+                "id": r.id,
+                "supplier_id": r.supplier_id,
+                "user_id": r.user_id,
+                "order_date": r.order_date,
+                "status": r.status,
+                "supplier_name": r.supplier_name,
+                "supplier_email": r.supplier_email,
+                "supplier_phone": r.supplier_phone,
+                "supplier_description": r.supplier_description,
+                "po_items": [],
+            }
+        po["po_items"].append({
+            "item_id": r.item_id,
+            "sku": r.sku,
+            "item_name": r.item_name,
+            "variant": r.variant,
+            "ordered_qty": r.ordered_qty,
+            "supplier_item_id": r.supplier_item_id,
+        })
+    return list(orders.values())
+
+
 def create_purchase_order_from_cart_service(
     db: Session, payload: PurchaseOrderCreateFromCart, user_id: int
 ):
     """
     Creates a PO and PO Items from a user's cart, then clears the cart.
-    This entire process is a single database transaction.
+    This entire process is a single database statement and transaction.
     """
-    with db.begin():  # This ensures the whole block is one atomic transaction
-        # 1. Fetch all items from the user's cart
-        cart_items = db.query(CartItem).filter(CartItem.user_id == user_id).all()
-
-        if not cart_items:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Cannot create a purchase order from an empty cart.",
-            )
-
-        item_ids = [item.item_id for item in cart_items]
-        print("item ids",item_ids)
-        print("supplier_id", payload.supplier_id)
-        
-        # 1b. Fetch all relevant SupplierItem records in one efficient query
-        supplier_item_mappings = db.query(SupplierItem).filter(
-            SupplierItem.supplier_id == payload.supplier_id,
-            SupplierItem.item_id.in_(item_ids)
-        ).all()
-        print("supplier item mappings",supplier_item_mappings)
-
-        # 1c. Create a lookup map for fast access: {item_id: supplier_item_id}
-        supplier_item_map = {sim.item_id: sim.id for sim in supplier_item_mappings}
-        print("supplier item map",supplier_item_map)
-        # --------------------------------------------------------------------
-
-        # 2. Create the PurchaseOrder header
-        status_value = (payload.status.value if payload.status else PurchaseOrderStatus.PENDING.value)
-        po = PurchaseOrder(
-            supplier_id=payload.supplier_id,
-            user_id=user_id,
-            order_date=payload.order_date,
-            status=status_value,
-        )
-        db.add(po)
-        
-        # 3. Flush the session to get the po.id
-        db.flush()
-
-        # 4. Create PurchaseOrderItems from the cart items
-        for cart_line in cart_items:
-            # Look up the supplier_item_id from our map.
-            # .get() safely returns None if the mapping doesn't exist.
-            supplier_item_id = supplier_item_map.get(cart_line.item_id)
-            
-            po_item = PurchaseOrderItem(
-                purchase_order_id=po.id,
-                item_id=cart_line.item_id,
-                qty=cart_line.quantity, # Note: Ensure your CartItem model has a 'qty' attribute
-                supplier_item_id=supplier_item_id # <-- ASSIGN THE MAPPED ID HERE
-            )
-            db.add(po_item)
+    params = {
+        "supplier_id": payload.supplier_id,
+        "order_date": payload.order_date,
+        "status": (payload.status or PurchaseOrderStatus.PENDING).value,
+    }
+    return _create_purchase_orders_from_cart(db, user_id, _PICK_ONE_SUPPLIER, params)[0]
 
-        # 5. Clear the user's cart
-        clear_user_cart(db, user_id)
 
-    db.refresh(po) 
-    return get_purchase_order_details(db, po.id)
+def create_purchase_orders_by_supplier_from_cart_service(
+    db: Session, payload: PurchaseOrderCreateFromCartBySupplier, user_id: int
+) -> List[Dict[str, Any]]:
+    """
+    Splits a user's cart into one PO per supplier (via SupplierItem), then
+    clears the cart. Fails with 400, changing nothing, if any cart item has
+    no supplier. The cart lines are locked and split with the same greedy
+    cover as plan_supplier_cover, then written by one statement: three
+    statements and one transaction, whatever the cart size.
+    """
+    cart_item_ids = [
+        item_id
+        for (item_id,) in db.query(CartItem.item_id).filter(CartItem.user_id == user_id).with_for_update().all()
+    ]
+    groups, _ = assign_supplier_cover(db, cart_item_ids)
+    assignment = [(item_id, supplier_id) for supplier_id, item_ids in groups for item_id in item_ids]
+    params = {
+        "item_ids": [item_id for item_id, _ in assignment],
+        "supplier_ids": [supplier_id for _, supplier_id in assignment],
+        "order_date": payload.order_date,
+        "status": (payload.status or PurchaseOrderStatus.PENDING).value,
+    }
+    return _create_purchase_orders_from_cart(db, user_id, _PICK_BY_SUPPLIER, params)
 
 
 def update_purchase_order(db: Session, po_id: int, payload: PurchaseOrderUpdate) -> Optional[PurchaseOrder]:
@@ -264,6 +420,32 @@ def delete_purchase_order(db: Session, po_id: int) -> Optional[PurchaseOrder]:
     return po
 
 
+# Confirmed is terminal: stock has been added for it
+PO_ALLOWED_TRANSITIONS = {
+    PurchaseOrderStatus.PENDING: {PurchaseOrderStatus.REJECTED, PurchaseOrderStatus.CONFIRMED},
+    PurchaseOrderStatus.REJECTED: {PurchaseOrderStatus.CONFIRMED},
+}
+
+
+def _parse_po_status(value: Optional[str]) -> PurchaseOrderStatus:
+    try:
+        return PurchaseOrderStatus(value) if value else PurchaseOrderStatus.PENDING
+    except ValueError:
+        return PurchaseOrderStatus.PENDING
+
+
+def _transition_error(current: PurchaseOrderStatus, target: PurchaseOrderStatus) -> Optional[str]:
+    """Why `current -> target` is not allowed, or None (same status is a no-op)."""
+    if current == target:
+        return None
+    if current == PurchaseOrderStatus.CONFIRMED:
+        # Do not allow moving away from Confirmed to avoid stock inconsistencies
+        return "Cannot change status from Confirmed"
+    if target not in PO_ALLOWED_TRANSITIONS.get(current, set()):
+        return f"Invalid transition from {current.value}"
+    return None
+
+
 def update_purchase_order_status(db: Session, po_id: int, new_status: str | PurchaseOrderStatus) -> Optional[dict]:
     """
     Update the status of a purchase order. If transitioning to 'Confirmed'
@@ -280,60 +462,118 @@ def update_purchase_order_status(db: Session, po_id: int, new_status: str | Purc
     except ValueError:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid status value")
 
+    # Lock the PO row: a concurrent transition of the same PO waits and then
+    # sees the committed status, so stock is never added twice
     po = (
         db.query(PurchaseOrder)
-          .options(selectinload(PurchaseOrder.po_items))
+          .options(lazyload("*"))
           .filter(PurchaseOrder.id == po_id)
+          .with_for_update(of=PurchaseOrder)
           .first()
     )
     if not po:
         return None
 
-    try:
-        current_status = PurchaseOrderStatus(po.status) if po.status else PurchaseOrderStatus.PENDING
-    except ValueError:
-        current_status = PurchaseOrderStatus.PENDING
-
-    if current_status == PurchaseOrderStatus.CONFIRMED:
-        # Do not allow moving away from Confirmed to avoid stock inconsistencies
-        if target_status != PurchaseOrderStatus.CONFIRMED:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cannot change status from Confirmed")
-        # If already confirmed and setting confirmed again, noop
-        return get_purchase_order_details(db, po_id)
-
-    allowed_transitions = {
-        PurchaseOrderStatus.PENDING: {PurchaseOrderStatus.REJECTED, PurchaseOrderStatus.CONFIRMED},
-        PurchaseOrderStatus.REJECTED: {PurchaseOrderStatus.CONFIRMED},
-    }
+    current_status = _parse_po_status(po.status)
+    error = _transition_error(current_status, target_status)
+    if error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=error)
     if target_status == current_status:
         return get_purchase_order_details(db, po_id)
-    if target_status not in allowed_transitions.get(current_status, set()):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Invalid transition from {current_status.value}",
-        )
 
     # Apply status update, and if moving to Confirmed, adjust stocks, then commit
+    stock_changed = False
     if target_status == PurchaseOrderStatus.CONFIRMED and current_status != PurchaseOrderStatus.CONFIRMED:
-        # For each PO item, increase Item.qty by the ordered qty
-        line_items: list[PurchaseOrderItem] = (
-            db.query(PurchaseOrderItem).filter(PurchaseOrderItem.purchase_order_id == po.id).all()
+        # Increase Item.qty by each line's ordered qty (one UPDATE, ledgered)
+        lines = (
+            db.query(PurchaseOrderItem.item_id, PurchaseOrderItem.qty)
+              .filter(PurchaseOrderItem.purchase_order_id == po.id)
+              .all()
         )
-        if line_items:
-            # Fetch items in one go
-            item_ids = [li.item_id for li in line_items]
-            items_by_id = {
-                it.id: it for it in db.query(Item).filter(Item.id.in_(item_ids)).all()
-            }
-            for li in line_items:
-                item = items_by_id.get(li.item_id)
-                if item:
-                    item.qty = (item.qty or 0) + (li.qty or 0)
+        stock_changed = apply_stock_movements(
+            db, [(item_id, qty or 0, po.id) for item_id, qty in lines], reason="po_confirmed"
+        ) > 0
     po.status = target_status.value
     db.add(po)
     db.commit()
+    if stock_changed:
+        bump_version("item")  # Item.qty is part of the catalog payloads
     db.refresh(po)
     return get_purchase_order_details(db, po_id)
 
 
+def update_purchase_order_statuses(
+    db: Session, po_ids: Iterable[int], new_status: str | PurchaseOrderStatus
+) -> List[Dict[str, Any]]:
+    """
+    Move many purchase orders to `new_status` in one transaction.
+
+    Each PO is checked against the same transitions as
+    `update_purchase_order_status`; POs that are missing or may not move are
+    reported with an `error` and left untouched, the rest are applied
+    together: all stock increments of newly confirmed POs in one ledgered
+    UPDATE, all status changes in one UPDATE. PO rows are locked in id order.
+
+    Returns one compact result per distinct id, in id order.
+    """
+    try:
+        target_status = PurchaseOrderStatus(new_status)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid status value")
+
+    ids = sorted(set(po_ids))
+    current = dict(
+        db.query(PurchaseOrder.id, PurchaseOrder.status)
+          .filter(PurchaseOrder.id.in_(ids))
+          .order_by(PurchaseOrder.id)
+          .with_for_update()
+          .all()
+    )
 
+    results: List[Dict[str, Any]] = []
+    to_update: List[int] = []
+    for po_id in ids:
+        if po_id not in current:
+            results.append({"id": po_id, "error": "Purchase order not found"})
+            continue
+        current_status = _parse_po_status(current[po_id])
+        result = {"id": po_id, "previous_status": current[po_id], "status": current[po_id]}
+        error = _transition_error(current_status, target_status)
+        if error:
+            result["error"] = error
+        elif current_status != target_status:
+            result.update(status=target_status.value, updated=True)
+            to_update.append(po_id)
+        results.append(result)
+
+    confirmed_ids = set(to_update) if target_status == PurchaseOrderStatus.CONFIRMED else set()
+    stock_changed = False
+    try:
+        if confirmed_ids:
+            lines = (
+                db.query(PurchaseOrderItem.purchase_order_id, PurchaseOrderItem.item_id, PurchaseOrderItem.qty)
+                  .filter(PurchaseOrderItem.purchase_order_id.in_(confirmed_ids))
+                  .all()
+            )
+            stock_changed = apply_stock_movements(
+                db, [(item_id, qty or 0, po_id) for po_id, item_id, qty in lines], reason="po_confirmed"
+            ) > 0
+            stocked = {po_id for po_id, _, qty in lines if qty}
+            for result in results:
+                result["stock_incremented"] = result["id"] in stocked
+        if to_update:
+            (
+                db.query(PurchaseOrder)
+                  .filter(PurchaseOrder.id.in_(to_update))
+                  .update({PurchaseOrder.status: target_status.value}, synchronize_session=False)
+            )
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    if to_update:
+        invalidate_totals(PurchaseOrder.__tablename__)  # bulk UPDATE skips the flush hook
+    if stock_changed:
+        bump_version("item")
+    return results
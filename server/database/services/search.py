@@ -0,0 +1,71 @@
+from __future__ import annotations
+from typing import Any, Iterable, List, Optional, Tuple, Union
+
+from sqlalchemy import Integer, String, func, or_
+
+"""Free-text search shared across list endpoints.
+
+Searchable text columns carry `pg_trgm` GIN indexes (`gin_trgm_ops`, see the
+models' `__table_args__` and `init-scripts/3_search_indexes.sql`). Those
+indexes serve `ILIKE '%q%'` substring matches, so a search is an index scan
+instead of a sequential scan, and `similarity()` gives a relevance score to
+rank the matches by.
+"""
+
+
+def normalize_search_columns(search_columns: Optional[Union[str, Iterable[str]]]) -> List[str]:
+    """Accept comma-separated or repeated `search_columns` params."""
+    if not search_columns:
+        return []
+    if isinstance(search_columns, str):
+        search_columns = [search_columns]
+    return [c.strip() for part in search_columns if part for c in part.split(",") if c.strip()]
+
+
+def build_search(
+    model: Any,
+    q: Optional[str],
+    search_columns: Optional[Union[str, Iterable[str]]],
+    searchable: Iterable[str],
+) -> Tuple[Optional[Any], Optional[Any]]:
+    """Build the search filter and relevance expression for `model`.
+
+    Text columns match on substring (`ILIKE`) and are ranked by trigram
+    similarity; integer columns match exactly when `q` is numeric.
+    Only columns listed in `searchable` are honored.
+
+    Args:
+      model: SQLAlchemy model class.
+      q: Raw search text.
+      search_columns: Requested columns (OR semantics).
+      searchable: Whitelist of column names for this model.
+
+    Returns:
+      `(clause, relevance)`. `clause` is None when nothing is searched;
+      `relevance` (best `similarity()` across the text columns) is None when
+      no text column is searched.
+    """
+    term = (q or "").strip()
+    if not term:
+        return None, None
+
+    filters: List[Any] = []
+    scores: List[Any] = []
+    for col in normalize_search_columns(search_columns):
+        if col not in searchable or not hasattr(model, col):
+            continue
+        column = getattr(model, col)
+        if not hasattr(column, "type"):
+            continue
+        if isinstance(column.type, String):
+            filters.append(column.ilike(f"%{term}%"))
+            scores.append(func.similarity(column, term))
+        elif isinstance(column.type, Integer) and term.isdigit():
+            filters.append(column == int(term))
+
+    if not filters:
+        return None, None
+    relevance = None
+    if scores:
+        relevance = scores[0] if len(scores) == 1 else func.greatest(*scores)
+    return or_(*filters), relevance
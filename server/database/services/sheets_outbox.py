@@ -0,0 +1,274 @@
+from __future__ import annotations
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+import threading
+
+from sqlalchemy import event, func, select, tuple_
+from sqlalchemy.orm import Session
+
+from config import settings
+from database.models.item import Item
+from database.models.sheets_outbox import SheetsOutbox
+from database.models.supplier import Supplier
+
+try:
+    from app.utils.google_sheets import get_google_sheets_client
+    GOOGLE_SHEETS_AVAILABLE = True
+except ImportError:
+    GOOGLE_SHEETS_AVAILABLE = False
+    logging.warning("Google Sheets integration not available")
+
+"""Transactional outbox for the Google Sheets mirror.
+
+Item / supplier writes call `enqueue_sheets_sync` before committing, so the
+sync event commits (or rolls back) with the change itself and requests never
+wait on the Sheets API. A daemon thread drains the outbox in batches:
+
+- all pending events of an entity are collapsed into one call (create then
+  update = one create with the current row, create then delete = nothing);
+- create / update rows are read from the database at drain time, so the sheet
+  always receives the latest state;
+- failures are retried with exponential backoff, up to
+  SHEETS_OUTBOX_MAX_ATTEMPTS, after which the events stay in the table for
+  inspection;
+- an advisory lock keeps drains from several processes from reordering one
+  entity's events; the Sheets calls run outside any database transaction.
+"""
+
+# Singapore timezone (UTC+8)
+SGT = timezone(timedelta(hours=8))
+
+ENTITY_MODELS = {"item": Item, "supplier": Supplier}
+_DRAIN_LOCK_KEY = 0x5EE75  # pg advisory lock id for the drainer
+
+logger = logging.getLogger(__name__)
+
+
+def sheets_sync_enabled() -> bool:
+    return GOOGLE_SHEETS_AVAILABLE and bool(settings.GOOGLE_SHEETS_ENABLED)
+
+
+def enqueue_sheets_sync(db: Session, entity: str, entity_id: int, op: str) -> None:
+    """Stage a sync event in the caller's transaction (no-op when Sheets sync is off)."""
+    if not sheets_sync_enabled():
+        return
+    db.add(SheetsOutbox(entity=entity, entity_id=entity_id, op=op))
+    db.info["sheets_outbox_pending"] = True
+
+
+def item_sheet_row(item: Item) -> Dict[str, Any]:
+    """Shape an Item for GoogleSheetsClient.sync_item_*."""
+    now = datetime.now(SGT)
+    return {
+        'id': item.id,
+        'sku': item.sku,
+        'type': item.type,
+        'item_name': item.item_name,
+        'variant': item.variant or '',
+        'qty': item.qty,
+        'threshold_qty': item.threshold_qty,
+        'created_at': getattr(item, 'created_at', now),
+        'updated_at': getattr(item, 'updated_at', now),
+    }
+
+
+def supplier_sheet_row(supplier: Supplier) -> Dict[str, Any]:
+    """Shape a Supplier for GoogleSheetsClient.sync_supplier_*."""
+    now = datetime.now(SGT)
+    return {
+        'id': supplier.id,
+        'name': supplier.name,
+        'description': supplier.description or '',
+        'email': supplier.email,
+        'contact_number': supplier.contact_number or '',
+        'created_at': getattr(supplier, 'created_at', now),
+        'updated_at': getattr(supplier, 'updated_at', now),
+    }
+
+
+def hold_sheets_drain_lock(db: Session) -> None:
+    """
+    Wait for a running drain to finish, then keep drains out until `db`'s
+    transaction ends (for whole-sheet rewrites such as the bulk sync).
+    """
+    db.query(func.pg_advisory_xact_lock(_DRAIN_LOCK_KEY)).scalar()
+
+
+def _collapse(ops: List[str]) -> Optional[str]:
+    """Net effect of one entity's pending ops (oldest first) on the sheet."""
+    created = "create" in ops
+    if ops[-1] == "delete":
+        return None if created else "delete"  # created and deleted before any sync
+    return "create" if created else "update"
+
+
+def _sync(client: Any, entity: str, op: str, entity_id: int, data: Optional[Dict[str, Any]]) -> bool:
+    if entity == "item":
+        if op == "delete":
+            return client.sync_item_delete(entity_id)
+        return client.sync_item_create(data) if op == "create" else client.sync_item_update(data)
+    if op == "delete":
+        return client.sync_supplier_delete(entity_id)
+    return client.sync_supplier_create(data) if op == "create" else client.sync_supplier_update(data)
+
+
+def _claim_batch(db: Session, batch_size: int, max_attempts: int) -> List[Tuple[str, int, List[int], Optional[str], Optional[Dict[str, Any]]]]:
+    """
+    Read one batch as `(entity, entity_id, event_ids, op, row)` per entity,
+    `op` being the collapsed op (None: nothing to send) and `row` the sheet
+    row for create / update (None when the entity is gone).
+    """
+    due = (
+        db.query(SheetsOutbox.entity, SheetsOutbox.entity_id)
+          .filter(SheetsOutbox.available_at <= func.now(), SheetsOutbox.attempts < max_attempts)
+          .order_by(SheetsOutbox.id)
+          .limit(batch_size)
+          .all()
+    )
+    if not due:
+        return []
+
+    # every live event of those entities, including ones backing off, so a
+    # retried older event can never overtake a newer one; given-up events
+    # are left alone
+    groups: Dict[Tuple[str, int], List[SheetsOutbox]] = {}
+    for entity, entity_id in due:
+        groups.setdefault((entity, entity_id), [])
+    entity_ids: Dict[str, List[int]] = {}
+    for entity, entity_id in groups:
+        entity_ids.setdefault(entity, []).append(entity_id)
+    events = (
+        db.query(SheetsOutbox)
+          .filter(tuple_(SheetsOutbox.entity, SheetsOutbox.entity_id).in_(list(groups)),
+                  SheetsOutbox.attempts < max_attempts)
+          .order_by(SheetsOutbox.id)
+          .all()
+    )
+    for ev in events:
+        groups[(ev.entity, ev.entity_id)].append(ev)
+
+    shape = {"item": item_sheet_row, "supplier": supplier_sheet_row}
+    rows = {
+        entity: {
+            obj.id: shape[entity](obj)
+            for obj in db.query(ENTITY_MODELS[entity]).filter(ENTITY_MODELS[entity].id.in_(ids)).all()
+        }
+        for entity, ids in entity_ids.items()
+    }
+    return [
+        (entity, entity_id, [ev.id for ev in group], _collapse([ev.op for ev in group]), rows[entity].get(entity_id))
+        for (entity, entity_id), group in groups.items()
+    ]
+
+
+def drain_sheets_outbox(db: Session, client: Any, batch_size: Optional[int] = None) -> int:
+    """
+    Sync one batch of due events to Google Sheets; returns the number of
+    events handled (0 when idle or another process is draining).
+
+    The drain lock is a session-level advisory lock on a connection of its
+    own, so the batch is read and its outcome written in two short
+    transactions while the Sheets calls run outside of any.
+    """
+    batch_size = batch_size or settings.SHEETS_OUTBOX_BATCH_SIZE
+    max_attempts = settings.SHEETS_OUTBOX_MAX_ATTEMPTS
+    with db.get_bind().connect() as lock_conn:
+        locked = lock_conn.execute(select(func.pg_try_advisory_lock(_DRAIN_LOCK_KEY))).scalar()
+        lock_conn.commit()
+        if not locked:
+            return 0
+        try:
+            try:
+                batch = _claim_batch(db, batch_size, max_attempts)
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+
+            done: List[int] = []
+            failed: Dict[int, str] = {}
+            for entity, entity_id, event_ids, op, row in batch:
+                error = None
+                if op is not None and (op == "delete" or row is not None):  # gone: its delete event follows
+                    try:
+                        if not _sync(client, entity, op, entity_id, row):
+                            error = f"sync_{entity}_{op} returned False"
+                    except Exception as e:
+                        error = str(e) or type(e).__name__
+                if error is None:
+                    done += event_ids
+                    continue
+                logger.warning(f"Google Sheets sync of {entity} {entity_id} failed: {error}")
+                failed.update((event_id, error) for event_id in event_ids)
+
+            try:
+                if done:
+                    db.query(SheetsOutbox).filter(SheetsOutbox.id.in_(done)).delete(synchronize_session=False)
+                if failed:
+                    now = datetime.now(timezone.utc)
+                    for ev in db.query(SheetsOutbox).filter(SheetsOutbox.id.in_(list(failed))).all():
+                        ev.attempts += 1
+                        ev.last_error = failed[ev.id]
+                        ev.available_at = now + timedelta(seconds=min(2 ** ev.attempts, 300))
+                        if ev.attempts >= max_attempts:
+                            logger.error(f"Giving up on Google Sheets sync event {ev.id} ({ev.op} {ev.entity} {ev.entity_id})")
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+            return len(done)
+        finally:
+            lock_conn.execute(select(func.pg_advisory_unlock(_DRAIN_LOCK_KEY)))
+            lock_conn.commit()
+
+
+_wake = threading.Event()
+_worker: Optional[threading.Thread] = None
+
+
+def _run_worker() -> None:
+    from database.database import SessionLocal
+
+    client = get_google_sheets_client(
+        settings.GOOGLE_SHEETS_CREDENTIALS_PATH,
+        settings.GOOGLE_SHEETS_SPREADSHEET_ID
+    )
+    try:
+        client.warm_up()  # one worksheet lookup + header check per process
+    except Exception as e:
+        logger.error(f"Google Sheets warm-up failed, worksheets resolve on first sync: {e}")
+    while True:
+        _wake.clear()
+        db = SessionLocal()
+        try:
+            while drain_sheets_outbox(db, client) >= settings.SHEETS_OUTBOX_BATCH_SIZE:
+                pass
+        except Exception as e:
+            logger.error(f"Google Sheets outbox drain failed: {e}", exc_info=True)
+        finally:
+            db.close()
+        _wake.wait(settings.SHEETS_OUTBOX_POLL_SECONDS)
+
+
+def start_sheets_outbox_worker() -> Optional[threading.Thread]:
+    """Start the drain thread once per process (if Sheets sync is on)."""
+    global _worker
+    if not sheets_sync_enabled() or _worker is not None:
+        return _worker
+    _worker = threading.Thread(target=_run_worker, name="sheets-outbox", daemon=True)
+    _worker.start()
+    logger.info("Google Sheets outbox worker started")
+    return _worker
+
+
+# Wake the worker as soon as a transaction carrying sync events commits.
+@event.listens_for(Session, "after_commit")
+def _wake_after_commit(session: Session) -> None:
+    if session.info.pop("sheets_outbox_pending", False):
+        _wake.set()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_pending(session: Session) -> None:
+    session.info.pop("sheets_outbox_pending", None)
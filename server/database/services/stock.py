@@ -0,0 +1,70 @@
+from __future__ import annotations
+from typing import Iterable, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from database.services.buildable_cache import mark_stock_changed
+
+"""Set-based stock movements.
+
+Stock levels (`item.qty`) change with one `UPDATE ... FROM` per batch of
+movements instead of read-modify-write loops over ORM objects, and each
+movement is appended to `stock_ledger` in the same statement. The caller owns
+the transaction: commit, then `bump_version("item")`.
+"""
+
+# (item_id, qty_delta, purchase_order_id or None)
+StockMovement = Tuple[int, int, Optional[int]]
+
+_LOCK_ITEMS = text("SELECT id FROM item WHERE id = ANY(:item_ids) ORDER BY id FOR UPDATE")
+
+_APPLY_MOVEMENTS = text("""
+    WITH moves AS (
+        SELECT *
+        FROM unnest(CAST(:item_ids AS int[]), CAST(:qty_deltas AS int[]), CAST(:po_ids AS int[]))
+             AS m(item_id, qty_delta, purchase_order_id)
+    ),
+    updated AS (
+        UPDATE item i
+        SET qty = i.qty + d.qty_delta
+        FROM (SELECT item_id, SUM(qty_delta) AS qty_delta FROM moves GROUP BY item_id) d
+        WHERE i.id = d.item_id
+        RETURNING i.id, i.qty
+    )
+    INSERT INTO stock_ledger (item_id, qty_delta, qty_after, reason, purchase_order_id)
+    SELECT m.item_id, m.qty_delta,
+           -- several movements of one item: replay them in purchase_order_id order
+           u.qty - COALESCE(SUM(m.qty_delta) OVER (
+               PARTITION BY m.item_id ORDER BY m.purchase_order_id
+               ROWS BETWEEN 1 FOLLOWING AND UNBOUNDED FOLLOWING
+           ), 0),
+           :reason, m.purchase_order_id
+    FROM moves m
+    JOIN updated u ON u.id = m.item_id
+    ORDER BY m.item_id, m.purchase_order_id
+""")
+
+
+def apply_stock_movements(db: Session, movements: Iterable[StockMovement], *, reason: str) -> int:
+    """
+    Add each movement's `qty_delta` to `item.qty` and record it in the ledger.
+
+    Item rows are locked in ascending id order first, so concurrent batches
+    touching overlapping items queue up instead of deadlocking or losing
+    updates. Movements of unknown items are ignored. Does not commit.
+
+    Returns:
+      The number of ledger rows written.
+    """
+    moves = [(int(item_id), int(delta), po_id) for item_id, delta, po_id in movements if delta]
+    if not moves:
+        return 0
+    item_ids, qty_deltas, po_ids = (list(col) for col in zip(*moves))
+
+    db.execute(_LOCK_ITEMS, {"item_ids": sorted(set(item_ids))})
+    mark_stock_changed(db)  # bypasses the ORM, so flag the buildable cache
+    return db.execute(
+        _APPLY_MOVEMENTS,
+        {"item_ids": item_ids, "qty_deltas": qty_deltas, "po_ids": po_ids, "reason": reason},
+    ).rowcount
@@ -1,23 +1,11 @@
 from sqlalchemy.orm import Session
 from database.models.supplier import Supplier
 from database.schemas.supplier import SupplierCreate, SupplierUpdate
-from typing import List
+from typing import Any, Dict, List, Tuple
 from sqlalchemy import func
 from database.models.supplier_item import SupplierItem
 import logging
-from config import settings
-from datetime import datetime, timezone, timedelta
-
-# Singapore timezone (UTC+8)
-SGT = timezone(timedelta(hours=8))
-
-# Import Google Sheets client
-try:
-    from app.utils.google_sheets import get_google_sheets_client
-    GOOGLE_SHEETS_AVAILABLE = True
-except ImportError:
-    GOOGLE_SHEETS_AVAILABLE = False
-    logging.warning("Google Sheets integration not available")
+from database.services.sheets_outbox import enqueue_sheets_sync
 
 logger = logging.getLogger(__name__)
 
@@ -33,45 +21,11 @@ def get_all_suppliers(db: Session):
 def create_supplier(db: Session, supplier: SupplierCreate):
     db_supplier = Supplier(**supplier.model_dump())
     db.add(db_supplier)
+    db.flush()
+    # Google Sheets sync is queued in this transaction, drained in the background
+    enqueue_sheets_sync(db, "supplier", db_supplier.id, "create")
     db.commit()
     db.refresh(db_supplier)
-    
-    # Sync to Google Sheets if enabled
-    print(f"[GOOGLE SHEETS] Checking sync settings...")
-    print(f"[GOOGLE SHEETS] Available: {GOOGLE_SHEETS_AVAILABLE}")
-    print(f"[GOOGLE SHEETS] Enabled: {settings.GOOGLE_SHEETS_ENABLED if hasattr(settings, 'GOOGLE_SHEETS_ENABLED') else 'NOT SET'}")
-    
-    if GOOGLE_SHEETS_AVAILABLE and settings.GOOGLE_SHEETS_ENABLED:
-        try:
-            print(f"[GOOGLE SHEETS] Attempting to sync new supplier: {db_supplier.name}")
-            sheets_client = get_google_sheets_client(
-                settings.GOOGLE_SHEETS_CREDENTIALS_PATH,
-                settings.GOOGLE_SHEETS_SPREADSHEET_ID
-            )
-            supplier_data = {
-                'id': db_supplier.id,
-                'name': db_supplier.name,
-                'description': db_supplier.description or '',
-                'email': db_supplier.email,
-                'contact_number': db_supplier.contact_number or '',
-                'created_at': getattr(db_supplier, 'created_at', datetime.now(SGT)),
-                'updated_at': getattr(db_supplier, 'updated_at', datetime.now(SGT))
-            }
-            success = sheets_client.sync_supplier_create(supplier_data)
-            if success:
-                print(f"[GOOGLE SHEETS] ✓ Successfully synced supplier '{db_supplier.name}' to Google Sheets")
-            else:
-                print(f"[GOOGLE SHEETS] ✗ Failed to sync supplier '{db_supplier.name}' to Google Sheets")
-        except Exception as e:
-            print(f"[GOOGLE SHEETS] ✗ ERROR syncing supplier create: {str(e)}")
-            logger.error(f"Failed to sync supplier create to Google Sheets: {e}", exc_info=True)
-            # Don't fail the request if Google Sheets sync fails
-    else:
-        if not GOOGLE_SHEETS_AVAILABLE:
-            print(f"[GOOGLE SHEETS] Skipping sync - Google Sheets integration not available")
-        elif not settings.GOOGLE_SHEETS_ENABLED:
-            print(f"[GOOGLE SHEETS] Skipping sync - Google Sheets integration disabled in settings")
-    
     return db_supplier
 
 def update_supplier(db: Session, supplier_id: int, supplier: SupplierUpdate):
@@ -80,65 +34,15 @@ def update_supplier(db: Session, supplier_id: int, supplier: SupplierUpdate):
         update_data = supplier.model_dump(exclude_unset=True)
         for key, value in update_data.items():
             setattr(db_supplier, key, value)
+        enqueue_sheets_sync(db, "supplier", db_supplier.id, "update")
         db.commit()
         db.refresh(db_supplier)
-        
-        # Sync to Google Sheets if enabled
-        print(f"[GOOGLE SHEETS] Attempting to update supplier in Google Sheets...")
-        if GOOGLE_SHEETS_AVAILABLE and settings.GOOGLE_SHEETS_ENABLED:
-            try:
-                print(f"[GOOGLE SHEETS] Syncing update for supplier: {db_supplier.name}")
-                sheets_client = get_google_sheets_client(
-                    settings.GOOGLE_SHEETS_CREDENTIALS_PATH,
-                    settings.GOOGLE_SHEETS_SPREADSHEET_ID
-                )
-                supplier_data = {
-                    'id': db_supplier.id,
-                    'name': db_supplier.name,
-                    'description': db_supplier.description or '',
-                    'email': db_supplier.email,
-                    'contact_number': db_supplier.contact_number or '',
-                    'created_at': getattr(db_supplier, 'created_at', datetime.now(SGT)),
-                    'updated_at': getattr(db_supplier, 'updated_at', datetime.now(SGT))
-                }
-                success = sheets_client.sync_supplier_update(supplier_data)
-                if success:
-                    print(f"[GOOGLE SHEETS] ✓ Successfully updated supplier '{db_supplier.name}' in Google Sheets")
-                else:
-                    print(f"[GOOGLE SHEETS] ✗ Failed to update supplier '{db_supplier.name}' in Google Sheets")
-            except Exception as e:
-                print(f"[GOOGLE SHEETS] ✗ ERROR syncing supplier update: {str(e)}")
-                logger.error(f"Failed to sync supplier update to Google Sheets: {e}", exc_info=True)
-                # Don't fail the request if Google Sheets sync fails
-        else:
-            print(f"[GOOGLE SHEETS] Skipping update sync - integration not enabled")
-    
     return db_supplier
 
 def delete_supplier(db: Session, supplier_id: int):
     db_supplier = db.query(Supplier).filter(Supplier.id == supplier_id).first()
     if db_supplier:
-        # Sync delete to Google Sheets before deleting from DB
-        print(f"[GOOGLE SHEETS] Attempting to delete supplier from Google Sheets...")
-        if GOOGLE_SHEETS_AVAILABLE and settings.GOOGLE_SHEETS_ENABLED:
-            try:
-                print(f"[GOOGLE SHEETS] Syncing delete for supplier ID: {supplier_id}")
-                sheets_client = get_google_sheets_client(
-                    settings.GOOGLE_SHEETS_CREDENTIALS_PATH,
-                    settings.GOOGLE_SHEETS_SPREADSHEET_ID
-                )
-                success = sheets_client.sync_supplier_delete(supplier_id)
-                if success:
-                    print(f"[GOOGLE SHEETS] ✓ Successfully deleted supplier ID {supplier_id} from Google Sheets")
-                else:
-                    print(f"[GOOGLE SHEETS] ✗ Failed to delete supplier ID {supplier_id} from Google Sheets")
-            except Exception as e:
-                print(f"[GOOGLE SHEETS] ✗ ERROR syncing supplier delete: {str(e)}")
-                logger.error(f"Failed to sync supplier delete to Google Sheets: {e}", exc_info=True)
-                # Don't fail the request if Google Sheets sync fails
-        else:
-            print(f"[GOOGLE SHEETS] Skipping delete sync - integration not enabled")
-        
+        enqueue_sheets_sync(db, "supplier", db_supplier.id, "delete")
         db.delete(db_supplier)
         db.commit()
     return db_supplier
@@ -172,3 +76,70 @@ def get_suppliers_by_items(db: Session, item_ids: List[int]) -> List[Supplier]:
           .filter(Supplier.id.in_(matching_supplier_ids))
           .all()
     )
+
+
+def assign_supplier_cover(db: Session, item_ids: List[int]) -> Tuple[List[Tuple[int, List[int]]], List[int]]:
+    """
+    Splits a list of items across as few suppliers as possible.
+
+    Coverage is loaded with one query as a bitset per supplier (bit i = the
+    i-th requested item), then a greedy set cover repeatedly takes the supplier
+    covering the most still-uncovered items (ties: lowest supplier id). Greedy
+    is within a ln(n) factor of the optimum and usually optimal for real carts.
+
+    Returns ([(supplier_id, item_ids), ...], uncovered_item_ids) with suppliers
+    in pick order; every covered item is assigned to exactly one supplier.
+    """
+    unique_item_ids = sorted(set(item_ids))
+    if not unique_item_ids:
+        return [], []
+    bit_of = {item_id: 1 << i for i, item_id in enumerate(unique_item_ids)}
+
+    masks: Dict[int, int] = {}
+    rows = (
+        db.query(SupplierItem.supplier_id, SupplierItem.item_id)
+          .filter(SupplierItem.item_id.in_(unique_item_ids))
+          .all()
+    )
+    for supplier_id, item_id in rows:
+        masks[supplier_id] = masks.get(supplier_id, 0) | bit_of[item_id]
+
+    uncovered = (1 << len(unique_item_ids)) - 1
+    picks: List[Tuple[int, int]] = []   # (supplier_id, mask of items assigned to it)
+    while uncovered and masks:
+        supplier_id, gain = max(
+            ((sid, mask & uncovered) for sid, mask in masks.items()),
+            key=lambda pair: (bin(pair[1]).count("1"), -pair[0]),
+        )
+        if not gain:
+            break
+        picks.append((supplier_id, gain))
+        uncovered &= ~gain
+        del masks[supplier_id]
+
+    def ids_in(mask: int) -> List[int]:
+        return [item_id for item_id in unique_item_ids if bit_of[item_id] & mask]
+
+    return [(sid, ids_in(mask)) for sid, mask in picks], ids_in(uncovered)
+
+
+def plan_supplier_cover(db: Session, item_ids: List[int]) -> Dict[str, Any]:
+    """
+    Suggests how to split a list of items across as few suppliers as possible
+    (see assign_supplier_cover; the by-supplier cart checkout uses the same
+    assignment, so the plan matches the POs it would create).
+
+    Returns {"groups": [{"supplier": Supplier, "item_ids": [...]}, ...],
+    "uncovered_item_ids": [...]} with groups in pick order; every covered item
+    appears in exactly one group.
+    """
+    groups, uncovered = assign_supplier_cover(db, item_ids)
+    suppliers = {
+        s.id: s
+        for s in db.query(Supplier).filter(Supplier.id.in_([sid for sid, _ in groups])).all()
+    } if groups else {}
+
+    return {
+        "groups": [{"supplier": suppliers[sid], "item_ids": ids} for sid, ids in groups],
+        "uncovered_item_ids": uncovered,
+    }
@@ -6,12 +6,16 @@ from database.models.supplier import Supplier
 from database.schemas.supplier_item import SupplierItemCreate, SupplierItemUpdate
 from fastapi import HTTPException
 
-from typing import Optional, Dict, Any, List, Iterable
+from typing import Optional, Dict, Any, List, Iterable, Union
 from sqlalchemy import func, or_, Integer, String
 
 from database.services.pagination import (
     clamp_page_size,
-    parse_sort,
+    parse_sort_keys,
+    sort_tokens_of,
+    fetch_page,
+    parse_total_mode,
+    count_total,
     build_meta,
 )
 
@@ -23,46 +27,46 @@ def get_supplier_items(
     page: int = 1,
     size: int = 50,
     *,
-    include_total: bool = False,
+    cursor: Optional[str] = None,
+    include_total: Union[bool, str, None] = False,
     max_page_size: int = 200,
 ) -> Dict[str, Any]:
     """
     Paginated list of SupplierItem rows.
 
-    - Fixed stable order: id ASC, item_id ASC
+    - Fixed stable order: id ASC
     - No free-text search / client-driven sort (kept intentionally simple)
     - Uses size+1 trick to compute has_next without COUNT(*)
-    - Optional COUNT when include_total=True
+    - Keyset pagination when `cursor` (a previous meta.next_cursor) is given
+    - Optional total when include_total is exact | estimate | cached
     """
     page, size = clamp_page_size(page, size, max_page_size=max_page_size)
 
     base = db.query(SupplierItem)
+    sort_keys = parse_sort_keys(None, {"id": SupplierItem.id}, ("id:asc",), tiebreaker="id")
 
-    # Optional exact totals
-    total = pages = None
-    if include_total:
-        total = db.query(func.count(SupplierItem.id)).select_from(base.subquery()).scalar() or 0
-        pages = max(1, (total + size - 1) // size)
-
-    # Page fetch (size+1 → has_next)
-    rows: List[SupplierItem] = (
-        base.order_by(SupplierItem.id.asc(), SupplierItem.item_id.asc())
-            .limit(size + 1)
-            .offset((page - 1) * size)
-            .all()
+    # Optional totals (exact | estimate | cached)
+    total, pages, total_kind = count_total(
+        db, base, mode=parse_total_mode(include_total), table=SupplierItem.__tablename__,
+        filters={}, size=size,
     )
-    has_next = len(rows) > size
-    data = rows[:size]
+
+    # Page fetch (size+1 → has_next; offset or keyset)
+    data, has_next, next_cursor = fetch_page(base, sort_keys, page=page, size=size, cursor=cursor)
 
     meta = build_meta(
         page=page,
         size=size,
-        has_prev=page > 1,
+        has_prev=page > 1 or bool(cursor),
         has_next=has_next,
         sort_tokens=None,     # none for this endpoint
         filters={},           # none for this endpoint
         total=total,
         pages=pages,
+        default_sort=sort_tokens_of(sort_keys),
+        cursor=cursor,
+        next_cursor=next_cursor,
+        total_kind=total_kind,
     )
     return {"meta": meta, "data": data}
 
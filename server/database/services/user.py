@@ -4,15 +4,19 @@ from database.models.user import User
 from sqlalchemy.orm import Session
 from passlib.hash import bcrypt
 from typing import Optional, List
-from sqlalchemy import Integer, String, or_, func
-from typing import Optional, Dict, Any, List, Iterable
+from sqlalchemy import func
+from typing import Optional, Dict, Any, List, Iterable, Union
 
-from database.services.pagination import build_meta
 from database.services.pagination import (
     clamp_page_size,
-    parse_sort,
+    parse_sort_keys,
+    sort_tokens_of,
+    fetch_page,
+    parse_total_mode,
+    count_total,
     build_meta,
 )
+from database.services.search import build_search
 
 def get_user(db: Session, user_id: int):
     return db.query(User).filter(User.id == user_id).first()
@@ -28,7 +32,8 @@ def get_all_users(
     q: Optional[str] = None, 
     search_columns: Optional[List[str]] = None, 
     sort: Optional[Iterable[str]] = None,  # e.g. ["name:asc","email:desc"]
-    include_total: bool = False,
+    cursor: Optional[str] = None,          # keyset mode; takes precedence over page
+    include_total: Union[bool, str, None] = False,
     max_page_size: int = 200,
 ) -> Dict[str, Any]:
     """
@@ -40,20 +45,9 @@ def get_all_users(
 
     # Search filter
     SEARCHABLE_COLUMNS = {"id", "name", "email", "role"}
-
-    if q and search_columns:
-        like = f"%{q.strip()}%"
-        filters = []
-        for col in search_columns:
-            if col in SEARCHABLE_COLUMNS and hasattr(User, col):
-                column = getattr(User, col)
-                if hasattr(column, "type"):
-                    if isinstance(column.type, String):
-                        filters.append(column.ilike(like))
-                    elif isinstance(column.type, Integer) and q.isdigit():
-                        filters.append(column == int(q))
-        if filters:
-            base = base.filter(or_(*filters))
+    search, relevance = build_search(User, q, search_columns, SEARCHABLE_COLUMNS)
+    if search is not None:
+        base = base.filter(search)
 
     # Sort (whitelisted)
     allowed = {
@@ -64,23 +58,22 @@ def get_all_users(
     }
     # Remove None values from allowed
     allowed = {k: v for k, v in allowed.items() if v is not None}
-    order_by = parse_sort(sort, allowed, [User.name.asc(), User.id.asc()])
-
-    # Optional exact totals
-    total = pages = None
-    if include_total:
-        total = db.query(func.count()).select_from(base.subquery()).scalar() or 0
-        pages = max(1, (total + size - 1) // size)
-
-    # Fetch page (size+1 → has_next)
-    rows: List[User] = (
-        base.order_by(*order_by)
-            .limit(size + 1)
-            .offset((page - 1) * size)
-            .all()
+    default_sort = ("name:asc", "id:asc")
+    if relevance is not None:
+        allowed["relevance"] = relevance
+        default_sort = ("relevance:desc",) + default_sort
+    sort_keys = parse_sort_keys(sort, allowed, default_sort, tiebreaker="id")
+
+    filters = {"q": q, "search_columns": search_columns}
+
+    # Optional totals (exact | estimate | cached)
+    total, pages, total_kind = count_total(
+        db, base, mode=parse_total_mode(include_total), table=User.__tablename__,
+        filters=filters, size=size,
     )
-    has_next = len(rows) > size
-    users = rows[:size]
+
+    # Fetch page (size+1 → has_next; offset or keyset)
+    users, has_next, next_cursor = fetch_page(base, sort_keys, page=page, size=size, cursor=cursor)
 
     # Shape payload
     data: List[Dict[str, Any]] = []
@@ -95,12 +88,16 @@ def get_all_users(
     meta = build_meta(
         page=page,
         size=size,
-        has_prev=page > 1,
+        has_prev=page > 1 or bool(cursor),
         has_next=has_next,
         sort_tokens=sort,
-        filters={"q": q, "search_columns": search_columns},
+        filters=filters,
         total=total,
         pages=pages,
+        default_sort=sort_tokens_of(sort_keys),
+        cursor=cursor,
+        next_cursor=next_cursor,
+        total_kind=total_kind,
     )
     return {"meta": meta, "data": data}
 
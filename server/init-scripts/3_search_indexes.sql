@@ -0,0 +1,28 @@
+-- =======================
+-- FREE-TEXT SEARCH (pg_trgm)
+-- =======================
+-- Trigram GIN indexes serve ILIKE '%q%' substring search,
+-- so list-endpoint search no longer needs a sequential scan.
+-- Covers every text column in the services' SEARCHABLE_COLUMNS.
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- ITEMS
+CREATE INDEX IF NOT EXISTS ix_item_sku_trgm ON item USING gin (sku gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS ix_item_type_trgm ON item USING gin (type gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS ix_item_item_name_trgm ON item USING gin (item_name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS ix_item_variant_trgm ON item USING gin (variant gin_trgm_ops);
+
+-- CUSTOMER ORDERS
+CREATE INDEX IF NOT EXISTS ix_order_name_trgm ON "order" USING gin (name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS ix_order_contact_trgm ON "order" USING gin (contact gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS ix_order_status_trgm ON "order" USING gin (status gin_trgm_ops);
+
+-- USERS
+CREATE INDEX IF NOT EXISTS ix_user_name_trgm ON "user" USING gin (name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS ix_user_email_trgm ON "user" USING gin (email gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS ix_user_role_trgm ON "user" USING gin (role gin_trgm_ops);
+
+-- PURCHASE ORDERS
+CREATE INDEX IF NOT EXISTS ix_purchase_order_status_trgm ON purchase_order USING gin (status gin_trgm_ops);
+
+ANALYZE item, "order", "user", purchase_order;
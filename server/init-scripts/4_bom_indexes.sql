@@ -0,0 +1,8 @@
+-- =======================
+-- BOM (item_component) INDEXES
+-- =======================
+-- The (parent_id, child_id) primary key serves parent -> children lookups.
+-- Where-used walks go child -> parents, which needs its own index.
+CREATE INDEX IF NOT EXISTS ix_item_component_child_id ON item_component (child_id, parent_id);
+
+ANALYZE item_component;
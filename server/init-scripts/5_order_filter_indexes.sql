@@ -0,0 +1,12 @@
+-- =======================
+-- ORDER LIST FILTER INDEXES
+-- =======================
+-- Date-range and status filters on the order list, in the list's default
+-- (order_date, order_id) sort order, become index range scans.
+CREATE INDEX IF NOT EXISTS ix_order_order_date_order_id ON "order" (order_date, order_id);
+CREATE INDEX IF NOT EXISTS ix_order_status_order_date ON "order" (status, order_date);
+
+-- Delivery-date filter: EXISTS over order lines in a date range
+CREATE INDEX IF NOT EXISTS ix_order_item_delivery_date_order_id ON order_item (delivery_date, order_id);
+
+ANALYZE "order", order_item;
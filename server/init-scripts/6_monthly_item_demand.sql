@@ -0,0 +1,84 @@
+-- =======================
+-- MONTHLY DEMAND ROLLUP
+-- =======================
+-- Per-item monthly totals of order_item (month = first day of the
+-- delivery_date's month), kept current by statement-level triggers on
+-- order_item. Monthly quantity endpoints read this instead of grouping the
+-- whole order_item table. Must match database/models/monthly_item_demand.py.
+CREATE TABLE IF NOT EXISTS monthly_item_demand (
+    item_id INT NOT NULL,
+    month DATE NOT NULL,
+    qty BIGINT NOT NULL DEFAULT 0,
+    value DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    CONSTRAINT pk_monthly_item_demand PRIMARY KEY (item_id, month)
+);
+
+CREATE OR REPLACE FUNCTION monthly_item_demand_apply() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    -- only the firing event's transition tables exist, hence one branch each
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO monthly_item_demand AS m (item_id, month, qty, value)
+        SELECT item_id, date_trunc('month', delivery_date)::date AS month,
+               SUM(qty_requested), SUM(qty_requested * value)
+        FROM new_rows
+        GROUP BY 1, 2
+        ORDER BY 1, 2
+        ON CONFLICT (item_id, month) DO UPDATE
+            SET qty = m.qty + EXCLUDED.qty,
+                value = m.value + EXCLUDED.value;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO monthly_item_demand AS m (item_id, month, qty, value)
+        SELECT item_id, date_trunc('month', delivery_date)::date AS month,
+               -SUM(qty_requested), -SUM(qty_requested * value)
+        FROM old_rows
+        GROUP BY 1, 2
+        ORDER BY 1, 2
+        ON CONFLICT (item_id, month) DO UPDATE
+            SET qty = m.qty + EXCLUDED.qty,
+                value = m.value + EXCLUDED.value;
+    ELSE
+        INSERT INTO monthly_item_demand AS m (item_id, month, qty, value)
+        SELECT item_id, month, SUM(qty), SUM(value)
+        FROM (
+            SELECT item_id, date_trunc('month', delivery_date)::date AS month,
+                   qty_requested::bigint AS qty, qty_requested * value AS value
+            FROM new_rows
+            UNION ALL
+            SELECT item_id, date_trunc('month', delivery_date)::date,
+                   -qty_requested::bigint, -(qty_requested * value)
+            FROM old_rows
+        ) d
+        GROUP BY 1, 2
+        ORDER BY 1, 2
+        ON CONFLICT (item_id, month) DO UPDATE
+            SET qty = m.qty + EXCLUDED.qty,
+                value = m.value + EXCLUDED.value;
+    END IF;
+    RETURN NULL;
+END
+$$;
+
+-- Transition tables allow one event per trigger
+CREATE OR REPLACE TRIGGER order_item_demand_insert
+    AFTER INSERT ON order_item REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION monthly_item_demand_apply();
+CREATE OR REPLACE TRIGGER order_item_demand_update
+    AFTER UPDATE ON order_item REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION monthly_item_demand_apply();
+CREATE OR REPLACE TRIGGER order_item_demand_delete
+    AFTER DELETE ON order_item REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION monthly_item_demand_apply();
+
+-- Backfill (same as backfill_monthly_demand.py)
+BEGIN;
+LOCK TABLE order_item IN SHARE MODE;
+DELETE FROM monthly_item_demand;
+INSERT INTO monthly_item_demand (item_id, month, qty, value)
+SELECT item_id, date_trunc('month', delivery_date)::date,
+       SUM(qty_requested), SUM(qty_requested * value)
+FROM order_item
+GROUP BY 1, 2;
+COMMIT;
+
+ANALYZE monthly_item_demand;
@@ -0,0 +1,8 @@
+-- =======================
+-- BULK ORDER IMPORT
+-- =======================
+-- POST /order/import matches incoming orders to existing ones by
+-- shopify_order_id (one lookup per imported order).
+CREATE INDEX IF NOT EXISTS ix_order_shopify_order_id ON "order" (shopify_order_id);
+
+ANALYZE "order";
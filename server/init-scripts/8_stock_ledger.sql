@@ -0,0 +1,23 @@
+-- =======================
+-- STOCK LEDGER
+-- =======================
+-- Append-only record of every stock movement, written in the same statement
+-- as the item.qty change (see database/services/stock.py).
+-- item_id / purchase_order_id are plain audit columns, not foreign keys, so
+-- deleting an item or PO never deletes or rewrites its history.
+CREATE TABLE IF NOT EXISTS stock_ledger (
+    id BIGSERIAL PRIMARY KEY,
+    item_id INT NOT NULL,
+    qty_delta INT NOT NULL,
+    qty_after INT NOT NULL,
+    reason VARCHAR(32) NOT NULL,
+    purchase_order_id INT,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- databases created before the FKs were dropped
+ALTER TABLE stock_ledger DROP CONSTRAINT IF EXISTS stock_ledger_item_id_fkey;
+ALTER TABLE stock_ledger DROP CONSTRAINT IF EXISTS stock_ledger_purchase_order_id_fkey;
+
+-- per-item history
+CREATE INDEX IF NOT EXISTS ix_stock_ledger_item_id_id ON stock_ledger (item_id, id);
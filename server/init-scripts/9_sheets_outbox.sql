@@ -0,0 +1,20 @@
+-- =======================
+-- GOOGLE SHEETS OUTBOX
+-- =======================
+-- Sync events written in the same transaction as the item / supplier change
+-- and drained by the background worker (see database/services/sheets_outbox.py).
+CREATE TABLE IF NOT EXISTS sheets_outbox (
+    id BIGSERIAL PRIMARY KEY,
+    entity VARCHAR(16) NOT NULL,
+    entity_id INT NOT NULL,
+    op VARCHAR(8) NOT NULL,
+    attempts INT NOT NULL DEFAULT 0,
+    available_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    last_error TEXT,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- due events in order
+CREATE INDEX IF NOT EXISTS ix_sheets_outbox_available_at_id ON sheets_outbox (available_at, id);
+-- all pending events of one entity
+CREATE INDEX IF NOT EXISTS ix_sheets_outbox_entity_entity_id ON sheets_outbox (entity, entity_id);
@@ -12,11 +12,14 @@ if [ -z "$DATABASE_URL" ]; then
 fi
 
 psql "$DATABASE_URL" <<'EOSQL'
+DROP TABLE IF EXISTS sheets_outbox CASCADE;
 DROP TABLE IF EXISTS cart_item CASCADE;
 DROP TABLE IF EXISTS cart CASCADE;
 DROP TABLE IF EXISTS user_session CASCADE;
+DROP TABLE IF EXISTS monthly_item_demand CASCADE;
 DROP TABLE IF EXISTS order_item CASCADE;
 DROP TABLE IF EXISTS "order" CASCADE;
+DROP TABLE IF EXISTS stock_ledger CASCADE;
 DROP TABLE IF EXISTS purchase_order_item CASCADE;
 DROP TABLE IF EXISTS purchase_order CASCADE;
 DROP TABLE IF EXISTS item_component CASCADE;
@@ -20,5 +20,61 @@ if %errorlevel% neq 0 (
     exit /b 1
 )
 
+echo Creating search indexes from 3_search_indexes.sql...
+docker exec -i server-db-1 psql -U postgres -d levelsliving < 3_search_indexes.sql
+
+if %errorlevel% neq 0 (
+    echo Error: Failed to execute 3_search_indexes.sql
+    exit /b 1
+)
+
+echo Creating BOM indexes from 4_bom_indexes.sql...
+docker exec -i server-db-1 psql -U postgres -d levelsliving < 4_bom_indexes.sql
+
+if %errorlevel% neq 0 (
+    echo Error: Failed to execute 4_bom_indexes.sql
+    exit /b 1
+)
+
+echo Creating order filter indexes from 5_order_filter_indexes.sql...
+docker exec -i server-db-1 psql -U postgres -d levelsliving < 5_order_filter_indexes.sql
+
+if %errorlevel% neq 0 (
+    echo Error: Failed to execute 5_order_filter_indexes.sql
+    exit /b 1
+)
+
+echo Creating monthly demand rollup from 6_monthly_item_demand.sql...
+docker exec -i server-db-1 psql -U postgres -d levelsliving < 6_monthly_item_demand.sql
+
+if %errorlevel% neq 0 (
+    echo Error: Failed to execute 6_monthly_item_demand.sql
+    exit /b 1
+)
+
+echo Creating order import indexes from 7_order_import_indexes.sql...
+docker exec -i server-db-1 psql -U postgres -d levelsliving < 7_order_import_indexes.sql
+
+if %errorlevel% neq 0 (
+    echo Error: Failed to execute 7_order_import_indexes.sql
+    exit /b 1
+)
+
+echo Creating stock ledger from 8_stock_ledger.sql...
+docker exec -i server-db-1 psql -U postgres -d levelsliving < 8_stock_ledger.sql
+
+if %errorlevel% neq 0 (
+    echo Error: Failed to execute 8_stock_ledger.sql
+    exit /b 1
+)
+
+echo Creating Google Sheets outbox from 9_sheets_outbox.sql...
+docker exec -i server-db-1 psql -U postgres -d levelsliving < 9_sheets_outbox.sql
+
+if %errorlevel% neq 0 (
+    echo Error: Failed to execute 9_sheets_outbox.sql
+    exit /b 1
+)
+
 echo Migration up completed successfully!
 echo Database tables created and seeded with initial data.
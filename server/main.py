@@ -6,6 +6,7 @@ import os
 import logging
 from dotenv import load_dotenv
 from database.database import Base, engine
+from database.services.sheets_outbox import start_sheets_outbox_worker
 
 load_dotenv()
 frontend_origin = os.getenv("FRONTEND_ORIGIN")
@@ -28,6 +29,11 @@ app.add_middleware(
 
 app.include_router(v1_router) 
 
+@app.on_event("startup")
+def start_background_workers():
+    # Google Sheets mirror: drains the sheets_outbox table off the request path
+    start_sheets_outbox_worker()
+
 @app.get("/")
 async def read_root():
     return {"message": "Welcome to FastAPI! (Running via Docker Compose)"}
\ No newline at end of file
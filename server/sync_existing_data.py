@@ -1,10 +1,27 @@
 """
 Script to sync existing database data to Google Sheets.
 Run this after Docker startup to sync all existing suppliers and items.
+
+    python sync_existing_data.py            # one append per record
+    python sync_existing_data.py --bulk     # rewrite both sheets in chunks
+
+--bulk builds each worksheet in memory and writes it in --chunk-size row
+ranges through a token-bucket limiter (--writes-per-minute, with backoff on
+429s). Progress is checkpointed to --checkpoint after every chunk, so rerunning
+an interrupted bulk sync resumes where it stopped, as long as the data has
+not changed in between (otherwise that sheet starts over). While it runs it
+holds the Sheets outbox drain lock, so a live outbox worker waits instead of
+writing rows into a sheet that is being rewritten; its pending events are
+synced once the bulk sync finishes.
 """
 
+import argparse
+import hashlib
+import json
 import logging
+import os
 from datetime import datetime, timezone, timedelta
+from typing import Any, Dict, List
 from sqlalchemy.orm import Session
 
 from database.database import SessionLocal
@@ -24,7 +41,10 @@ logger = logging.getLogger(__name__)
 
 # Import Google Sheets client
 try:
-    from app.utils.google_sheets import get_google_sheets_client
+    from app.utils.google_sheets import (
+        get_google_sheets_client, WriteRateLimiter, SUPPLIER_HEADERS, ITEM_HEADERS, supplier_row, item_row,
+    )
+    from database.services.sheets_outbox import supplier_sheet_row, item_sheet_row, hold_sheets_drain_lock
     GOOGLE_SHEETS_AVAILABLE = True
 except ImportError:
     GOOGLE_SHEETS_AVAILABLE = False
@@ -151,8 +171,93 @@ def sync_all_items(db: Session):
         logger.error(f"Error during item sync: {str(e)}", exc_info=True)
 
 
+def _load_checkpoint(path: str) -> Dict[str, Any]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_checkpoint(path: str, checkpoint: Dict[str, Any]) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp, path)  # atomic: a crash never leaves a torn checkpoint
+
+
+def bulk_sync(db: Session, *, chunk_size: int, writes_per_minute: float, checkpoint_path: str, restart: bool):
+    """Rewrite the Suppliers and Inventory worksheets from the database in chunks"""
+    sheets_client = get_google_sheets_client(
+        settings.GOOGLE_SHEETS_CREDENTIALS_PATH,
+        settings.GOOGLE_SHEETS_SPREADSHEET_ID
+    )
+    # a live outbox worker must not append or update rows mid-rewrite: hold
+    # its drain lock for the whole run (released by the rollback below)
+    hold_sheets_drain_lock(db)
+    try:
+        limiter = WriteRateLimiter(per_minute=writes_per_minute)
+        checkpoint = {} if restart else _load_checkpoint(checkpoint_path)
+
+        sheets = (
+            ('Suppliers', SUPPLIER_HEADERS,
+             lambda: [supplier_row(supplier_sheet_row(s)) for s in db.query(Supplier).order_by(Supplier.id)]),
+            ('Inventory', ITEM_HEADERS,
+             lambda: [item_row(item_sheet_row(i)) for i in db.query(Item).order_by(Item.id)]),
+        )
+        for worksheet_name, headers, build_rows in sheets:
+            rows: List[List[Any]] = build_rows()
+            # timestamps are stamped at build time; the digest covers the data columns only
+            digest = hashlib.sha256(
+                json.dumps([row[:len(headers) - 2] for row in rows], default=str).encode()
+            ).hexdigest()
+            state = checkpoint.get(worksheet_name) or {}
+            if state.get("digest") == digest and state.get("chunk_size") == chunk_size:
+                start_chunk = state.get("chunks_done", 0)
+                if state.get("complete"):
+                    logger.info(f"{worksheet_name}: already synced, skipping")
+                    continue
+                if start_chunk:
+                    logger.info(f"{worksheet_name}: resuming at chunk {start_chunk + 1}")
+            else:
+                start_chunk = 0
+
+            def on_chunk(done: int, total: int, name=worksheet_name, digest=digest):
+                checkpoint[name] = {"digest": digest, "chunk_size": chunk_size, "chunks_done": done}
+                _save_checkpoint(checkpoint_path, checkpoint)
+                logger.info(f"{name}: chunk {done}/{total} written")
+
+            logger.info(f"{worksheet_name}: writing {len(rows)} rows")
+            sheets_client.bulk_write_worksheet(
+                worksheet_name, headers, rows,
+                chunk_size=chunk_size, limiter=limiter, start_chunk=start_chunk, on_chunk=on_chunk,
+            )
+            checkpoint[worksheet_name] = {"digest": digest, "chunk_size": chunk_size, "complete": True}
+            _save_checkpoint(checkpoint_path, checkpoint)
+
+        os.remove(checkpoint_path)  # every sheet done: the next run starts fresh
+        logger.info("Bulk sync complete")
+    finally:
+        db.rollback()
+
+
+def _positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return number
+
+
 def main():
     """Main function to sync all existing data"""
+    parser = argparse.ArgumentParser(description="Sync existing suppliers and items to Google Sheets")
+    parser.add_argument("--bulk", action="store_true", help="rewrite whole sheets in chunks (resumable)")
+    parser.add_argument("--chunk-size", type=_positive_int, default=500, help="rows per write request (bulk)")
+    parser.add_argument("--writes-per-minute", type=float, default=50, help="API request budget (bulk)")
+    parser.add_argument("--checkpoint", default=".sheets_sync_checkpoint.json", help="progress file (bulk)")
+    parser.add_argument("--restart", action="store_true", help="ignore an existing checkpoint (bulk)")
+    args = parser.parse_args()
+
     logger.info("=" * 80)
     logger.info("STARTING DATABASE TO GOOGLE SHEETS SYNC")
     logger.info("=" * 80)
@@ -170,11 +275,20 @@ def main():
     db: Session = SessionLocal()
     
     try:
-        # Sync suppliers
-        sync_all_suppliers(db)
-        
-        # Sync items
-        sync_all_items(db)
+        if args.bulk:
+            bulk_sync(
+                db,
+                chunk_size=args.chunk_size,
+                writes_per_minute=args.writes_per_minute,
+                checkpoint_path=args.checkpoint,
+                restart=args.restart,
+            )
+        else:
+            # Sync suppliers
+            sync_all_suppliers(db)
+
+            # Sync items
+            sync_all_items(db)
         
         logger.info("=" * 80)
         logger.info("SYNC COMPLETE!")
@@ -0,0 +1,26 @@
+# POST /bulk-add (cart service; the route only adds auth)
+def test_bulk_add_merges_duplicates_and_expands_boms(get_test_db, create_user, create_item, count_queries):
+    from database.models import CartItem, ItemComponent
+    from database.schemas.cart import CartItemCreate
+    from database.services.cart_service import add_multiple_items_to_cart
+
+    db = get_test_db
+    user = create_user()
+    kit, a, b, loose = create_item(), create_item(), create_item(), create_item()
+    db.add_all([
+        ItemComponent(parent_id=kit.id, child_id=a.id, qty_required=2),
+        ItemComponent(parent_id=kit.id, child_id=b.id, qty_required=3),
+    ])
+    db.add(CartItem(user_id=user.id, item_id=a.id, quantity=1))
+    db.commit()
+    user_id = user.id
+    items = [CartItemCreate(item_id=i, quantity=q) for i, q in ((kit.id, 1), (loose.id, 4), (kit.id, 2), (a.id, 5))]
+
+    add_multiple_items_to_cart(db, user_id, [CartItemCreate(item_id=loose.id, quantity=1)])  # warm the BOM cache
+    with count_queries() as statements:
+        add_multiple_items_to_cart(db, user_id, items)
+    assert len(statements) == 1
+
+    cart = dict(db.query(CartItem.item_id, CartItem.quantity).filter(CartItem.user_id == user_id).all())
+    # a: 1 already + 3 kits * 2 + 5 loose; b: 3 kits * 3; the kit itself is never added
+    assert cart == {a.id: 12, b.id: 9, loose.id: 5}
@@ -1,4 +1,5 @@
 import uuid 
+import pytest
 
 BASE_PATH = "/levelsliving/app/api/v1/item"
 
@@ -177,7 +178,13 @@ def test_get_item_details_not_found(client):
 #     │     └── C (qty_required = 4)   => C total = 2*4 = 8
 #     └── B  (qty_required = 3)        => B total = 3
 #
-def test_lowest_children_ok(client, get_test_db):
+@pytest.fixture(params=[True, False], ids=["bom-cache", "bom-sql"])
+def bom_cache_enabled(request, monkeypatch):
+    from config import settings
+    monkeypatch.setattr(settings, "BOM_CACHE_ENABLED", request.param)
+    return request.param
+
+def test_lowest_children_ok(client, get_test_db, bom_cache_enabled):
     from database.models import Item
     from database.models import ItemComponent
 
@@ -213,4 +220,384 @@ def test_lowest_children_ok(client, get_test_db):
 def test_lowest_children_not_found(client):
     resp = client.get(f"{BASE_PATH}/lowest-children/999999")
     assert resp.status_code == 404
-    assert resp.json()["detail"] == "Item not found"
\ No newline at end of file
+    assert resp.json()["detail"] == "Item not found"
+
+
+def test_lowest_children_cycle(client, get_test_db, create_item, bom_cache_enabled):
+    from database.models import ItemComponent
+
+    a, b, c = create_item(item_name="CycA"), create_item(item_name="CycB"), create_item(item_name="CycC")
+    get_test_db.add_all([
+        ItemComponent(parent_id=a.id, child_id=b.id, qty_required=1),
+        ItemComponent(parent_id=b.id, child_id=c.id, qty_required=1),
+        ItemComponent(parent_id=c.id, child_id=b.id, qty_required=1),
+    ])
+    get_test_db.commit()
+
+    resp = client.get(f"{BASE_PATH}/lowest-children/{a.id}")
+    assert resp.status_code == 409
+    assert "cycle" in resp.json()["detail"]
+
+def test_lowest_children_reflects_component_writes(client, create_item):
+    parent, a, b = create_item(item_name="WtParent"), create_item(item_name="WtA"), create_item(item_name="WtB")
+    resp = client.post("/levelsliving/app/api/v1/item-component", json={"parent_id": parent.id, "child_id": a.id, "qty_required": 2})
+    assert resp.status_code == 200, resp.text
+
+    resp = client.get(f"{BASE_PATH}/lowest-children/{parent.id}")
+    assert [(r["id"], r["total_qty_required"]) for r in resp.json()] == [(a.id, 2)]
+
+    # graph is cached now; the next write must invalidate it
+    resp = client.post("/levelsliving/app/api/v1/item-component", json={"parent_id": a.id, "child_id": b.id, "qty_required": 3})
+    assert resp.status_code == 200, resp.text
+
+    resp = client.get(f"{BASE_PATH}/lowest-children/{parent.id}")
+    assert [(r["id"], r["total_qty_required"]) for r in resp.json()] == [(b.id, 6)]
+
+# GET /where-used/{item_id}
+def test_where_used(client, get_test_db, create_item, bom_cache_enabled):
+    from database.models import ItemComponent
+
+    screw = create_item(item_name="WuScrew")
+    leg, top = create_item(item_name="WuLeg"), create_item(item_name="WuTop")
+    table = create_item(item_name="WuTable")
+    # diamond: table -> leg -> screw and table -> top -> screw, plus table -> screw directly
+    get_test_db.add_all([
+        ItemComponent(parent_id=leg.id, child_id=screw.id, qty_required=2),
+        ItemComponent(parent_id=top.id, child_id=screw.id, qty_required=5),
+        ItemComponent(parent_id=table.id, child_id=leg.id, qty_required=4),
+        ItemComponent(parent_id=table.id, child_id=top.id, qty_required=1),
+        ItemComponent(parent_id=table.id, child_id=screw.id, qty_required=3),
+    ])
+    get_test_db.commit()
+
+    resp = client.get(f"{BASE_PATH}/where-used/{screw.id}")
+    assert resp.status_code == 200, resp.text
+    rows = {r["id"]: (r["qty_per_unit"], r["level"]) for r in resp.json()}
+    # table: 4 legs * 2 + 1 top * 5 + 3 direct = 16
+    assert rows == {leg.id: (2, 1), top.id: (5, 1), table.id: (16, 1)}
+
+    resp = client.get(f"{BASE_PATH}/where-used/{leg.id}")
+    assert [(r["id"], r["qty_per_unit"], r["level"]) for r in resp.json()] == [(table.id, 4, 1)]
+
+    resp = client.get(f"{BASE_PATH}/where-used/{table.id}")
+    assert resp.json() == []
+
+def test_where_used_not_found(client):
+    resp = client.get(f"{BASE_PATH}/where-used/999999")
+    assert resp.status_code == 404
+    assert resp.json()["detail"] == "Item not found"
+
+# # GET /paginated (cursor mode)
+def test_read_items_paginated_cursor_ok(client, create_item):
+    tag = uuid.uuid4().hex[:6]
+    created = [create_item(item_name=f"Cursor-{tag}-{i}", sku=f"CUR-{tag}-{i}") for i in range(5)]
+    params = {"q": f"Cursor-{tag}", "search_columns": "item_name", "sort": "item_name:asc", "size": 2}
+
+    resp = client.get(f"{BASE_PATH}/paginated", params=params)
+    assert resp.status_code == 200, resp.text
+    body = resp.json()
+    seen = [row["id"] for row in body["data"]]
+
+    # follow next_cursor until exhausted
+    while body["meta"]["has_next"]:
+        resp = client.get(f"{BASE_PATH}/paginated", params={**params, "cursor": body["meta"]["next_cursor"]})
+        assert resp.status_code == 200, resp.text
+        body = resp.json()
+        assert body["meta"]["has_prev"] is True
+        seen.extend(row["id"] for row in body["data"])
+
+    assert seen == [it.id for it in created]
+    assert body["meta"]["next_cursor"] is None
+
+def test_read_items_paginated_invalid_cursor(client):
+    resp = client.get(f"{BASE_PATH}/paginated", params={"cursor": "not-a-cursor"})
+    assert resp.status_code == 400
+    assert resp.json()["detail"] == "Invalid cursor"
+
+def test_read_items_paginated_search_ranked(client, create_item):
+    tag = uuid.uuid4().hex[:6]
+    loose = create_item(item_name=f"Oak {tag} dining table extension leaf", sku=f"OAK-{tag}-1")
+    exact = create_item(item_name=f"Oak {tag} table", sku=f"OAK-{tag}-2")
+
+    resp = client.get(
+        f"{BASE_PATH}/paginated",
+        params={"q": f"oak {tag}", "search_columns": "item_name"},
+    )
+    assert resp.status_code == 200, resp.text
+    body = resp.json()
+    ids = [row["id"] for row in body["data"]]
+    assert ids[:2] == [exact.id, loose.id]
+    assert body["meta"]["sort"][0] == "relevance:desc"
+
+def test_read_items_paginated_total_modes(client, create_item):
+    tag = uuid.uuid4().hex[:6]
+    for i in range(3):
+        create_item(item_name=f"Total-{tag}-{i}", sku=f"TOT-{tag}-{i}")
+    params = {"q": f"TOT-{tag}", "search_columns": "sku", "size": 2}
+
+    resp = client.get(f"{BASE_PATH}/paginated", params={**params, "include_total": "true"})
+    assert resp.status_code == 200, resp.text
+    meta = resp.json()["meta"]
+    assert (meta["total"], meta["pages"], meta["total_kind"]) == (3, 2, "exact")
+
+    resp = client.get(f"{BASE_PATH}/paginated", params={**params, "include_total": "cached"})
+    assert resp.json()["meta"]["total"] == 3
+    assert resp.json()["meta"]["total_kind"] == "cached"
+
+    # a write to the table drops the cached count
+    create_item(item_name=f"Total-{tag}-3", sku=f"TOT-{tag}-3")
+    resp = client.get(f"{BASE_PATH}/paginated", params={**params, "include_total": "cached"})
+    assert resp.json()["meta"]["total"] == 4
+
+    resp = client.get(f"{BASE_PATH}/paginated", params={**params, "include_total": "estimate"})
+    assert resp.status_code == 200, resp.text
+    meta = resp.json()["meta"]
+    assert meta["total_kind"] == "estimate"
+    assert meta["total"] >= 0
+
+    resp = client.get(f"{BASE_PATH}/paginated", params={"include_total": "estimate"})
+    assert resp.status_code == 200, resp.text
+    assert resp.json()["meta"]["total_kind"] in ("estimate", "exact")
+
+def test_read_items_paginated_total_mode_invalid(client):
+    resp = client.get(f"{BASE_PATH}/paginated", params={"include_total": "sometimes"})
+    assert resp.status_code == 400
+
+# GET /export
+def test_export_items_ndjson_and_csv(client, create_item):
+    import csv, io, json
+    tag = uuid.uuid4().hex[:6]
+    created = [create_item(item_name=f"Export-{tag}-{i}", sku=f"EXP-{tag}-{i}") for i in range(3)]
+    params = {"q": f"EXP-{tag}", "search_columns": "sku"}
+
+    resp = client.get(f"{BASE_PATH}/export", params=params)
+    assert resp.status_code == 200, resp.text
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in resp.text.splitlines()]
+    assert [r["id"] for r in rows] == [it.id for it in created]
+    assert rows[0]["sku"] == f"EXP-{tag}-0"
+
+    resp = client.get(f"{BASE_PATH}/export", params={**params, "format": "csv"})
+    assert resp.status_code == 200, resp.text
+    assert resp.headers["content-type"].startswith("text/csv")
+    reader = list(csv.DictReader(io.StringIO(resp.text)))
+    assert [int(r["id"]) for r in reader] == [it.id for it in created]
+
+def test_export_items_invalid_format(client):
+    resp = client.get(f"{BASE_PATH}/export", params={"format": "xml"})
+    assert resp.status_code == 400
+
+# Conditional GET (ETag / If-None-Match)
+def test_read_items_etag_not_modified_until_write(client, create_item):
+    item = create_item(item_name="EtagItem")
+
+    resp = client.get(f"{BASE_PATH}/{item.id}")
+    assert resp.status_code == 200, resp.text
+    etag = resp.headers["etag"]
+
+    resp = client.get(f"{BASE_PATH}/{item.id}", headers={"If-None-Match": etag})
+    assert resp.status_code == 304
+    assert resp.content == b""
+    assert resp.headers["etag"] == etag
+
+    # the catalog version is shared by every item read
+    resp = client.get(f"{BASE_PATH}/paginated", headers={"If-None-Match": etag})
+    assert resp.status_code == 304
+
+    resp = client.put(f"{BASE_PATH}/{item.id}", json={
+        "sku": item.sku, "type": item.type, "item_name": "EtagItem2", "variant": None,
+        "qty": item.qty, "threshold_qty": item.threshold_qty,
+    })
+    assert resp.status_code == 200, resp.text
+
+    resp = client.get(f"{BASE_PATH}/{item.id}", headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+    assert resp.json()["item_name"] == "EtagItem2"
+    assert resp.headers["etag"] != etag
+
+# Query budget: catalog reads must not pull order history
+def test_item_reads_query_counts(client, get_test_db, create_item, count_queries):
+    from datetime import date, datetime, timezone
+    from decimal import Decimal
+    from database.models import Order, OrderItem, ItemComponent
+
+    parent = create_item(item_name="QCParent")
+    child = create_item(item_name="QCChild")
+    get_test_db.add(ItemComponent(parent_id=parent.id, child_id=child.id, qty_required=2))
+    order = Order(order_date=datetime(2025, 1, 1, tzinfo=timezone.utc), name="QC", contact="1",
+                  street="s", postal_code="000000", status="pending")
+    get_test_db.add(order)
+    get_test_db.flush()
+    for it in (parent, child):
+        get_test_db.add(OrderItem(order_id=order.order_id, item_id=it.id, qty_requested=1,
+                                  delivery_date=date(2025, 1, 2), delivered=False, value=Decimal("1")))
+    get_test_db.commit()
+
+    budgets = {
+        f"{BASE_PATH}": 1,
+        f"{BASE_PATH}/paginated": 1,
+        f"{BASE_PATH}/{parent.id}": 1,
+        f"{BASE_PATH}/details/{parent.id}": 1,
+        f"{BASE_PATH}/lowest-children/{parent.id}": 1,
+    }
+    for path, budget in budgets.items():
+        client.get(path)  # warm the BOM graph cache
+        with count_queries() as statements:
+            resp = client.get(path)
+        assert resp.status_code == 200, resp.text
+        assert len(statements) == budget, (path, statements)
+        assert not any("order_item" in s for s in statements), (path, statements)
+
+# POST /mrp
+def test_material_requirements_batch(client, get_test_db, create_item, bom_cache_enabled):
+    from database.models import ItemComponent
+
+    kit = create_item(item_name="MrpKit")
+    sub = create_item(item_name="MrpSub")
+    screw = create_item(item_name="MrpScrew", qty=10)
+    panel = create_item(item_name="MrpPanel", qty=100)
+    get_test_db.add_all([
+        ItemComponent(parent_id=kit.id, child_id=sub.id, qty_required=2),
+        ItemComponent(parent_id=kit.id, child_id=screw.id, qty_required=4),
+        ItemComponent(parent_id=sub.id, child_id=panel.id, qty_required=3),
+    ])
+    get_test_db.commit()
+
+    resp = client.post(f"{BASE_PATH}/mrp", json={"items": [
+        {"item_id": kit.id, "qty": 2},
+        {"item_id": sub.id, "qty": 1},
+        {"item_id": screw.id, "qty": 1},
+        {"item_id": kit.id, "qty": 1},
+    ]})
+    assert resp.status_code == 200, resp.text
+    rows = {r["id"]: r for r in resp.json()}
+    assert set(rows) == {screw.id, panel.id}
+    # screws: 3 kits * 4 + 1 loose = 13; panels: 3 kits * 2 * 3 + 1 sub * 3 = 21
+    assert (rows[screw.id]["required_qty"], rows[screw.id]["on_hand_qty"], rows[screw.id]["shortfall"]) == (13, 10, 3)
+    assert (rows[panel.id]["required_qty"], rows[panel.id]["on_hand_qty"], rows[panel.id]["shortfall"]) == (21, 100, 0)
+
+def test_material_requirements_unknown_item(client):
+    resp = client.post(f"{BASE_PATH}/mrp", json={"items": [{"item_id": 999999, "qty": 1}]})
+    assert resp.status_code == 404
+    assert "999999" in resp.json()["detail"]
+
+# GET /buildable
+def test_buildable_items(client, get_test_db, create_item, bom_cache_enabled):
+    from database.models import ItemComponent
+
+    tag = uuid.uuid4().hex[:6]
+    kit = create_item(item_name=f"Bld-{tag}-kit", sku=f"BLD-{tag}-K")
+    sub = create_item(item_name=f"Bld-{tag}-sub", sku=f"BLD-{tag}-S")
+    leg = create_item(item_name=f"Bld-{tag}-leg", sku=f"BLD-{tag}-L", qty=17)
+    top = create_item(item_name=f"Bld-{tag}-top", sku=f"BLD-{tag}-T", qty=5)
+    get_test_db.add_all([
+        ItemComponent(parent_id=kit.id, child_id=sub.id, qty_required=1),
+        ItemComponent(parent_id=kit.id, child_id=top.id, qty_required=1),
+        ItemComponent(parent_id=sub.id, child_id=leg.id, qty_required=4),
+    ])
+    get_test_db.commit()
+
+    params = {"q": f"BLD-{tag}", "search_columns": "sku", "include_total": "true"}
+    resp = client.get(f"{BASE_PATH}/buildable", params=params)
+    assert resp.status_code == 200, resp.text
+    body = resp.json()
+    rows = {r["id"]: r for r in body["data"]}
+    assert body["meta"]["total"] == 2
+    # sub: 17 legs // 4 = 4; kit: min(4 legs-per-sub -> 4, 5 tops) = 4, legs are the bottleneck
+    assert (rows[sub.id]["buildable"], rows[sub.id]["limiting_item_id"]) == (4, leg.id)
+    assert (rows[kit.id]["buildable"], rows[kit.id]["limiting_item_id"]) == (4, leg.id)
+
+    resp = client.get(f"{BASE_PATH}/buildable", params={**params, "sort": "item_name:desc", "size": 1})
+    body = resp.json()
+    assert [r["id"] for r in body["data"]] == [sub.id]
+    resp = client.get(f"{BASE_PATH}/buildable", params={**params, "sort": "item_name:desc", "size": 1,
+                                                       "cursor": body["meta"]["next_cursor"]})
+    assert [r["id"] for r in resp.json()["data"]] == [kit.id]
+
+    # the vector is reused between requests but follows stock changes
+    leg.qty = 8
+    get_test_db.commit()
+    rows = {r["id"]: r for r in client.get(f"{BASE_PATH}/buildable", params=params).json()["data"]}
+    assert (rows[sub.id]["buildable"], rows[kit.id]["buildable"]) == (2, 2)
+
+    resp = client.get(f"{BASE_PATH}/buildable", params={**params, "include_total": "estimate"})
+    assert resp.status_code == 400
+
+# Google Sheets outbox (item / supplier writes)
+def test_writes_queue_sheets_sync_and_drain_collapses_events(client, get_test_db, monkeypatch):
+    import uuid
+    from config import settings
+    from database.models import SheetsOutbox
+    from database.services.sheets_outbox import drain_sheets_outbox
+
+    monkeypatch.setattr(settings, "GOOGLE_SHEETS_ENABLED", True)
+
+    class RecordingSheets:
+        def __init__(self, ok=True):
+            self.ok, self.calls = ok, []
+        def __getattr__(self, name):  # sync_item_create(data) / sync_supplier_delete(id) / ...
+            def _call(arg):
+                self.calls.append((name, arg["id"] if isinstance(arg, dict) else arg))
+                return self.ok
+            return _call
+
+    tag = uuid.uuid4().hex[:6]
+    payload = {"sku": f"SHT-{tag}", "type": "general", "item_name": "Sheet", "variant": None, "qty": 1, "threshold_qty": 0}
+    item = client.post(f"{BASE_PATH}/", json=payload).json()
+    resp = client.put(f"{BASE_PATH}/{item['id']}", json={**payload, "qty": 3})
+    assert resp.status_code == 200, resp.text
+    supplier = client.post("/levelsliving/app/api/v1/supplier", json={"name": f"Sheet {tag}"}).json()
+    assert client.delete(f"/levelsliving/app/api/v1/supplier/{supplier['id']}").status_code == 200
+
+    ops = get_test_db.query(SheetsOutbox.entity, SheetsOutbox.entity_id, SheetsOutbox.op).order_by(SheetsOutbox.id).all()
+    assert [o for o in ops if o[1] in (item["id"], supplier["id"])] == [
+        ("item", item["id"], "create"), ("item", item["id"], "update"),
+        ("supplier", supplier["id"], "create"), ("supplier", supplier["id"], "delete"),
+    ]
+
+    # a failed sync backs off and keeps the events
+    failing = RecordingSheets(ok=False)
+    drain_sheets_outbox(get_test_db, failing)
+    assert ("sync_item_create", item["id"]) in failing.calls
+    pending = get_test_db.query(SheetsOutbox).filter(SheetsOutbox.entity == "item", SheetsOutbox.entity_id == item["id"]).all()
+    assert [(ev.attempts, ev.last_error) for ev in pending] == [(1, "sync_item_create returned False")] * 2
+
+    # once due again: one create with the current row; the supplier never reaches the sheet
+    get_test_db.query(SheetsOutbox).update({SheetsOutbox.available_at: SheetsOutbox.created_at})
+    get_test_db.commit()
+    sheets = RecordingSheets()
+    while drain_sheets_outbox(get_test_db, sheets):
+        pass
+    assert [c for c in sheets.calls if c[1] in (item["id"], supplier["id"])] == [("sync_item_create", item["id"])]
+    assert get_test_db.query(SheetsOutbox).count() == 0
+
+def test_drain_skips_given_up_events_and_syncs_outside_transactions(get_test_db, engine, create_item, monkeypatch):
+    from sqlalchemy import func, select
+    from config import settings
+    from database.models import SheetsOutbox
+    from database.services.sheets_outbox import _DRAIN_LOCK_KEY, drain_sheets_outbox
+
+    it = create_item()
+    get_test_db.query(SheetsOutbox).delete()
+    dead = SheetsOutbox(entity="item", entity_id=it.id, op="create", attempts=settings.SHEETS_OUTBOX_MAX_ATTEMPTS)
+    get_test_db.add_all([dead, SheetsOutbox(entity="item", entity_id=it.id, op="update")])
+    get_test_db.commit()
+
+    calls = []
+    class Sheets:
+        def sync_item_update(self, data):
+            # no transaction is open while Sheets is called, yet other drainers are kept out
+            with engine.connect() as conn:
+                lock_free = conn.execute(select(func.pg_try_advisory_xact_lock(_DRAIN_LOCK_KEY))).scalar()
+            calls.append((data["id"], get_test_db.in_transaction(), lock_free))
+            return True
+
+    assert drain_sheets_outbox(get_test_db, Sheets()) == 1
+    assert calls == [(it.id, False, False)]
+    # the given-up create is neither retried nor counted again
+    remaining = get_test_db.query(SheetsOutbox.id, SheetsOutbox.attempts).all()
+    assert remaining == [(dead.id, settings.SHEETS_OUTBOX_MAX_ATTEMPTS)]
+    with engine.connect() as conn:
+        assert conn.execute(select(func.pg_try_advisory_xact_lock(_DRAIN_LOCK_KEY))).scalar()
+    get_test_db.delete(dead)
+    get_test_db.commit()
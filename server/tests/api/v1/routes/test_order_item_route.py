@@ -0,0 +1,80 @@
+import uuid
+from datetime import datetime, timezone
+
+BASE_PATH = "/levelsliving/app/api/v1/order-item"
+
+def _make_order(db):
+    from database.models import Order
+
+    order = Order(
+        order_date=datetime(2025, 1, 2, tzinfo=timezone.utc),
+        name=f"Cust {uuid.uuid4().hex[:6]}",
+        contact="91234567",
+        street="1 Street",
+        postal_code="123456",
+        status="pending",
+    )
+    db.add(order)
+    db.commit()
+    return order
+
+def _line(order, item, qty, delivery_date, value="2.00"):
+    return {
+        "order_id": order.order_id, "item_id": item.id, "qty_requested": qty,
+        "delivery_date": delivery_date, "delivered": False, "value": value,
+    }
+
+# GET /monthly/quantity/{item_id} (monthly_item_demand rollup)
+def test_monthly_quantities_follow_order_item_writes(client, get_test_db, create_item):
+    from database.models import MonthlyItemDemand
+
+    it = create_item(item_name="Demand")
+    first, second = _make_order(get_test_db), _make_order(get_test_db)
+
+    for payload in (_line(first, it, 3, "2025-01-10"), _line(second, it, 4, "2025-01-20")):
+        resp = client.post(BASE_PATH, json=payload)
+        assert resp.status_code == 200, resp.text
+
+    def monthly():
+        resp = client.get(f"{BASE_PATH}/monthly/quantity/{it.id}")
+        assert resp.status_code == 200, resp.text
+        return [(r["date"], r["quantity"]) for r in resp.json()]
+
+    assert monthly() == [("2025-01-31", 7)]
+
+    # moving a line to another month moves its quantity
+    resp = client.put(f"{BASE_PATH}/{second.order_id}/{it.id}", json={"delivery_date": "2025-02-03", "qty_requested": 5})
+    assert resp.status_code == 200, resp.text
+    assert monthly() == [("2025-01-31", 3), ("2025-02-28", 5)]
+
+    resp = client.delete(f"{BASE_PATH}/{first.order_id}/{it.id}")
+    assert resp.status_code == 200, resp.text
+    assert monthly() == [("2025-02-28", 5)]
+
+    # deleting the order cascades to its lines in the database
+    get_test_db.delete(get_test_db.merge(second))
+    get_test_db.commit()
+    assert monthly() == []
+
+    # the emptied month stays as a zero row and is skipped by the reads
+    row = get_test_db.get(MonthlyItemDemand, (it.id, datetime(2025, 2, 1).date()))
+    assert (row.qty, row.value) == (0, 0)
+
+def test_rebuild_monthly_item_demand(get_test_db, create_item):
+    from database.models import MonthlyItemDemand, OrderItem
+    from database.services.order_item import rebuild_monthly_item_demand, get_monthly_order_item_quantities_by_sku
+
+    it = create_item(item_name="Backfill")
+    order = _make_order(get_test_db)
+    get_test_db.add(OrderItem(order_id=order.order_id, item_id=it.id, qty_requested=6,
+                              delivery_date=datetime(2025, 3, 9).date(), delivered=False, value=3))
+    get_test_db.commit()
+
+    # simulate drift, then rebuild from order_item
+    get_test_db.query(MonthlyItemDemand).filter(MonthlyItemDemand.item_id == it.id).delete()
+    get_test_db.commit()
+    assert get_monthly_order_item_quantities_by_sku(get_test_db, it.id) == []
+
+    assert rebuild_monthly_item_demand(get_test_db) >= 1
+    rows = get_monthly_order_item_quantities_by_sku(get_test_db, it.id)
+    assert [(r["date"].isoformat(), r["quantity"]) for r in rows] == [("2025-03-31", 6)]
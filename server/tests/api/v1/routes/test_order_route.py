@@ -1 +1,209 @@
+import json
+import uuid
+from datetime import date, datetime, timezone
+from decimal import Decimal
 
+BASE_PATH = "/levelsliving/app/api/v1/order"
+
+def _make_order(db, tag, lines, **overrides):
+    """Insert one order with `lines` = [(item, qty, value), ...]."""
+    from database.models import Order, OrderItem
+
+    order = Order(
+        order_date=overrides.get("order_date", datetime(2025, 1, 2, tzinfo=timezone.utc)),
+        name=overrides.get("name", f"Cust {tag}"),
+        contact="91234567",
+        street="1 Street",
+        postal_code="123456",
+        status=overrides.get("status", "pending"),
+    )
+    db.add(order)
+    db.flush()
+    for it, qty, value in lines:
+        db.add(OrderItem(
+            order_id=order.order_id, item_id=it.id, qty_requested=qty, tag=["shopee"],
+            delivery_date=overrides.get("delivery_date", date(2025, 1, 9)), delivered=False, value=Decimal(value),
+        ))
+    db.commit()
+    return order
+
+# GET /with-items
+def test_list_orders_with_items_totals_and_summary(client, get_test_db, create_item, count_queries):
+    tag = uuid.uuid4().hex[:6]
+    a = create_item(item_name="ListA", sku=f"OLA-{tag}")
+    b = create_item(item_name="ListB", sku=f"OLB-{tag}")
+    first = _make_order(get_test_db, tag, [(a, 2, "10.50"), (b, 3, "1.25")])
+    empty = _make_order(get_test_db, tag, [])
+
+    params = {"q": f"Cust {tag}", "search_columns": "name", "sort": "order_id:asc"}
+    with count_queries() as statements:
+        resp = client.get(f"{BASE_PATH}/with-items", params=params)
+    assert resp.status_code == 200, resp.text
+    assert len(statements) == 3  # count, page (with aggregates), lines
+    rows = resp.json()["data"]
+    assert [r["id"] for r in rows] == [first.order_id, empty.order_id]
+    assert (rows[0]["order_qty"], Decimal(str(rows[0]["total_value"])), rows[0]["line_count"]) == (5, Decimal("24.75"), 2)
+    assert [(l["sku"], l["qty_requested"]) for l in rows[0]["subRows"]] == [(f"OLA-{tag}", 2), (f"OLB-{tag}", 3)]
+    assert (rows[1]["order_qty"], Decimal(str(rows[1]["total_value"])), rows[1]["line_count"], rows[1]["subRows"]) == (0, Decimal("0"), 0, [])
+
+    with count_queries() as statements:
+        resp = client.get(f"{BASE_PATH}/with-items", params={**params, "expand": "false"})
+    assert resp.status_code == 200, resp.text
+    assert len(statements) == 2  # no line query in summary mode
+    rows = resp.json()["data"]
+    assert (rows[0]["order_qty"], rows[0]["line_count"], rows[0]["subRows"]) == (5, 2, [])
+
+def test_list_orders_with_items_filters(client, get_test_db, create_item):
+    tag = uuid.uuid4().hex[:6]
+    it = create_item(item_name="FilterA", sku=f"OFA-{tag}")
+    jan = _make_order(get_test_db, tag, [(it, 1, "1.00")], order_date=datetime(2025, 1, 5, tzinfo=timezone.utc))
+    feb = _make_order(get_test_db, tag, [(it, 1, "1.00")], order_date=datetime(2025, 2, 5, tzinfo=timezone.utc),
+                      status="delivered", delivery_date=date(2025, 3, 1))
+    mar = _make_order(get_test_db, tag, [(it, 1, "1.00")], order_date=datetime(2025, 3, 5, tzinfo=timezone.utc))
+
+    def ids(**params):
+        resp = client.get(f"{BASE_PATH}/with-items", params={"q": f"Cust {tag}", "search_columns": "name", **params})
+        assert resp.status_code == 200, resp.text
+        return [r["id"] for r in resp.json()["data"]]
+
+    assert ids(date_from="2025-02-01") == [mar.order_id, feb.order_id]
+    assert ids(date_from="2025-01-01", date_to="2025-03-05") == [feb.order_id, jan.order_id]  # exclusive end
+    assert ids(status="pending") == [mar.order_id, jan.order_id]
+    assert ids(status="pending", date_to="2025-02-01") == [jan.order_id]
+    assert ids(delivery_from="2025-02-15", delivery_to="2025-03-02") == [feb.order_id]
+
+    resp = client.get(f"{BASE_PATH}/with-items", params={"date_from": "not-a-date"})
+    assert resp.status_code == 400
+
+def test_list_orders_with_items_cached_total_follows_lines(client, get_test_db, create_item):
+    from database.models import OrderItem
+
+    tag = uuid.uuid4().hex[:6]
+    it = create_item(item_name="TotalA", sku=f"OTA-{tag}")
+    order = _make_order(get_test_db, tag, [])
+    params = {"q": f"Cust {tag}", "search_columns": "name", "include_total": "cached",
+              "delivery_from": "2025-01-01", "delivery_to": "2025-02-01"}
+
+    meta = client.get(f"{BASE_PATH}/with-items", params=params).json()["meta"]
+    assert (meta["total"], meta["pages"]) == (0, 0)
+
+    # a new line puts the order in the delivery window: the cached total is dropped
+    get_test_db.add(OrderItem(order_id=order.order_id, item_id=it.id, qty_requested=1, tag=[],
+                              delivery_date=date(2025, 1, 9), delivered=False, value=Decimal("1")))
+    get_test_db.commit()
+    meta = client.get(f"{BASE_PATH}/with-items", params=params).json()["meta"]
+    assert (meta["total"], meta["pages"]) == (1, 1)
+
+# POST /import
+def test_import_orders_csv_and_ndjson(client, get_test_db, create_item):
+    from database.models import Order, OrderItem
+
+    tag = uuid.uuid4().hex[:6]
+    a = create_item(item_name="ImportA", sku=f"OIA-{tag}")
+    b = create_item(item_name="ImportB", sku=f"OIB-{tag}")
+    header = "order_ref,shopify_order_id,order_date,name,contact,street,postal_code,status,sku,qty_requested,tag,delivery_date,value"
+    csv_body = "\n".join([
+        header,
+        f"R1-{tag},,2025-01-02,{tag},9123,1 Street,123456,pending,OIA-{tag},2,shopee;custom,2025-01-09,10.50",
+        f"R1-{tag},,2025-01-02,{tag},9123,1 Street,123456,pending,OIB-{tag},1,,2025-01-09,3",
+        f"R2-{tag},,2025-01-03,{tag},9123,2 Street,123456,pending,OIA-{tag},1,lazada,2025-01-10,1",
+        f"R2-{tag},,2025-01-03,{tag},9123,2 Street,123456,pending,NOPE-{tag},x,,2025-01-10,1",
+    ]) + "\n"
+    resp = client.post(f"{BASE_PATH}/import", files={"file": ("orders.csv", csv_body, "text/csv")})
+    assert resp.status_code == 200, resp.text
+    body = resp.json()
+    assert (body["orders_created"], body["orders_updated"], body["orders_rejected"], body["lines_imported"]) == (1, 0, 1, 2)
+    assert sorted((e["row"], e["error"].split(" ")[0]) for e in body["errors"]) == [
+        (3, "tag"), (4, "qty_requested"), (4, "sku"),
+    ]
+
+    created = get_test_db.query(Order).filter(Order.name == tag).all()
+    assert len(created) == 1
+    lines = {l.item_id: l for l in get_test_db.query(OrderItem).filter(OrderItem.order_id == created[0].order_id)}
+    assert (lines[a.id].qty_requested, lines[a.id].tag, lines[a.id].delivered) == (2, ["shopee", "custom"], False)
+    assert lines[b.id].value == Decimal("3.00")
+
+    # NDJSON; a known shopify_order_id upserts lines into the existing order
+    existing = _make_order(get_test_db, tag, [(a, 1, "1.00")])
+    existing.shopify_order_id = 990000 + created[0].order_id
+    get_test_db.commit()
+    record = {
+        "order_ref": f"S-{tag}", "shopify_order_id": existing.shopify_order_id, "order_date": "2025-01-04T10:00:00",
+        "name": tag, "contact": "9123", "street": "3 Street", "postal_code": "123456", "status": "pending",
+        "delivery_date": "2025-01-11", "value": 2, "tag": ["private"],
+    }
+    ndjson = "\n".join(json.dumps({**record, "sku": sku, "qty_requested": qty}) for sku, qty in ((f"OIA-{tag}", 4), (f"OIB-{tag}", 5)))
+    resp = client.post(f"{BASE_PATH}/import", params={"format": "ndjson"}, files={"file": ("orders.ndjson", ndjson)})
+    assert resp.status_code == 200, resp.text
+    body = resp.json()
+    assert (body["orders_created"], body["orders_updated"], body["lines_imported"], body["errors"]) == (0, 1, 2, [])
+    get_test_db.expire_all()
+    assert sorted((l.item_id, l.qty_requested) for l in get_test_db.query(OrderItem).filter(OrderItem.order_id == existing.order_id)) == [(a.id, 4), (b.id, 5)]
+
+def test_import_orders_malformed_upload(client):
+    resp = client.post(f"{BASE_PATH}/import", files={"file": ("orders.csv", "order_ref,bogus\nx,y\n")})
+    assert resp.status_code == 400
+    assert "bogus" in resp.json()["detail"]
+
+    resp = client.post(f"{BASE_PATH}/import", params={"format": "ndjson"}, files={"file": ("o.ndjson", "{not json\n")})
+    assert resp.status_code == 400
+    assert resp.json()["detail"] == "Line 1: invalid JSON"
+
+def test_import_orders_header_mismatch_sees_nulls(client, create_item):
+    tag = uuid.uuid4().hex[:6]
+    create_item(item_name="ImportN", sku=f"OIN-{tag}")
+    create_item(item_name="ImportM", sku=f"OIM-{tag}")
+    record = {
+        "order_ref": f"N-{tag}", "order_date": "2025-01-04", "name": tag, "contact": "9123", "street": "3 Street",
+        "status": "pending", "qty_requested": 1, "delivery_date": "2025-01-11", "value": 1,
+    }
+    # the same text, but in different header fields (unit vs postal_code)
+    lines = [
+        {**record, "sku": f"OIN-{tag}", "unit": None, "postal_code": "123456"},
+        {**record, "sku": f"OIM-{tag}", "unit": "123456", "postal_code": None},
+    ]
+    ndjson = "\n".join(json.dumps(line) for line in lines)
+    resp = client.post(f"{BASE_PATH}/import", params={"format": "ndjson"}, files={"file": ("o.ndjson", ndjson)})
+    assert resp.status_code == 200, resp.text
+    body = resp.json()
+    assert body["orders_created"] == 0
+    mismatched = sorted(e["row"] for e in body["errors"] if e["error"].startswith("header fields differ"))
+    assert mismatched == [1, 2]
+
+# GET /export
+def test_export_orders_ndjson_nests_lines(client, get_test_db, create_item):
+    from database.models import Order, OrderItem
+
+    tag = uuid.uuid4().hex[:6]
+    a = create_item(item_name="ExportA", sku=f"OEA-{tag}")
+    b = create_item(item_name="ExportB", sku=f"OEB-{tag}")
+    order = Order(
+        order_date=datetime(2025, 1, 2, tzinfo=timezone.utc),
+        name=f"Cust {tag}",
+        contact="91234567",
+        street="1 Street",
+        postal_code="123456",
+        status="pending",
+    )
+    get_test_db.add(order)
+    get_test_db.flush()
+    for it, qty in ((a, 2), (b, 5)):
+        get_test_db.add(OrderItem(
+            order_id=order.order_id, item_id=it.id, qty_requested=qty, tag=["shopee"],
+            delivery_date=date(2025, 1, 9), delivered=False, value=Decimal("10.50"),
+        ))
+    get_test_db.commit()
+
+    resp = client.get(f"{BASE_PATH}/export", params={"q": f"Cust {tag}", "search_columns": "name"})
+    assert resp.status_code == 200, resp.text
+    rows = [json.loads(line) for line in resp.text.splitlines()]
+    assert len(rows) == 1
+    assert rows[0]["order_id"] == order.order_id
+    assert [(l["sku"], l["qty_requested"]) for l in rows[0]["lines"]] == [(f"OEA-{tag}", 2), (f"OEB-{tag}", 5)]
+    assert rows[0]["lines"][0]["value"] == "10.50"
+
+    resp = client.get(f"{BASE_PATH}/export", params={"q": f"Cust {tag}", "search_columns": "name", "format": "csv"})
+    assert resp.status_code == 200, resp.text
+    lines = resp.text.strip().splitlines()
+    assert len(lines) == 3  # header + one row per order line
+    assert "shopee" in lines[1]
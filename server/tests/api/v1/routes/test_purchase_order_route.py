@@ -0,0 +1,229 @@
+BASE_PATH = "/levelsliving/app/api/v1/purchase-order"
+
+def _make_po(db, lines, status="Pending"):
+    """Insert one purchase order with `lines` = [(item, qty), ...]."""
+    from database.models import PurchaseOrder, PurchaseOrderItem
+
+    po = PurchaseOrder(status=status)
+    db.add(po)
+    db.flush()
+    for it, qty in lines:
+        db.add(PurchaseOrderItem(purchase_order_id=po.id, item_id=it.id, qty=qty))
+    db.commit()
+    return po
+
+# PATCH /{po_id}/status
+def test_confirm_purchase_order_increments_stock_with_ledger(client, get_test_db, create_item):
+    from database.models import Item, StockLedger
+
+    a, b = create_item(qty=10), create_item(qty=0)
+    po = _make_po(get_test_db, [(a, 5), (b, 7)])
+
+    resp = client.patch(f"{BASE_PATH}/{po.id}/status", json={"status": "Confirmed"})
+    assert resp.status_code == 200, resp.text
+    assert resp.json()["status"] == "Confirmed"
+
+    get_test_db.expire_all()
+    assert (get_test_db.get(Item, a.id).qty, get_test_db.get(Item, b.id).qty) == (15, 7)
+    ledger = (
+        get_test_db.query(StockLedger.item_id, StockLedger.qty_delta, StockLedger.qty_after, StockLedger.reason)
+        .filter(StockLedger.purchase_order_id == po.id)
+        .order_by(StockLedger.item_id)
+        .all()
+    )
+    assert ledger == [(a.id, 5, 15, "po_confirmed"), (b.id, 7, 7, "po_confirmed")]
+
+    # confirming again is a no-op, leaving confirmed is rejected
+    resp = client.patch(f"{BASE_PATH}/{po.id}/status", json={"status": "Confirmed"})
+    assert resp.status_code == 200, resp.text
+    resp = client.patch(f"{BASE_PATH}/{po.id}/status", json={"status": "Rejected"})
+    assert resp.status_code == 400
+    get_test_db.expire_all()
+    assert get_test_db.get(Item, a.id).qty == 15
+    assert get_test_db.query(StockLedger).filter(StockLedger.purchase_order_id == po.id).count() == 2
+
+def test_apply_stock_movements_replays_ledger_per_item(get_test_db, create_item):
+    from database.models import StockLedger
+    from database.services.stock import apply_stock_movements
+
+    it = create_item(qty=1)
+    first, second = _make_po(get_test_db, []), _make_po(get_test_db, [])
+    assert apply_stock_movements(get_test_db, [(it.id, 4, second.id), (it.id, 2, first.id)], reason="test") == 2
+    get_test_db.commit()
+
+    ledger = (
+        get_test_db.query(StockLedger.purchase_order_id, StockLedger.qty_delta, StockLedger.qty_after)
+        .filter(StockLedger.item_id == it.id)
+        .order_by(StockLedger.id)
+        .all()
+    )
+    assert ledger == [(first.id, 2, 3), (second.id, 4, 7)]
+
+    # history outlives the item and POs it refers to
+    get_test_db.delete(first)
+    get_test_db.delete(it)
+    get_test_db.commit()
+    assert get_test_db.query(StockLedger).filter(StockLedger.item_id == it.id).count() == 2
+
+# PATCH /status (bulk)
+def test_bulk_status_update(client, get_test_db, create_item):
+    from database.models import Item, StockLedger
+
+    it = create_item(qty=0)
+    pending = _make_po(get_test_db, [(it, 2)])
+    rejected = _make_po(get_test_db, [(it, 3)], status="Rejected")
+    confirmed = _make_po(get_test_db, [(it, 100)], status="Confirmed")
+
+    resp = client.patch(f"{BASE_PATH}/status", json={"ids": [rejected.id, pending.id, confirmed.id, 999999], "status": "Confirmed"})
+    assert resp.status_code == 200, resp.text
+    results = {r["id"]: r for r in resp.json()}
+    assert [r["id"] for r in resp.json()] == sorted(results)
+    assert (results[pending.id]["updated"], results[pending.id]["stock_incremented"], results[pending.id]["status"]) == (True, True, "Confirmed")
+    assert (results[rejected.id]["previous_status"], results[rejected.id]["updated"]) == ("Rejected", True)
+    assert (results[confirmed.id]["updated"], results[confirmed.id]["error"]) == (False, None)  # already there: no-op
+    assert results[999999]["error"] == "Purchase order not found"
+
+    get_test_db.expire_all()
+    assert get_test_db.get(Item, it.id).qty == 5
+    assert get_test_db.query(StockLedger).filter(StockLedger.item_id == it.id).count() == 2
+
+    resp = client.patch(f"{BASE_PATH}/status", json={"ids": [pending.id], "status": "Pending"})
+    assert resp.json() == [{
+        "id": pending.id, "previous_status": "Confirmed", "status": "Confirmed",
+        "updated": False, "stock_incremented": False, "error": "Cannot change status from Confirmed",
+    }]
+
+# GET "" (enriched)
+def test_list_purchase_orders_enriched(client, get_test_db, create_item, count_queries):
+    import uuid
+    from database.models import Supplier
+
+    tag = uuid.uuid4().hex[:6]
+    acme = Supplier(name=f"Acme {tag}", email="acme@example.com")
+    zeta = Supplier(name=f"Zeta {tag}", email="zeta@example.com")
+    get_test_db.add_all([acme, zeta])
+    get_test_db.commit()
+    a, b = create_item(), create_item()
+    po_zeta = _make_po(get_test_db, [(a, 2), (b, 3)])
+    po_zeta.supplier_id = zeta.id
+    po_acme = _make_po(get_test_db, [])
+    po_acme.supplier_id = acme.id
+    get_test_db.commit()
+
+    params = {"enriched": "true", "q": f"{po_zeta.id}", "search_columns": "id"}
+    with count_queries() as statements:
+        resp = client.get(BASE_PATH, params=params)
+    assert resp.status_code == 200, resp.text
+    assert len(statements) == 1
+    row = next(r for r in resp.json()["data"] if r["id"] == po_zeta.id)
+    assert (row["supplier_name"], row["line_count"], row["total_qty"]) == (f"Zeta {tag}", 2, 5)
+
+    # sort by supplier name, keyset-paginated
+    params = {"enriched": "true", "sort": "supplier_name:asc", "size": 1}
+    seen = []
+    cursor = None
+    while True:
+        resp = client.get(BASE_PATH, params={**params, **({"cursor": cursor} if cursor else {})})
+        assert resp.status_code == 200, resp.text
+        seen += [r["id"] for r in resp.json()["data"]]
+        cursor = resp.json()["meta"]["next_cursor"]
+        if not cursor:
+            break
+    assert seen.index(po_acme.id) < seen.index(po_zeta.id)
+
+    # without enriched, supplier_name is not a sort key (ignored like any unknown token)
+    resp = client.get(BASE_PATH, params={"sort": "supplier_name:asc"})
+    assert resp.status_code == 200, resp.text
+    assert all(r["supplier_name"] is None for r in resp.json()["data"])
+
+# POST "" and /by-supplier (cart -> PO services; the routes only add auth and email)
+def test_create_purchase_orders_from_cart(get_test_db, create_user, create_item, count_queries):
+    import uuid
+    import pytest
+    from fastapi import HTTPException
+    from database.models import CartItem, PurchaseOrderItem, Supplier, SupplierItem
+    from database.schemas.purchase_order import PurchaseOrderCreateFromCart, PurchaseOrderCreateFromCartBySupplier
+    from database.services.purchase_order import (
+        create_purchase_order_from_cart_service,
+        create_purchase_orders_by_supplier_from_cart_service,
+    )
+
+    db = get_test_db
+    tag = uuid.uuid4().hex[:6]
+    user = create_user()
+    acme, zeta = Supplier(name=f"Acme {tag}", email="acme@example.com"), Supplier(name=f"Zeta {tag}", email="zeta@example.com")
+    db.add_all([acme, zeta])
+    db.commit()
+    a, b, c, orphan = create_item(), create_item(), create_item(), create_item()
+    mappings = [SupplierItem(supplier_id=acme.id, item_id=a.id), SupplierItem(supplier_id=acme.id, item_id=b.id),
+                SupplierItem(supplier_id=zeta.id, item_id=b.id), SupplierItem(supplier_id=zeta.id, item_id=c.id)]
+    db.add_all(mappings)
+    db.commit()
+
+    def fill_cart(*lines):
+        db.add_all(CartItem(user_id=user.id, item_id=it.id, quantity=qty) for it, qty in lines)
+        db.commit()
+        db.refresh(user)
+
+    # single supplier: unmapped lines are kept without a supplier_item_id
+    fill_cart((a, 2), (c, 3))
+    payload = PurchaseOrderCreateFromCart(supplier_id=acme.id)
+    with count_queries() as statements:
+        po = create_purchase_order_from_cart_service(db, payload, user.id)
+    assert len(statements) == 1
+    assert (po["supplier_name"], po["status"], po["user_id"]) == (f"Acme {tag}", "Pending", user.id)
+    assert [(l["item_id"], l["ordered_qty"], l["supplier_item_id"]) for l in po["po_items"]] == [
+        (a.id, 2, mappings[0].id), (c.id, 3, None),
+    ]
+    assert db.query(CartItem).filter(CartItem.user_id == user.id).count() == 0
+    with pytest.raises(HTTPException) as exc:
+        create_purchase_order_from_cart_service(db, PurchaseOrderCreateFromCart(supplier_id=acme.id), user.id)
+    assert exc.value.status_code == 400
+
+    # by supplier: b goes to acme (carries two of the three lines), c to zeta
+    fill_cart((a, 1), (b, 4), (c, 5))
+    with count_queries() as statements:
+        pos = create_purchase_orders_by_supplier_from_cart_service(db, PurchaseOrderCreateFromCartBySupplier(), user.id)
+    assert len(statements) == 3  # cart lock, supplier coverage, insert
+    assert [(p["supplier_id"], [(l["item_id"], l["ordered_qty"]) for l in p["po_items"]]) for p in pos] == [
+        (acme.id, [(a.id, 1), (b.id, 4)]), (zeta.id, [(c.id, 5)]),
+    ]
+    assert db.query(PurchaseOrderItem).filter(PurchaseOrderItem.purchase_order_id.in_([p["id"] for p in pos])).count() == 3
+
+    # an item no supplier carries fails the whole split and keeps the cart
+    fill_cart((a, 1), (orphan, 1))
+    with pytest.raises(HTTPException) as exc:
+        create_purchase_orders_by_supplier_from_cart_service(db, PurchaseOrderCreateFromCartBySupplier(), user.id)
+    assert exc.value.status_code == 400
+    assert str(orphan.id) in exc.value.detail
+    assert db.query(CartItem).filter(CartItem.user_id == user.id).count() == 2
+
+def test_by_supplier_split_matches_cover_plan(get_test_db, create_user, create_item):
+    import uuid
+    from database.models import CartItem, Supplier, SupplierItem
+    from database.schemas.purchase_order import PurchaseOrderCreateFromCartBySupplier
+    from database.services.purchase_order import create_purchase_orders_by_supplier_from_cart_service
+    from database.services.supplier import plan_supplier_cover
+
+    db = get_test_db
+    tag = uuid.uuid4().hex[:6]
+    user = create_user()
+    first, overlap, rest = (Supplier(name=f"{n} {tag}", email=f"{n}@example.com") for n in ("first", "overlap", "rest"))
+    db.add_all([first, overlap, rest])
+    db.commit()
+    a, b, c, d, x, e = (create_item() for _ in range(6))
+    # `overlap` carries as many of the cart's lines as `first`, but once `first`
+    # is picked it only adds x, which `rest` covers together with e
+    db.add_all(
+        SupplierItem(supplier_id=s.id, item_id=it.id)
+        for s, it in ((first, a), (first, b), (first, c), (first, d),
+                      (overlap, a), (overlap, b), (overlap, c), (overlap, x), (rest, x), (rest, e))
+    )
+    db.add_all(CartItem(user_id=user.id, item_id=it.id, quantity=1) for it in (a, b, c, d, x, e))
+    db.commit()
+
+    plan = plan_supplier_cover(db, [it.id for it in (a, b, c, d, x, e)])
+    pos = create_purchase_orders_by_supplier_from_cart_service(db, PurchaseOrderCreateFromCartBySupplier(), user.id)
+    assert sorted((g["supplier"].id, g["item_ids"]) for g in plan["groups"]) == sorted(
+        (p["supplier_id"], [l["item_id"] for l in p["po_items"]]) for p in pos
+    ) == sorted([(first.id, sorted([a.id, b.id, c.id, d.id])), (rest.id, sorted([x.id, e.id]))])
@@ -0,0 +1,27 @@
+BASE_PATH = "/levelsliving/app/api/v1/supplier"
+
+# POST /cover-plan
+def test_cover_plan_splits_items_across_fewest_suppliers(client, get_test_db, create_item):
+    import uuid
+    from database.models import Supplier, SupplierItem
+
+    db = get_test_db
+    tag = uuid.uuid4().hex[:6]
+    small, wide, single = (Supplier(name=f"{n} {tag}", email=f"{n.lower()}@example.com") for n in ("Small", "Wide", "Single"))
+    db.add_all([small, wide, single])
+    db.commit()
+    a, b, c, d, nobody = (create_item() for _ in range(5))
+    db.add_all(
+        SupplierItem(supplier_id=s.id, item_id=it.id)
+        for s, it in ((small, a), (small, b), (wide, b), (wide, c), (wide, d), (single, d))
+    )
+    db.commit()
+
+    resp = client.post(f"{BASE_PATH}/cover-plan", json={"item_ids": [d.id, a.id, b.id, c.id, nobody.id, a.id]})
+    assert resp.status_code == 200, resp.text
+    plan = resp.json()
+    assert [(g["supplier"]["id"], g["item_ids"]) for g in plan["groups"]] == [
+        (wide.id, [b.id, c.id, d.id]), (small.id, [a.id]),
+    ]
+    assert plan["groups"][0]["supplier"]["name"] == f"Wide {tag}"
+    assert plan["uncovered_item_ids"] == [nobody.id]
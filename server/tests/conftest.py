@@ -143,4 +143,29 @@ def create_item(get_test_db):
         get_test_db.refresh(it)
         return it
 
-    return _create_item
\ No newline at end of file
+    return _create_item
+
+
+@pytest.fixture
+def count_queries(engine):
+    """
+    Context manager that records the SQL statements sent through `engine`.
+    Usage: `with count_queries() as statements: ...; assert len(statements) == 1`
+    """
+    from contextlib import contextmanager
+    from sqlalchemy import event
+
+    @contextmanager
+    def _count():
+        statements = []
+
+        def _record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", _record)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, "before_cursor_execute", _record)
+
+    return _count
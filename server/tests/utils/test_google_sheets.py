@@ -0,0 +1,315 @@
+import gspread
+
+from app.utils.google_sheets import GoogleSheetsClient, ITEM_HEADERS, SUPPLIER_HEADERS
+
+
+class FakeWorksheet:
+    """In-memory worksheet: `rows[0]` is row 1; records the API calls made."""
+
+    def __init__(self, title="Inventory", rows=None):
+        self.title = title
+        self.rows = [list(r) for r in (rows if rows is not None else [ITEM_HEADERS])]
+        self.calls = []
+
+    @property
+    def row_count(self):
+        return len(self.rows)
+
+    @property
+    def col_count(self):
+        return max((len(r) for r in self.rows), default=0)
+
+    def row_values(self, n):
+        self.calls.append("row_values")
+        return self.rows[n - 1] if n <= len(self.rows) else []
+
+    def col_values(self, c):
+        self.calls.append("col_values")
+        return [r[c - 1] if len(r) >= c else "" for r in self.rows]
+
+    def append_row(self, row):
+        self.calls.append("append_row")
+        self.rows.append([str(v) for v in row])
+        n = len(self.rows)
+        return {"updates": {"updatedRange": f"{self.title}!A{n}:I{n}"}}
+
+    def update(self, *args, values=None, range_name=None, include_values_in_response=False):
+        if args:  # update('A2:I2', [row])
+            range_name, values = args
+        self.calls.append(("update", range_name))
+        start = int(range_name.split(":")[0][1:])
+        for offset, row in enumerate(values):
+            n = start + offset
+            while len(self.rows) < n:
+                self.rows.append([])
+            self.rows[n - 1] = [str(v) for v in row]
+        end = start + len(values) - 1
+        response = {"updatedRange": f"{self.title}!A{start}:I{end}"}
+        if include_values_in_response:
+            response["updatedData"] = {"values": self.rows[start - 1:end]}
+        return response
+
+    def insert_row(self, row, index=1):
+        self.calls.append("insert_row")
+        self.rows.insert(index - 1, list(row))
+
+    def delete_rows(self, n):
+        self.calls.append("delete_rows")
+        del self.rows[n - 1]
+
+    def resize(self, rows=None, cols=None):
+        self.calls.append("resize")
+        if rows is not None:
+            del self.rows[rows:]
+
+
+class FakeSpreadsheet:
+    def __init__(self, *worksheets):
+        self.sheets = {ws.title: ws for ws in worksheets}
+        self.lookups = 0
+
+    def worksheet(self, title):
+        self.lookups += 1
+        if title not in self.sheets:
+            raise gspread.WorksheetNotFound(title)
+        return self.sheets[title]
+
+    def add_worksheet(self, title, rows, cols):
+        ws = self.sheets[title] = FakeWorksheet(title, rows=[])
+        return ws
+
+
+def _client(ws):
+    client = GoogleSheetsClient("creds.json", "sheet-id")
+    client._worksheets[ws.title] = ws
+    return client
+
+
+def _ids(ws):
+    return [r[0] for r in ws.rows[1:]]
+
+
+# worksheet handles and headers
+def test_ensure_headers_overwrites_old_layout_and_inserts_above_data():
+    outdated = FakeWorksheet("Suppliers", rows=[["ID", "Name"], ["1", "Acme"]])
+    headerless = FakeWorksheet("Inventory", rows=[["1", "SKU-1"]])
+    client = GoogleSheetsClient("creds.json", "sheet-id")
+    client._spreadsheet = FakeSpreadsheet(outdated, headerless)
+    client._load_row_index(headerless)
+
+    client.warm_up()
+    # an older header row (same first column) is rewritten in place
+    assert outdated.rows == [SUPPLIER_HEADERS, ["1", "Acme"]]
+    assert ("update", "A1") in outdated.calls and "insert_row" not in outdated.calls
+    # data in row 1 is pushed down under a new header row, and the index is dropped
+    assert headerless.rows == [ITEM_HEADERS, ["1", "SKU-1"]]
+    assert "insert_row" in headerless.calls
+    assert "Inventory" not in client._row_index
+
+
+def test_worksheet_handles_are_cached_until_invalidated():
+    ws = FakeWorksheet("Inventory")
+    spreadsheet = FakeSpreadsheet(ws)
+    client = GoogleSheetsClient("creds.json", "sheet-id")
+    client._spreadsheet = spreadsheet
+
+    for _ in range(3):
+        assert client.get_or_create_worksheet("Inventory", ITEM_HEADERS) is ws
+    assert spreadsheet.lookups == 1 and ws.calls == ["row_values"]
+
+    client.invalidate_worksheet_cache("Inventory")
+    client.get_or_create_worksheet("Inventory", ITEM_HEADERS)
+    assert spreadsheet.lookups == 2
+
+    # a missing worksheet is created with its header row
+    client.get_or_create_worksheet("Suppliers", SUPPLIER_HEADERS)
+    assert spreadsheet.sheets["Suppliers"].rows == [SUPPLIER_HEADERS]
+
+
+# ID -> row index
+def test_remember_append_tracks_updated_range():
+    ws = FakeWorksheet()
+    client = _client(ws)
+    client._load_row_index(ws)
+
+    client._remember_append(ws, 7, {"updates": {"updatedRange": "'Inventory'!A12:I12"}})
+    assert client._row_index["Inventory"]["7"] == 12
+
+    # an unparseable response drops the index rather than guessing
+    client._remember_append(ws, 8, {})
+    assert "Inventory" not in client._row_index
+
+    # nothing cached yet: nothing to maintain
+    client._remember_append(ws, 9, {"updates": {"updatedRange": "Inventory!A3:I3"}})
+    assert "Inventory" not in client._row_index
+
+
+def test_delete_row_shifts_cached_rows_below():
+    ws = FakeWorksheet()
+    client = _client(ws)
+    for i in (1, 2, 3):
+        assert client.sync_item_create({"id": i, "item_name": f"n{i}"})
+    client._load_row_index(ws)
+
+    assert client.sync_item_delete(1)
+    assert client._row_index["Inventory"] == {"2": 2, "3": 3}
+    ws.calls.clear()
+    assert client.sync_item_update({"id": 3, "item_name": "three"})
+    assert ws.calls == [("update", "A3")]  # one request, no lookup
+    assert _ids(ws) == ["2", "3"] and ws.rows[2][3] == "three"
+    assert client._row_index["Inventory"] == {"2": 2, "3": 3}
+
+
+def test_update_rebuilds_index_on_miss_and_unexpected_write():
+    ws = FakeWorksheet()
+    client = _client(ws)
+    for i in (1, 2):
+        assert client.sync_item_create({"id": i, "item_name": f"n{i}"})
+    client._load_row_index(ws)
+
+    ws.rows.append(["3", "", "", "n3"])  # added by another process
+    ws.calls.clear()
+    assert client.sync_item_update({"id": 3, "item_name": "three"})
+    assert ws.calls == ["col_values", ("update", "A4")]
+    assert _ids(ws) == ["1", "2", "3"] and ws.rows[3][3] == "three"
+
+    # a write reported at another row than the cached one drops the index
+    ws.update = lambda **kwargs: {"updatedRange": "Inventory!A9:I9", "updatedData": {"values": [["2"]]}}
+    assert client.sync_item_update({"id": 2, "item_name": "two"})
+    assert "Inventory" not in client._row_index
+
+
+# outbox deletes
+def test_outbox_delete_of_row_missing_from_sheet_succeeds(get_test_db):
+    from database.models import SheetsOutbox
+    from database.services.sheets_outbox import drain_sheets_outbox
+
+    ws = FakeWorksheet(rows=[ITEM_HEADERS, ["1"]])
+    client = _client(ws)
+    assert client.sync_item_delete(2) is True
+    assert "delete_rows" not in ws.calls
+
+    get_test_db.add(SheetsOutbox(entity="item", entity_id=987654, op="delete"))
+    get_test_db.commit()
+    assert drain_sheets_outbox(get_test_db, client) == 1
+    assert get_test_db.query(SheetsOutbox).filter(SheetsOutbox.entity_id == 987654).count() == 0
+    assert _ids(ws) == ["1"]
+
+
+# rate limiting and retries
+class FakeClock:
+    def __init__(self):
+        self.now, self.sleeps = 0.0, []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(round(seconds, 3))
+        self.now += seconds
+
+
+def _api_error(code):
+    class Response:
+        text = ""
+        def json(self):
+            return {"error": {"code": code, "message": "boom", "status": "X"}}
+    return gspread.exceptions.APIError(Response())
+
+
+def test_write_rate_limiter_allows_burst_then_paces(monkeypatch):
+    from app.utils import google_sheets
+
+    clock = FakeClock()
+    monkeypatch.setattr(google_sheets, "time", clock)
+    limiter = google_sheets.WriteRateLimiter(per_minute=60, burst=2)
+
+    for _ in range(4):
+        limiter.acquire()
+    assert clock.sleeps == [1.0, 1.0]  # two free, then one token per second
+
+
+def test_call_with_backoff_retries_quota_and_server_errors_only(monkeypatch):
+    import pytest
+    from app.utils import google_sheets
+
+    clock = FakeClock()
+    monkeypatch.setattr(google_sheets, "time", clock)
+    monkeypatch.setattr(google_sheets.random, "uniform", lambda lo, hi: 0)
+
+    outcomes = [_api_error(429), _api_error(503), "ok"]
+    def flaky():
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+    assert google_sheets.call_with_backoff(flaky) == "ok"
+    assert clock.sleeps == [1, 2]
+
+    calls = []
+    def rejected():
+        calls.append(1)
+        raise _api_error(400)
+    with pytest.raises(gspread.exceptions.APIError):
+        google_sheets.call_with_backoff(rejected)
+    assert len(calls) == 1
+
+    calls.clear()
+    def down():
+        calls.append(1)
+        raise _api_error(500)
+    with pytest.raises(gspread.exceptions.APIError):
+        google_sheets.call_with_backoff(down, max_retries=2)
+    assert len(calls) == 3
+
+
+# sync_existing_data --bulk
+def test_bulk_sync_resumes_interrupted_chunk_and_skips_finished_sheets(get_test_db, engine, create_item, monkeypatch, tmp_path):
+    import os
+    import pytest
+    from sqlalchemy import func, select
+    import sync_existing_data
+    from database.models import Item
+    from database.services.sheets_outbox import _DRAIN_LOCK_KEY
+
+    for _ in range(3):
+        create_item()
+    item_ids = [str(i) for (i,) in get_test_db.query(Item.id).order_by(Item.id)]
+
+    class FlakyWorksheet(FakeWorksheet):
+        fail_at = None   # range_name whose write fails once
+        drain_lock_free = []
+
+        def update(self, *args, **kwargs):
+            with engine.connect() as conn:
+                self.drain_lock_free.append(conn.execute(select(func.pg_try_advisory_xact_lock(_DRAIN_LOCK_KEY))).scalar())
+            if kwargs.get("range_name") == self.fail_at:
+                self.fail_at = None
+                raise RuntimeError("connection reset")
+            super().update(*args, **kwargs)
+
+    suppliers, inventory = FlakyWorksheet("Suppliers", rows=[]), FlakyWorksheet("Inventory", rows=[])
+    client = GoogleSheetsClient("creds.json", "sheet-id")
+    client._spreadsheet = FakeSpreadsheet(suppliers, inventory)
+    monkeypatch.setattr(sync_existing_data, "get_google_sheets_client", lambda *args: client)
+    checkpoint = str(tmp_path / "checkpoint.json")
+    run = dict(chunk_size=2, writes_per_minute=600000, checkpoint_path=checkpoint, restart=False)
+
+    inventory.fail_at = "A3"   # second Inventory chunk
+    with pytest.raises(RuntimeError):
+        sync_existing_data.bulk_sync(get_test_db, **run)
+    assert FlakyWorksheet.drain_lock_free and not any(FlakyWorksheet.drain_lock_free)
+    assert [r[0] for r in inventory.rows[:2]] == ["ID", item_ids[0]]
+
+    suppliers.calls.clear()
+    inventory.calls.clear()
+    sync_existing_data.bulk_sync(get_test_db, **run)
+    assert suppliers.calls == []   # finished before the interruption
+    writes = [c[1] for c in inventory.calls if isinstance(c, tuple)]
+    assert writes[0] == "A3"       # resumes at the chunk that failed
+    assert inventory.rows[0] == ITEM_HEADERS and _ids(inventory) == item_ids
+    assert not os.path.exists(checkpoint)
+
+    # the drain lock is released with the run
+    with engine.connect() as conn:
+        assert conn.execute(select(func.pg_try_advisory_xact_lock(_DRAIN_LOCK_KEY))).scalar()